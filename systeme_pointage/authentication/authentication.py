@@ -0,0 +1,149 @@
+# authentication/authentication.py
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from authentication.models import Authentication
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_STATE_CACHE_KEY = 'auth:state:{}'
+
+
+def _claims_settings():
+    return getattr(settings, 'JWT_CLAIMS_AUTHENTICATION', {})
+
+
+def _state_cache():
+    # Doit être partagé entre workers pour que l'invalidation soit vue par tous
+    return caches[_claims_settings().get('STATE_CACHE', 'default')]
+
+
+def add_principal_claims(token, auth_obj):
+    """
+    Ajouter au token les informations utilisées par ClaimsJWTAuthentication
+    """
+    token['role'] = auth_obj.role
+    token['email'] = auth_obj.email
+    token['is_staff'] = auth_obj.is_staff
+    token['employee_id'] = auth_obj.employee_id
+    token['departement_id'] = auth_obj.employee.departement_id
+    return token
+
+
+def get_account_state(user_id):
+    """
+    Retourner (actif, rôle, departement_id) d'un compte.
+    Le résultat est gardé en cache quelques secondes : c'est le cache de révocation
+    qui permet de refuser rapidement un compte désactivé sans requête à chaque appel.
+    """
+    key = ACCOUNT_STATE_CACHE_KEY.format(user_id)
+    try:
+        state = _state_cache().get(key)
+    except Exception as e:
+        # Cache indisponible : état lu en base, l'authentification continue
+        logger.error(f"Erreur lors de la lecture de l'état du compte {user_id} en cache: {e}")
+        return _load_account_state(user_id)
+    if state is None:
+        state = _load_account_state(user_id)
+        try:
+            _state_cache().set(key, state, _claims_settings().get('STATE_CACHE_TTL', 60))
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise en cache de l'état du compte {user_id}: {e}")
+    return state
+
+
+def _load_account_state(user_id):
+    row = Authentication.objects.filter(pk=user_id).values_list(
+        'is_active', 'employee__is_active_employee', 'role', 'employee__departement_id'
+    ).first()
+    if not row:
+        return (False, None, None)
+    is_active, is_active_employee, role, departement_id = row
+    return (bool(is_active and is_active_employee), role, departement_id)
+
+
+def invalidate_account_state(user_id):
+    """
+    Oublier l'état en cache une fois la transaction validée (sinon une requête concurrente
+    pourrait remettre en cache l'état d'avant la modification)
+    """
+    def delete():
+        try:
+            _state_cache().delete(ACCOUNT_STATE_CACHE_KEY.format(user_id))
+        except Exception as e:
+            logger.error(f"Erreur lors de l'invalidation de l'état du compte {user_id}: {e}")
+
+    transaction.on_commit(delete)
+
+
+class TokenPrincipal(TokenUser):
+    """
+    Utilisateur léger construit à partir des claims du token (aucune requête SQL).
+    L'employé n'est chargé que si une vue y accède réellement.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def employee_id(self):
+        return self.token.get('employee_id')
+
+    @cached_property
+    def departement_id(self):
+        return self.token.get('departement_id')
+
+    @cached_property
+    def employee(self):
+        from employees.models import Employee
+        return Employee.objects.select_related('departement').get(pk=self.employee_id)
+
+    @property
+    def is_manager(self):
+        return self.role == 'manager'
+
+    @property
+    def is_rh(self):
+        return self.role == 'rh'
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Authentification JWT sans chargement de l'utilisateur en base.
+
+    Si JWT_CLAIMS_AUTHENTICATION['ENABLED'] est actif et que le token contient les claims
+    ajoutés par add_principal_claims(), on retourne un TokenPrincipal. Sinon (anciens tokens,
+    claims périmés après un changement de rôle ou de département) on retombe sur le
+    comportement classique de JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        if not _claims_settings().get('ENABLED', False) or 'role' not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Le token ne contient pas d'identifiant utilisateur")
+
+        is_active, role, departement_id = get_account_state(user_id)
+        if not is_active:
+            raise AuthenticationFailed("Compte désactivé", code='user_inactive')
+
+        if role != validated_token.get('role') or departement_id != validated_token.get('departement_id'):
+            return super().get_user(validated_token)
+
+        return TokenPrincipal(validated_token)
@@ -1,5 +1,30 @@
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import BasePermission
 
+# Portées de visibilité utilisées par les managers Leave/Employee (visible_to)
+SCOPE_ALL = 'all'
+SCOPE_DEPARTMENT = 'department'
+SCOPE_SELF = 'self'
+
+def resolve_visibility(user):
+    """
+    Retourne (portée, valeur) pour un utilisateur :
+    admin/rh/staff -> tout, manager -> son département, employé -> lui-même.
+    PermissionDenied pour un manager sans département (sinon il verrait les lignes sans département)
+    """
+    role = getattr(user, 'role', None)
+    if user.is_staff or role in ['admin', 'rh']:
+        return SCOPE_ALL, None
+    if role == 'manager':
+        # TokenPrincipal porte directement departement_id, sinon on passe par l'employé
+        departement_id = getattr(user, 'departement_id', None)
+        if departement_id is None:
+            departement_id = user.employee.departement_id
+        if departement_id is None:
+            raise PermissionDenied("Aucun département associé au manager.")
+        return SCOPE_DEPARTMENT, departement_id
+    return SCOPE_SELF, user.employee_id
+
 class IsAdminByRoleOrStaff(BasePermission):
     """
     Autorise si user.role == 'admin' OU user.is_staff == True
@@ -2,11 +2,18 @@ from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from employees.models import Employee
 from authentication.models import Authentication
+from authentication.authentication import add_principal_claims
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Serializer personnalisé pour les tokens JWT
     """
+    @classmethod
+    def get_token(cls, user):
+        # Rôle, employé et département embarqués dans le token (voir ClaimsJWTAuthentication)
+        token = super().get_token(user)
+        return add_principal_claims(token, user)
+
     def validate(self, attrs):
         data = super().validate(attrs)
         
@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from authentication.models import Authentication
+from authentication.authentication import invalidate_account_state
+
+@receiver(post_save, sender=Authentication)
+@receiver(post_delete, sender=Authentication)
+def invalidate_cached_account_state(sender, instance, **kwargs):
+    invalidate_account_state(instance.pk)
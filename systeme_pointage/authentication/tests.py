@@ -1,3 +1,34 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from authentication.authentication import _state_cache, get_account_state
+from authentication.models import Authentication
+from departments.models import Department
+from employees.models import Employee
+
+
+class AccountStateCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employee = Employee.objects.create(
+            immatricule='AUT001', nom="Rasoa", poste="Comptable",
+            departement=Department.objects.create(nom="Finance"), email='aut001@example.com',
+        )
+        cls.user = Authentication.objects.create_user(
+            email=employee.email, password='secret', employee=employee, role='employee'
+        )
+
+    def setUp(self):
+        _state_cache().clear()
+
+    def test_desactivation_vue_apres_validation(self):
+        self.assertTrue(get_account_state(self.user.pk)[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertFalse(get_account_state(self.user.pk)[0])
+
+    def test_cache_indisponible(self):
+        with mock.patch('authentication.authentication._state_cache', side_effect=ConnectionError):
+            self.assertEqual(get_account_state(self.user.pk), (True, 'employee', self.user.employee.departement_id))
@@ -1,4 +1,3 @@
-import cv2
 import numpy as np
 import base64
 import json
@@ -94,7 +93,7 @@ class LoginView(APIView):
             if not auth_obj.employee.is_active_employee:
                 return Response({'error': 'Compte employé désactivé'}, status=401)
 
-            refresh = RefreshToken.for_user(auth_obj)
+            refresh = CustomTokenObtainPairSerializer.get_token(auth_obj)
 
             return Response({
                 'message': 'Connexion réussie',
@@ -120,11 +119,24 @@ class LoginView(APIView):
             return Response({'error': 'Image requise pour la reconnaissance faciale'}, status=400)
 
         try:
-            employee_id = face_recognition_handler.recognize_face(image_data)
+            immatricule = request.data.get('immatricule')
+            if immatricule:
+                # Identité annoncée : vérification 1:1 au lieu d'une recherche parmi tous les visages
+                employee_id = Employee.objects.filter(immatricule=immatricule).values_list('id', flat=True).first()
+                result = face_recognition_handler.verify_face(employee_id, image_data) if employee_id else {}
+                if not result.get('match'):
+                    employee_id = None
+            else:
+                result = face_recognition_handler.identify_face(image_data)
+                employee_id = result['employee_id']
+
+            if result.get('reason'):
+                # Image inexploitable (floue, sombre, sans visage...) : le client peut reprendre la photo
+                return Response({'error': result['message'], 'motif': result['reason']}, status=400)
 
             if employee_id:
                 try:
-                    employee = Employee.objects.get(id=employee_id)
+                    employee = Employee.objects.select_related('departement').get(id=employee_id)
                     auth_obj = Authentication.objects.get(employee=employee)
 
                     if not auth_obj.is_active:
@@ -133,7 +145,7 @@ class LoginView(APIView):
                     if not employee.is_active_employee:
                         return Response({'error': 'Compte employé désactivé'}, status=401)
 
-                    refresh = RefreshToken.for_user(auth_obj)
+                    refresh = CustomTokenObtainPairSerializer.get_token(auth_obj)
 
                     return Response({
                         'message': 'Connexion par reconnaissance faciale réussie',
@@ -184,7 +196,7 @@ class FacialLoginView(APIView):
             return Response({"error": "Utilisateur non trouvé ou mot de passe requis"}, status=401)
 
         # Générer token JWT
-        refresh = RefreshToken.for_user(user)
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
         return Response({
             'refresh': str(refresh),
             'access': str(refresh.access_token),
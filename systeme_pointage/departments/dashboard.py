@@ -0,0 +1,112 @@
+# departments/dashboard.py
+"""
+Tableau de bord multi-départements : effectifs, présence et congés du jour
+en trois requêtes groupées, quel que soit le nombre de départements.
+
+Mis en cache dans ATTENDANCE_SETTINGS['DASHBOARD_CACHE'] (cache partagé) ; les pointages,
+congés et employés modifiés invalident les jours concernés (departments/signals.py).
+Le cache est une optimisation : une erreur du cache ne fait jamais échouer l'appelant.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Avg, Count, FloatField, Q
+from django.db.models.functions import ExtractHour, ExtractMinute, ExtractSecond
+
+from departments.models import Department
+from leaves.models import Leave
+from pointage.models import Pointage
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_CACHE_KEY = 'departments:dashboard:{}'
+
+
+def _cache():
+    return caches[settings.ATTENDANCE_SETTINGS.get('DASHBOARD_CACHE', 'default')]
+
+
+def get_dashboard(day):
+    key = DASHBOARD_CACHE_KEY.format(day.isoformat())
+    try:
+        data = _cache().get(key)
+    except Exception as e:
+        logger.error(f"Lecture du cache du tableau de bord impossible: {str(e)}")
+        return build_dashboard(day)
+    if data is None:
+        data = build_dashboard(day)
+        try:
+            _cache().set(key, data, settings.ATTENDANCE_SETTINGS['DASHBOARD_CACHE_TTL'])
+        except Exception as e:
+            logger.error(f"Écriture du cache du tableau de bord impossible: {str(e)}")
+    return data
+
+
+def invalidate_dashboard(*days):
+    """
+    Supprimer les entrées des jours donnés. Appelé après le commit : une erreur du cache est
+    journalisée, jamais remontée (le pointage ou la décision est déjà enregistré).
+    """
+    try:
+        _cache().delete_many([DASHBOARD_CACHE_KEY.format(day.isoformat()) for day in days])
+    except Exception as e:
+        logger.error(f"Invalidation du tableau de bord impossible: {str(e)}")
+
+
+def invalidate_dashboard_period(start, end):
+    """Jours [start, end] d'un congé ajouté, modifié ou supprimé"""
+    invalidate_dashboard(*(start + timedelta(days=i) for i in range((end - start).days + 1)))
+
+
+def build_dashboard(day):
+    departments = Department.objects.order_by('nom').annotate(
+        headcount=Count('employees', distinct=True),
+        active=Count('employees', filter=Q(employees__is_active_employee=True), distinct=True),
+    ).values('id', 'nom', 'headcount', 'active')
+
+    # AVG n'existe pas sur le type time : moyenne en secondes depuis minuit
+    arrival_seconds = (
+        ExtractHour('heure_entree') * 3600 + ExtractMinute('heure_entree') * 60 + ExtractSecond('heure_entree')
+    )
+    attendance = {
+        row['employee__departement_id']: row
+        for row in Pointage.objects.filter(date=day, heure_entree__isnull=False)
+        .values('employee__departement_id')
+        .annotate(
+            present=Count('id'),
+            late=Count('id', filter=Q(status='retard')),
+            avg_arrival=Avg(arrival_seconds, output_field=FloatField()),
+        )
+        .order_by()
+    }
+    on_leave = dict(
+        Leave.objects.filter(status_conge=Leave.STATUS_VALIDE).overlapping(day, day)
+        .values('employee__departement_id')
+        .annotate(n=Count('employee_id', distinct=True))
+        .order_by()
+        .values_list('employee__departement_id', 'n')
+    )
+
+    results = []
+    for dept in departments:
+        row = attendance.get(dept['id'], {})
+        results.append({
+            'id': dept['id'],
+            'nom': dept['nom'],
+            'headcount': dept['headcount'],
+            'active': dept['active'],
+            'present_today': row.get('present', 0),
+            'late_today': row.get('late', 0),
+            'on_leave': on_leave.get(dept['id'], 0),
+            'average_arrival': _format_seconds(row.get('avg_arrival')),
+        })
+    return {'date': day.isoformat(), 'departments': results}
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return None
+    seconds = int(round(seconds))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}"
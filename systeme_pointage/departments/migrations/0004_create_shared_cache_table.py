@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:00
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    """
+    Tables des caches DatabaseCache (CACHES['shared'] : tableau de bord...).
+    createcachetable ignore les tables déjà présentes.
+    """
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("departments", "0003_alter_department_manager"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,20 @@
 # departments/models.py
 
 from django.db import models
+from django.db.models import Count, Q
 from employees.models import Employee
 
+
+class DepartmentQuerySet(models.QuerySet):
+    def with_counts(self):
+        """
+        Nombre d'employés actifs et manager chargés dans la même requête (DepartmentSerializer)
+        """
+        return self.select_related('manager').annotate(
+            employees_count=Count('employees', filter=Q(employees__is_active_employee=True))
+        )
+
+
 class Department(models.Model):
     nom = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
@@ -17,6 +29,8 @@ class Department(models.Model):
         related_name='managed_departments'
     )
 
+    objects = DepartmentQuerySet.as_manager()
+
     class Meta:
         db_table = 'department'
         verbose_name = 'Département'
@@ -1,6 +1,7 @@
 
 from rest_framework import serializers
 from .models import Department
+from utils.serializers import SparseFieldsetMixin
 
 # ✅ Champ personnalisé pour filtrer les managers
 class ManagerPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
@@ -15,7 +16,7 @@ class SimpleDepartmentSerializer(serializers.ModelSerializer):
         fields = ['id', 'nom']
 
 # ✅ Serializer principal avec validation manager unique
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     employees_count = serializers.SerializerMethodField()
     manager = serializers.SerializerMethodField()  # lecture seule
     manager_id = ManagerPrimaryKeyRelatedField(   # écriture uniquement
@@ -35,13 +36,18 @@ class DepartmentSerializer(serializers.ModelSerializer):
             'id', 'created_at', 'updated_at',
             'employees_count', 'manager'
         ]
+        field_dependencies = {'manager': ['manager']}
 
     def get_employees_count(self, obj):
-        return obj.employees.filter(is_active_employee=True).count()
+        # Annotation de Department.objects.with_counts() si présente, sinon requête
+        count = getattr(obj, 'employees_count', None)
+        if count is None:
+            count = obj.employees.filter(is_active_employee=True).count()
+        return count
 
     def get_manager(self, obj):
         from employees.serializers import SimpleEmployeeSerializer  # import dynamique
-        if obj.manager:
+        if obj.manager_id:
             return SimpleEmployeeSerializer(obj.manager).data
         return None
 
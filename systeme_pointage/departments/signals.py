@@ -0,0 +1,45 @@
+# departments/signals.py
+"""
+Invalidation du tableau de bord (departments/dashboard.py) après le commit des changements
+qui modifient ses chiffres : pointages, congés, employés.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from departments.dashboard import invalidate_dashboard, invalidate_dashboard_period
+from employees.models import Employee
+from leaves.models import Leave
+from leaves.workflow import leave_transitioned
+from pointage.models import Pointage
+
+
+@receiver(post_save, sender=Pointage)
+@receiver(post_delete, sender=Pointage)
+def pointage_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_dashboard, instance.date))
+
+
+@receiver(post_save, sender=Leave)
+@receiver(post_delete, sender=Leave)
+def leave_changed(sender, instance, **kwargs):
+    # Seuls les congés validés sont comptés dans le tableau de bord
+    if instance.status_conge == Leave.STATUS_VALIDE and instance.date_debut and instance.date_fin:
+        transaction.on_commit(partial(invalidate_dashboard_period, instance.date_debut, instance.date_fin))
+
+
+@receiver(leave_transitioned)
+def leave_decided(sender, leaves, transition, **kwargs):
+    # Validations/rejets groupés (UPDATE sans post_save)
+    for leave in leaves:
+        transaction.on_commit(partial(invalidate_dashboard_period, leave.date_debut, leave.date_fin))
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def employee_changed(sender, instance, **kwargs):
+    # Effectifs : seul le tableau du jour est affecté par un changement présent
+    transaction.on_commit(partial(invalidate_dashboard, timezone.localdate()))
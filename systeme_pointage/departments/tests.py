@@ -1,3 +1,36 @@
+from datetime import date
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from departments.dashboard import DASHBOARD_CACHE_KEY, _cache, get_dashboard, invalidate_dashboard
+from departments.models import Department
+from employees.models import Employee
+from pointage.models import Pointage
+
+
+class DashboardCacheTests(TestCase):
+    DAY = date(2026, 3, 2)
+
+    @classmethod
+    def setUpTestData(cls):
+        departement = Department.objects.create(nom="Logistique")
+        cls.employee = Employee.objects.create(
+            immatricule='LOG001', nom="Rabe", poste="Magasinier", departement=departement,
+        )
+
+    def setUp(self):
+        _cache().clear()
+
+    def test_pointage_invalide_le_jour(self):
+        get_dashboard(self.DAY)
+        self.assertIsNotNone(_cache().get(DASHBOARD_CACHE_KEY.format(self.DAY.isoformat())))
+        with self.captureOnCommitCallbacks(execute=True):
+            Pointage.objects.create(employee=self.employee, date=self.DAY)
+        self.assertIsNone(_cache().get(DASHBOARD_CACHE_KEY.format(self.DAY.isoformat())))
+
+    def test_erreur_du_cache_non_remontee(self):
+        broken = mock.Mock(**{'get.side_effect': OSError, 'delete_many.side_effect': OSError})
+        with mock.patch('departments.dashboard._cache', return_value=broken):
+            invalidate_dashboard(self.DAY)
+            self.assertEqual(get_dashboard(self.DAY)['date'], self.DAY.isoformat())
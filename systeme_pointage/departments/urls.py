@@ -6,6 +6,10 @@ urlpatterns = [
     # Affiche la liste de tous les départements (accessible à tout utilisateur authentifié)
     path('departments/', views.DepartmentListView.as_view(), name='department-list'),
 
+    # 🔹 GET /api/departments/dashboard/?date=YYYY-MM-DD
+    # Tableau de bord de tous les départements : effectifs, présents, retards, congés du jour (admin/RH)
+    path('dashboard/', views.DepartmentDashboardView.as_view(), name='department-dashboard'),
+
     # 🔹 POST /api/departments/create/
     # Créer un nouveau département (réservé aux administrateurs)
     path('create/', views.DepartmentCreateView.as_view(), name='department-create'),
@@ -40,4 +44,5 @@ urlpatterns = [
 # | PUT     | `/api/departments/3/`       | Modification DEPARTEMENT(admin)        |
 # | DELETE  | `/api/departments/3/`       | Suppression (admin)         |
 # | GET     | `/api/departments/3/stats/` | Statistiques et congés      |
+# | GET     | `/api/departments/dashboard/` | Tableau de bord du jour (admin/RH) |
 # | PUT    | `/api/departments/1/manager/` | MODIF MANAGER      |
@@ -3,30 +3,36 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import APIException
 from django.db import transaction
 from django.shortcuts import get_object_or_404
 
 from .models import Department
 from .serializers import DepartmentSerializer, DepartmentCreateSerializer
+from .dashboard import get_dashboard
+from utils.pagination import PaginatedAPIViewMixin
 from authentication.models import Authentication
 from leaves.models import Leave  # si la gestion des congés est liée
 from employees.serializers import EmployeeSerializer
 from datetime import date
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 logger = logging.getLogger(__name__)
 
 
-class DepartmentListView(APIView):
+class DepartmentListView(PaginatedAPIViewMixin, APIView):
     permission_classes = [IsAuthenticated]
+    page_size = 100  # listes déroulantes : une seule page dans la plupart des cas
 
     def get(self, request):
         try:
-            departments = Department.objects.all().order_by('nom')
-            serializer = DepartmentSerializer(departments, many=True)
-            return Response({
-                'departments': serializer.data,
-                'count': departments.count()
-            }, status=status.HTTP_200_OK)
+            departments = DepartmentSerializer.optimize_queryset(Department.objects.with_counts().order_by('nom'), request)
+            page = self.paginate_queryset(departments)
+            serializer = DepartmentSerializer(page, many=True, context={'request': request})
+            return Response(self.get_paginated_data('departments', serializer.data), status=status.HTTP_200_OK)
+        except APIException:
+            raise  # page invalide : 404 DRF
         except Exception as e:
             logger.error(f"Erreur récupération des départements: {str(e)}")
             return Response({'error': 'Erreur lors de la récupération des départements'}, status=500)
@@ -61,7 +67,7 @@ class DepartmentDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            department = get_object_or_404(Department, pk=pk)
+            department = get_object_or_404(Department.objects.with_counts(), pk=pk)
             serializer = DepartmentSerializer(department)
             return Response({'department': serializer.data}, status=200)
         except Exception as e:
@@ -117,10 +123,10 @@ class DepartmentStatsView(APIView):
     def get(self, request, pk):
         try:
             logger.info(f"Demande de stats pour département id={pk}")
-            department = get_object_or_404(Department, pk=pk)
+            department = get_object_or_404(Department.objects.with_counts(), pk=pk)
 
             total_employees = department.employees.count()
-            active_employees = department.employees.filter(is_active_employee=True).count()
+            active_employees = department.employees_count
             inactive_employees = total_employees - active_employees
 
             today = date.today()
@@ -154,6 +160,34 @@ class DepartmentStatsView(APIView):
             return Response({'error': 'Erreur lors de la récupération des statistiques'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class DepartmentDashboardView(APIView):
+    """
+    GET /api/departments/dashboard/?date=YYYY-MM-DD (aujourd'hui par défaut)
+    Pour chaque département : effectif, actifs, présents, retards, en congé, heure moyenne d'arrivée.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        if not (user.is_staff or getattr(user, 'role', None) in ['admin', 'rh']):
+            return Response({'error': 'Accès réservé aux administrateurs et RH.'}, status=403)
+
+        day = timezone.now().date()  # même convention que FacialCheckInView
+        if request.query_params.get('date'):
+            try:
+                day = parse_date(request.query_params['date'])
+            except ValueError:
+                day = None
+            if day is None:
+                return Response({'error': 'Date invalide. Format attendu : YYYY-MM-DD.'}, status=400)
+
+        try:
+            return Response(get_dashboard(day), status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Erreur tableau de bord départements: {str(e)}")
+            return Response({'error': 'Erreur lors de la récupération du tableau de bord'}, status=500)
+
+
 class DepartmentManagerView(APIView):
     permission_classes = [IsAuthenticated]
 
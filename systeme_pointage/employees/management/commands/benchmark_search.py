@@ -0,0 +1,80 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from departments.models import Department
+from employees.models import Employee
+
+NOMS = ["Rakoto", "Rabe", "Randria", "Rasoa", "Andria", "Razafy", "Ravelo", "Rajaona", "Hery", "Fara"]
+SUFFIXES = ["nirina", "malala", "soa", "niaina", "fidy", "tiana", "manana", "harisoa", "lala", "vola"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesurer la latence de EmployeeQuerySet.search sur une population synthétique "
+        "(créée dans une transaction annulée à la fin)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--population', type=int, default=50000, help="Nombre d'employés synthétiques")
+        parser.add_argument('--requetes', type=int, default=200, help="Nombre de recherches par type")
+        parser.add_argument('--explain', action='store_true', help="Afficher le plan d'une requête de chaque type")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with transaction.atomic():
+            self._populate(rng, options['population'])
+            queries = {
+                'immatricule': [f"SX{rng.randrange(options['population']):06d}"[:5] for _ in range(options['requetes'])],
+                'nom': [self._name(rng)[:6] for _ in range(options['requetes'])],
+                'faute': [self._typo(rng, self._name(rng)) for _ in range(options['requetes'])],
+                'email': [f"{self._name(rng).lower()[:8]}" for _ in range(options['requetes'])],
+            }
+            for kind, terms in queries.items():
+                self._benchmark(kind, terms, options['explain'])
+            transaction.set_rollback(True)
+
+    def _name(self, rng):
+        return rng.choice(NOMS) + rng.choice(SUFFIXES)
+
+    def _typo(self, rng, name):
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1:]
+
+    def _populate(self, rng, population):
+        started = time.perf_counter()
+        departement = Department.objects.create(nom="Benchmark recherche")
+        batch = []
+        for i in range(population):
+            nom, prenom = self._name(rng), self._name(rng)
+            batch.append(Employee(
+                immatricule=f"SX{i:06d}", username=f"SX{i:06d}", nom=nom, prenom=prenom,
+                email=f"{prenom.lower()}.{nom.lower()}{i}@benchmark.local",
+                poste="Benchmark", departement=departement,
+            ))
+            if len(batch) == 5000:
+                Employee.objects.bulk_create(batch)
+                batch = []
+        Employee.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            # Statistiques à jour : sinon le planificateur ignore les index trigramme
+            cursor.execute(f"ANALYZE {Employee._meta.db_table}")
+        self.stdout.write(f"{population} employé(s) créés en {time.perf_counter() - started:.1f} s")
+
+    def _benchmark(self, kind, terms, explain):
+        # Même coût que l'API : première page de 20 résultats classés
+        timings, hits = [], 0
+        for term in terms:
+            started = time.perf_counter()
+            page = list(Employee.objects.search(term).values_list('id', flat=True)[:20])
+            timings.append((time.perf_counter() - started) * 1000)
+            hits += bool(page)
+        self.stdout.write(
+            f"{kind} : p50 {np.percentile(timings, 50):.1f} ms, p95 {np.percentile(timings, 95):.1f} ms, "
+            f"max {max(timings):.1f} ms, avec résultat {hits}/{len(terms)}"
+        )
+        if explain:
+            self.stdout.write(Employee.objects.search(terms[0])[:20].explain(analyze=True))
@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from utils.face_embedding import EMBEDDING_DIM, EMBEDDING_DTYPE
+from utils.face_index import ExactIndex, create_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruire l'index facial, ou mesurer rappel et latence du backend configuré "
+        "par rapport à la recherche exhaustive"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help="Reconstruire l'index depuis le fichier des encodages")
+        parser.add_argument('--benchmark', action='store_true', help="Comparer le backend configuré à la recherche exacte")
+        parser.add_argument('--population', type=int, default=0,
+                            help="Compléter avec des vecteurs synthétiques jusqu'à cette taille (ex. 20000)")
+        parser.add_argument('--requetes', type=int, default=500, help="Nombre de sondes")
+        parser.add_argument('--bruit', type=float, default=0.05, help="Écart-type du bruit ajouté aux sondes")
+
+    def handle(self, *args, **options):
+        from utils.face_recognition_utils import face_recognition_handler as handler
+
+        if options['rebuild'] or not options['benchmark']:
+            index = handler.build_index()
+            self.stdout.write(self.style.SUCCESS(f"Index reconstruit : {len(index)} encodage(s) ({index.backend})"))
+        if options['benchmark']:
+            self._benchmark(handler.get_index(), options)
+
+    def _benchmark(self, enrolled, options):
+        rng = np.random.default_rng(0)
+        labels, vectors = enrolled.labels, enrolled.vectors.astype(np.float32)
+
+        missing = options['population'] - len(labels)
+        if missing > 0:
+            # Vecteurs synthétiques suivant la distribution des encodages réels (si disponibles)
+            mean = vectors.mean(axis=0) if len(vectors) else np.zeros(EMBEDDING_DIM, dtype=np.float32)
+            std = vectors.std(axis=0) if len(vectors) > 1 else np.ones(EMBEDDING_DIM, dtype=np.float32)
+            synthetic = rng.normal(mean, std, size=(missing, EMBEDDING_DIM)).astype(np.float32)
+            start = int(labels.max()) + 1 if len(labels) else 1
+            labels = np.concatenate([labels, np.arange(start, start + missing)])
+            vectors = np.vstack([vectors, synthetic])
+        if not len(labels):
+            self.stderr.write("Aucun encodage : utiliser --population")
+            return
+
+        exact, candidate = ExactIndex(), create_index()
+        exact.build(labels, vectors)
+        started = time.perf_counter()
+        candidate.build(labels, vectors)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        rows = rng.integers(0, len(labels), options['requetes'])
+        probes = (vectors[rows] + rng.normal(0, options['bruit'], size=(len(rows), EMBEDDING_DIM))).astype(EMBEDDING_DTYPE)
+
+        exact_ms, candidate_ms, hits = [], [], 0
+        for probe in probes:
+            started = time.perf_counter()
+            expected = exact.search(probe)
+            exact_ms.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            found = candidate.search(probe)
+            candidate_ms.append((time.perf_counter() - started) * 1000)
+            hits += bool(found) and found[0][0] == expected[0][0]
+
+        self.stdout.write(f"Population : {len(labels)}, sondes : {len(probes)}, construction : {build_ms:.0f} ms")
+        for name, timings in ((exact.backend, exact_ms), (candidate.backend, candidate_ms)):
+            self.stdout.write(
+                f"{name} : p50 {np.percentile(timings, 50):.2f} ms, p95 {np.percentile(timings, 95):.2f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rappel@1 : {hits / len(probes):.3f}"))
@@ -0,0 +1,83 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from employees.models import Employee
+from utils.face_embedding import is_compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculer depuis les images enregistrées les encodages faciaux à l'ancien format "
+        "(Employee.face_encoding et fichier des encodages). Sans image exploitable, l'ancien "
+        "encodage est conservé tel quel et l'employé doit être réenrôlé"
+    )
+
+    def handle(self, *args, **options):
+        from utils.face_recognition_utils import face_recognition_handler as handler
+
+        # Les workers n'ajoutent pas de modèle pendant la réécriture du fichier
+        with handler.encodings_lock():
+            self._reencode(handler)
+
+    def _reencode(self, handler):
+        from utils.face_recognition_utils import face_templates, new_template
+
+        known = handler.load_face_encodings()
+        employees = Employee.objects.only('id', 'photo', 'face_encoding')
+        to_update = []
+        stats = {'image': 0, 'inchange': 0, 'echec': 0}
+
+        for employee in employees.iterator(chunk_size=500):
+            key = str(employee.id)
+            if employee.face_encoding is None and key not in known:
+                continue
+            templates = face_templates(known[key]) if key in known else []
+            stored = ([employee.face_encoding] if employee.face_encoding is not None else []) \
+                + [t['encoding'] for t in templates]
+            if all(is_compact(encoding) for encoding in stored):
+                stats['inchange'] += 1
+                continue
+
+            # Landmarks normalisés sans la taille de l'image d'origine : pas de conversion à
+            # l'aveugle, seule une nouvelle extraction depuis l'image est fiable
+            encoding = self._from_images(handler, employee)
+            if encoding is None:
+                stats['echec'] += 1
+                self.stderr.write(
+                    f"Employé {employee.id} : aucune image exploitable, ancien encodage conservé (réenrôlement nécessaire)"
+                )
+                continue
+            stats['image'] += 1
+
+            if employee.face_encoding is not None:
+                employee.face_encoding = encoding.tolist()
+                to_update.append(employee)
+            if key in known:
+                # Modèles déjà compacts conservés ; les anciens sont remplacés par le nouvel encodage
+                compact = [t for t in templates if is_compact(t['encoding'])]
+                if len(compact) < len(templates):
+                    compact.append(new_template(encoding))
+                known[key] = compact
+
+        Employee.objects.bulk_update(to_update, ['face_encoding'], batch_size=500)
+        handler.write_face_encodings(known)
+        handler.build_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['image']} recalculé(s) depuis image, {stats['inchange']} déjà au format compact, "
+            f"{stats['echec']} sans image (inchangé(s))"
+        ))
+
+    def _from_images(self, handler, employee):
+        paths = [os.path.join(settings.FACE_IMAGES_DIR, f"employee_{employee.id}.jpg")]
+        if employee.photo:
+            paths.append(employee.photo.path)
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            image = handler.preprocess_image(path)
+            encoding = handler.extract_face_encoding(image) if image is not None else None
+            if encoding is not None:
+                return encoding
+        return None
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:00
+
+from django.db import migrations
+import employees.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employees", "0003_employee_solde_conge_annuel_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="employee",
+            managers=[
+                ("objects", employees.models.EmployeeManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:00
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employees", "0004_alter_employee_managers"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["nom"], name="employee_nom_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["prenom"], name="employee_prenom_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["email"], name="employee_email_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["immatricule"], name="employee_immat_prefix", opclasses=["varchar_pattern_ops"]
+            ),
+        ),
+    ]
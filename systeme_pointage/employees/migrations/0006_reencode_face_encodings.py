@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:00
+
+import logging
+
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+# Taille d'un embedding compact (utils/face_embedding.py) au moment de la migration
+EMBEDDING_DIM = 123
+
+
+def report_legacy_encodings(apps, schema_editor):
+    """
+    Aucune conversion ici : les anciens encodages (landmarks normalisés 0-1, sans la taille de
+    l'image d'origine) ne peuvent pas être ramenés fidèlement dans l'espace des sondes en pixels.
+    Ils restent au format ancien (ignorés, avec avertissement, par l'index) jusqu'à
+    `manage.py reencode_faces`, qui les recalcule depuis les images enregistrées.
+    """
+    Employee = apps.get_model("employees", "Employee")
+    legacy = [
+        employee_id
+        for employee_id, encoding in Employee.objects.filter(face_encoding__isnull=False)
+        .values_list("id", "face_encoding").iterator()
+        if len(encoding) != EMBEDDING_DIM
+    ]
+    if legacy:
+        logger.warning(
+            "%d encodage(s) facial(aux) à l'ancien format : lancer `manage.py reencode_faces` (employés %s)",
+            len(legacy), ", ".join(map(str, legacy)),
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employees", "0005_employee_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(report_legacy_encodings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employees", "0006_reencode_face_encodings"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(fields=["nom", "prenom", "id"], name="employee_nom_prenom_id"),
+        ),
+    ]
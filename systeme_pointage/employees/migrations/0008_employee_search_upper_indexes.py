@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:00
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employees", "0007_employee_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("nom"), name="gin_trgm_ops"
+                ),
+                name="employee_nom_up_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("prenom"), name="gin_trgm_ops"
+                ),
+                name="employee_prenom_up_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("email"), name="gin_trgm_ops"
+                ),
+                name="employee_email_up_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("immatricule"), name="gin_trgm_ops"
+                ),
+                name="employee_immat_up_trgm",
+            ),
+        ),
+    ]
@@ -1,7 +1,66 @@
-from django.contrib.auth.models import AbstractUser, Group, Permission
+from django.contrib.auth.models import AbstractUser, Group, Permission, UserManager
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Upper
+from authentication.permissions import resolve_visibility, SCOPE_DEPARTMENT, SCOPE_SELF
 import os
 
+class EmployeeQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Employés visibles par l'utilisateur (admin/rh: tous, manager: son département, employé: lui-même)
+        """
+        scope, value = resolve_visibility(user)
+        qs = self.select_related('departement')
+        if scope == SCOPE_DEPARTMENT:
+            return qs.filter(departement_id=value)
+        if scope == SCOPE_SELF:
+            return qs.filter(pk=value)
+        return qs
+
+    def with_leave_balance(self):
+        """
+        Annoter le total des jours de congé validés et le nombre de demandes en attente
+        (lu par les serializers de solde de congés)
+        """
+        return self.annotate(
+            total_conges_approuves=Coalesce(
+                Sum('leaves__duree_jours', filter=Q(leaves__status_conge='valide')), Value(0)
+            ),
+            demandes_en_attente=Count('leaves', filter=Q(leaves__status_conge='en_attente')),
+        )
+
+    def search(self, terms):
+        """
+        Recherche classée : immatricule commençant par `terms` en premier, puis similarité
+        trigramme sur nom, prénom et email. Les sous-chaînes (icontains, ancienne recherche)
+        restent trouvées. Index GIN pg_trgm, pas de parcours complet
+        """
+        terms = terms.strip()
+        prefix = Q(immatricule__startswith=terms) | Q(immatricule__startswith=terms.upper())
+        return self.filter(
+            prefix
+            | Q(nom__trigram_word_similar=terms)
+            | Q(prenom__trigram_word_similar=terms)
+            | Q(email__trigram_word_similar=terms)
+            | Q(nom__icontains=terms)
+            | Q(prenom__icontains=terms)
+            | Q(email__icontains=terms)
+            | Q(immatricule__icontains=terms)
+        ).annotate(
+            immatricule_match=Case(When(prefix, then=Value(1)), default=Value(0), output_field=IntegerField()),
+            rank=Greatest(
+                TrigramWordSimilarity(terms, 'nom'),
+                TrigramWordSimilarity(terms, 'prenom'),
+                TrigramWordSimilarity(terms, 'email'),
+            ),
+        ).order_by('-immatricule_match', '-rank', 'nom', 'prenom')
+
+class EmployeeManager(UserManager.from_queryset(EmployeeQuerySet)):
+    pass
+
 class Employee(AbstractUser):
     immatricule = models.CharField(max_length=20, unique=True)
     nom = models.CharField(max_length=100)
@@ -43,10 +102,25 @@ class Employee(AbstractUser):
         related_query_name='employee',
     )
 
+    objects = EmployeeManager()
+
     class Meta:
         db_table = 'employee'
         verbose_name = 'Employé'
         verbose_name_plural = 'Employés'
+        indexes = [
+            GinIndex(fields=['nom'], name='employee_nom_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['prenom'], name='employee_prenom_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['email'], name='employee_email_trgm', opclasses=['gin_trgm_ops']),
+            models.Index(fields=['immatricule'], name='employee_immat_prefix', opclasses=['varchar_pattern_ops']),
+            # icontains s'écrit UPPER(col) LIKE UPPER(%s) : index trigramme sur UPPER(col)
+            GinIndex(OpClass(Upper('nom'), name='gin_trgm_ops'), name='employee_nom_up_trgm'),
+            GinIndex(OpClass(Upper('prenom'), name='gin_trgm_ops'), name='employee_prenom_up_trgm'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='employee_email_up_trgm'),
+            GinIndex(OpClass(Upper('immatricule'), name='gin_trgm_ops'), name='employee_immat_up_trgm'),
+            # Clé du curseur des listes (utils.pagination.KeysetPagination)
+            models.Index(fields=['nom', 'prenom', 'id'], name='employee_nom_prenom_id'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.username:
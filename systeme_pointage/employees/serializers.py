@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from utils.face_recognition_utils import face_recognition_handler
 from .models import Employee
+from utils.serializers import SparseFieldsetMixin
 from PIL import Image
 import numpy as np
 import logging
@@ -12,7 +13,7 @@ class SimpleEmployeeSerializer(serializers.ModelSerializer):
         model = Employee
         fields = ['id', 'immatricule', 'nom', 'prenom', 'email']
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     departement_info = serializers.SerializerMethodField()
     photo_url = serializers.SerializerMethodField()
 
@@ -24,6 +25,9 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'is_active_employee', 'date_embauche', 'created_at', 'updated_at'
         ]
         read_only_fields = ['face_encoding', 'created_at', 'updated_at']
+        # Embedding de 123 valeurs : absent des listes sauf ?expand=face_encoding
+        expandable_fields = ['face_encoding']
+        field_dependencies = {'departement_info': ['departement'], 'photo_url': ['photo']}
 
     def get_departement_info(self, obj):
         # Import local pour éviter circular import
@@ -2,11 +2,14 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from employees.models import Employee
 from authentication.models import Authentication
+from authentication.authentication import invalidate_account_state
 
 @receiver(post_save, sender=Employee)
 def sync_auth_role(sender, instance, **kwargs):
     try:
         auth = Authentication.objects.get(employee=instance)
+        # Statut ou département de l'employé modifié : l'état mis en cache n'est plus fiable
+        invalidate_account_state(auth.pk)
         new_role = 'manager' if instance.poste.lower() == 'manager' else 'employee'
         if auth.role != new_role:
             auth.role = new_role
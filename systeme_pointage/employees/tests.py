@@ -1,3 +1,309 @@
-from django.test import TestCase
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from authentication.models import Authentication
+from departments.models import Department
+from employees.models import Employee
+
+from utils.face_embedding import EMBEDDING_DIM, distances
+from utils.face_index import ExactIndex, IVFIndex, _best_per_label, load_index
+from utils.face_recognition_utils import FaceRecognitionHandler, face_templates, new_template
+
+
+def _vectors(rng, n, dim=EMBEDDING_DIM):
+    return rng.normal(size=(n, dim)).astype(np.float32)
+
+
+class BestPerLabelTests(SimpleTestCase):
+    def test_minimum_par_employe_trie(self):
+        labels = np.array([7, 3, 7, 3, 9])
+        label_distances = np.array([0.9, 0.4, 0.2, 0.6, 0.5])
+        self.assertEqual(
+            _best_per_label(labels, label_distances, k=3),
+            [(7, 0.2), (3, 0.4), (9, 0.5)],
+        )
+
+    def test_k_limite_le_nombre_d_employes(self):
+        labels = np.array([1, 2, 3])
+        self.assertEqual(_best_per_label(labels, np.array([0.3, 0.1, 0.2]), k=1), [(2, 0.1)])
+
+
+class ExactIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.vectors = _vectors(self.rng, 6)
+        self.index = ExactIndex()
+        self.index.build([1, 1, 2, 2, 3, 3], self.vectors)
+
+    def test_recherche_retourne_le_modele_le_plus_proche(self):
+        [(label, distance)] = self.index.search(self.vectors[3], k=1)
+        self.assertEqual(label, 2)
+        self.assertAlmostEqual(distance, 0.0, places=1)
+
+    def test_un_resultat_par_employe(self):
+        results = self.index.search(self.vectors[0], k=5)
+        self.assertEqual(sorted(label for label, _ in results), [1, 2, 3])
+        self.assertEqual([d for _, d in results], sorted(d for _, d in results))
+
+    def test_index_vide(self):
+        self.assertEqual(ExactIndex().search(self.vectors[0]), [])
+
+    def test_templates_remove_add(self):
+        self.assertEqual(len(self.index.templates(2)), 2)
+        self.index.remove(2)
+        self.assertEqual(len(self.index.templates(2)), 0)
+        self.assertNotIn(2, [label for label, _ in self.index.search(self.vectors[3], k=3)])
+
+        self.index.add(2, self.vectors[3:4])
+        np.testing.assert_array_equal(self.index.templates(2), self.vectors[3:4].astype(self.index.vectors.dtype))
+        self.assertEqual(len(self.index), 5)
+
+    def test_copie_independante(self):
+        copy = self.index.copy()
+        copy.remove(1)
+        copy.add(4, self.vectors[:1])
+        self.assertEqual(len(self.index.templates(1)), 2)
+        self.assertEqual(len(self.index.templates(4)), 0)
+        self.assertEqual(len(copy.templates(1)), 0)
+
+    def test_options_des_autres_backends_ignorees(self):
+        self.assertEqual(len(ExactIndex(nprobe=4)), 0)
+
+
+class IVFIndexTests(SimpleTestCase):
+    def setUp(self):
+        # Employés regroupés autour de quelques centres (structure que le k-means doit exploiter)
+        self.rng = np.random.default_rng(1)
+        centers = _vectors(self.rng, 20) * 3
+        self.labels = np.repeat(np.arange(600), 2)
+        employees = centers[self.rng.integers(0, len(centers), 600)] + _vectors(self.rng, 600)
+        self.vectors = np.repeat(employees, 2, axis=0) + 0.05 * _vectors(self.rng, 1200)
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def _index(self, **options):
+        index = IVFIndex(**{'nprobe': 8, 'min_train_size': 500, **options})
+        index.build(self.labels, self.vectors)
+        return index
+
+    def test_non_entraine_sous_le_seuil(self):
+        index = self._index(min_train_size=5000)
+        self.assertFalse(index.is_trained)
+        self.assertIsNone(index._candidates(self.vectors[0]))
+
+    def test_rappel_proche_de_la_recherche_exacte(self):
+        index = self._index()
+        exact = ExactIndex()
+        exact.build(self.labels, self.vectors)
+        self.assertTrue(index.is_trained)
+
+        probes = self.vectors[::6] + 0.05 * _vectors(self.rng, 200)
+        found = sum(index.search(p, k=1)[0][0] == exact.search(p, k=1)[0][0] for p in probes)
+        self.assertGreaterEqual(found / len(probes), 0.95)
+
+    def test_ajout_et_retrait_gardent_les_cellules(self):
+        index = self._index()
+        index.add(9999, self.vectors[:1])
+        self.assertEqual(len(index.assign), len(index))
+        self.assertAlmostEqual(index.search(self.vectors[0], k=2)[0][1], 0.0, places=1)
+        index.remove(0)
+        self.assertEqual(len(index.assign), len(index))
+        self.assertNotIn(0, [label for label, _ in index.search(self.vectors[0], k=3)])
+
+    def test_reentrainement_quand_l_index_grossit(self):
+        index = IVFIndex(min_train_size=10, retrain_factor=2)
+        index.build(self.labels[:20], self.vectors[:20])
+        self.assertEqual(index.trained_size, 20)
+        index.add(9999, self.vectors[20:40])
+        self.assertEqual(index.trained_size, 40)
+
+    def test_sauvegarde_et_rechargement(self):
+        index = self._index()
+        index.version = 42
+        path = os.path.join(self.tmp, 'index.npz')
+        index.save(path)
+
+        loaded = IVFIndex.from_file(path, nprobe=8, min_train_size=500)
+        self.assertEqual(loaded.version, 42)
+        self.assertTrue(loaded.is_trained)
+        self.assertEqual(loaded.trained_size, index.trained_size)
+        np.testing.assert_array_equal(loaded.centroids, index.centroids)
+        np.testing.assert_array_equal(loaded.assign, index.assign)
+        np.testing.assert_array_equal(loaded.labels, index.labels)
+        self.assertEqual(loaded.search(self.vectors[5], k=3), index.search(self.vectors[5], k=3))
+
+    def test_rechargement_avec_un_autre_backend(self):
+        path = os.path.join(self.tmp, 'index.npz')
+        self._index().save(path)
+        self.assertIsNone(ExactIndex.from_file(path))
+        exact = {**settings.FACE_RECOGNITION_SETTINGS, 'INDEX': {'BACKEND': 'utils.face_index.ExactIndex'}}
+        with override_settings(FACE_RECOGNITION_SETTINGS=exact):
+            self.assertIsNone(load_index(path))
+            self.assertIsNone(load_index(os.path.join(self.tmp, 'absent.npz')))
+
+
+class FaceTemplatesTests(SimpleTestCase):
+    """
+    Gestion des modèles par employé (MediaPipe remplacé : seules les écritures du fichier et
+    de l'index sont exercées)
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        face_settings = {
+            **settings.FACE_RECOGNITION_SETTINGS,
+            'ENCODINGS_FILE': os.path.join(self.tmp, 'face_encodings.pkl'),
+            'MAX_TEMPLATES': 3,
+            'AUTO_TEMPLATE_RANGE': None,
+            'TEMPLATE_HITS_CACHE': 'default',
+            'TEMPLATE_HITS_FLUSH_INTERVAL': 60,
+            'INDEX': {'BACKEND': 'utils.face_index.ExactIndex'},
+        }
+        overrides = override_settings(FACE_RECOGNITION_SETTINGS=face_settings)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        cache.clear()
+        with mock.patch.dict(sys.modules, {'mediapipe': mock.MagicMock()}):
+            self.handler = FaceRecognitionHandler()
+        self.vectors = _vectors(np.random.default_rng(2), 4)
+
+    def _enroll(self, employee_id, vectors):
+        self.handler.write_face_encodings({
+            str(employee_id): [new_template(v, added_at=n) for n, v in enumerate(vectors, start=1)]
+        })
+        self.handler.build_index()
+
+    def test_eviction_du_modele_le_moins_utilise(self):
+        self._enroll(1, self.vectors[:3])
+        # Le plus ancien est le plus utilisé : il est conservé, le moins utilisé des autres est évincé
+        self.handler._record_match(1, self.vectors[0], 0.0)
+        self.assertTrue(self.handler.save_face_encoding(1, self.vectors[3]))
+
+        templates = face_templates(self.handler.load_face_encodings()['1'])
+        kept = np.stack([t['encoding'] for t in templates]).astype(np.float32)
+        self.assertEqual(len(kept), 3)
+        for expected in (self.vectors[0], self.vectors[2], self.vectors[3]):
+            self.assertAlmostEqual(float(distances(kept, expected).min()), 0.0, places=1)
+        self.assertGreater(float(distances(kept, self.vectors[1]).min()), 1.0)
+
+    def test_eviction_par_anciennete_sans_utilisation(self):
+        self._enroll(1, self.vectors[:3])
+        self.handler.save_face_encoding(1, self.vectors[3])
+        templates = face_templates(self.handler.load_face_encodings()['1'])
+        self.assertEqual([t['added_at'] for t in templates[:2]], [2, 3])
+
+    def test_utilisations_conservees_apres_rechargement(self):
+        self._enroll(1, self.vectors[:3])
+        self.handler._record_match(1, self.vectors[2], 0.0)
+        self.handler.flush_template_hits()
+
+        # Autre worker (ou redémarrage) : les utilisations sont relues depuis le cache partagé
+        with mock.patch.dict(sys.modules, {'mediapipe': mock.MagicMock()}):
+            other = FaceRecognitionHandler()
+        templates = face_templates(other.load_face_encodings()['1'])
+        self.assertEqual(other.template_hits(1, templates), [0, 0, 1])
+
+    def test_nouvel_index_substitue(self):
+        self._enroll(1, self.vectors[:2])
+        before = self.handler.get_index()
+        self.handler.save_face_encoding(2, self.vectors[2])
+
+        self.assertIsNot(self.handler.get_index(), before)
+        self.assertEqual(len(before.templates(2)), 0)
+        self.assertEqual(len(self.handler.get_index().templates(2)), 1)
+        self.assertEqual(self.handler.get_index().version, self.handler._encodings_version())
+
+    def test_suppression(self):
+        self._enroll(1, self.vectors[:2])
+        self.assertTrue(self.handler.delete_face_encoding(1))
+        self.assertEqual(self.handler.load_face_encodings(), {})
+        self.assertEqual(self.handler.get_index().search(self.vectors[0]), [])
+        self.assertFalse(self.handler.delete_face_encoding(1))
+
+
+class KeysetPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.departement = Department.objects.create(nom="Logistique")
+        # Homonymes : la clé (nom, prenom, id) départage les lignes
+        for i, prenom in enumerate(['Paul', 'Jean', 'Paul', 'Jean', 'Paul', 'Jean', 'Paul']):
+            Employee.objects.create(
+                immatricule=f"LOG{i:03d}", nom="Rakoto", prenom=prenom, poste="Magasinier",
+                departement=cls.departement,
+            )
+        user_employee = Employee.objects.create(
+            immatricule='ADM001', nom="Zafy", poste="RH", departement=Department.objects.create(nom="RH"),
+        )
+        cls.user = Authentication.objects.create_user(
+            email='rh@example.com', password='secret', employee=user_employee, role='rh'
+        )
+        cls.expected = list(
+            Employee.objects.filter(departement=cls.departement).order_by('nom', 'prenom', 'id')
+            .values_list('id', flat=True)
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def _walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([employee['id'] for employee in response.data['employees']])
+            url = response.data[link]
+        return pages
+
+    def test_parcours_sans_doublon_ni_oubli(self):
+        url = reverse('employees-by-department', args=[self.departement.pk]) + '?pagination=cursor&page_size=2'
+        pages = self._walk(url, 'next')
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+    def test_retour_arriere(self):
+        url = reverse('employees-by-department', args=[self.departement.pk]) + '?pagination=cursor&page_size=3'
+        second = self.client.get(self.client.get(url).data['next']).data
+        self.assertIsNone(self.client.get(second['next']).data['next'])
+
+        previous = self.client.get(second['previous']).data
+        self.assertEqual([employee['id'] for employee in previous['employees']], self.expected[:3])
+        self.assertIsNone(previous['previous'])
+
+    def test_curseur_invalide(self):
+        url = reverse('employees-by-department', args=[self.departement.pk])
+        response = self.client.get(url, {'cursor': 'pas-un-curseur'})
+        self.assertEqual(response.status_code, 404)
+
+
+class EmployeeSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        departement = Department.objects.create(nom="Comptabilité")
+        cls.rakotomalala = Employee.objects.create(
+            immatricule='CPT001', nom="Rakotomalala", prenom="Hery", poste="Comptable",
+            departement=departement, email='hery.rakotomalala@example.com',
+        )
+        cls.randria = Employee.objects.create(
+            immatricule='CPT002', nom="Randrianarisoa", prenom="Lova", poste="Comptable",
+            departement=departement, email='lova@example.com',
+        )
+
+    def test_sous_chaine_trouvee(self):
+        # Sous-chaînes trop courtes pour la similarité trigramme : trouvées comme avant (icontains)
+        self.assertIn(self.rakotomalala, Employee.objects.search('omala'))
+        self.assertIn(self.randria, Employee.objects.search('narisoa'))
+        self.assertIn(self.randria, Employee.objects.search('pt002'))
+
+    def test_prefixe_d_immatricule_en_premier(self):
+        self.assertEqual(list(Employee.objects.search('cpt002'))[0], self.randria)
@@ -33,9 +33,9 @@ urlpatterns = [
     # Liste des employés d’un département donné
     path('by-department/<int:department_id>/', views.EmployeesByDepartmentView.as_view(), name='employees-by-department'),
 
-    # 🔹 GET /api/employees/search/?q=...
-    # ✅ Admin, RH, Manager
-    # Recherche d’employés par nom, prénom, email, immatricule
+    # 🔹 GET /api/employees/search/?q=...&page=&page_size=
+    # ✅ Admin, RH, Manager (manager : son département)
+    # Recherche classée par préfixe d’immatricule puis similarité nom, prénom, email (paginée)
     path('search/', views.EmployeeSearchView.as_view(), name='employee-search'),
 
     # Routes d’administration, accessibles uniquement aux Admin
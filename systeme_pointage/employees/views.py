@@ -15,14 +15,15 @@ from django.shortcuts import get_object_or_404
 # from django.db.models import Q, Count
 from django.db.models import Count, Q, Sum, Avg
 from django.utils import timezone
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import APIException, NotFound
 
 from .models import Employee
 from authentication.models import Authentication  
 from authentication.permissions import IsAdminByRoleOrStaff
+from utils.pagination import PaginatedAPIViewMixin
 
 from .serializers import EmployeeSerializer, EmployeeCreateSerializer
-from utils.face_recognition_utils import extract_face_encoding
+from utils.face_recognition_utils import face_recognition_handler
 # from employees.serializers import EmployeeWithLeaveBalanceSerializer
 #from django.contrib.auth.hashers import make_password
 from django.contrib.auth.hashers import make_password
@@ -38,30 +39,26 @@ from django.utils import timezone
 logger = logging.getLogger(__name__)
 
 
-class EmployeeListView(APIView):
+class EmployeeListView(PaginatedAPIViewMixin, APIView):
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('nom', 'prenom', 'id')
+
+    def get_cursor_ordering(self):
+        # Résultats de recherche classés par pertinence : pas de curseur
+        if self.request.query_params.get('search'):
+            return None
+        return self.cursor_ordering
 
     def get(self, request):
         try:
             user = request.user
-            auth_obj = Authentication.objects.get(id=user.id)
-            role = auth_obj.role
-
-            # Base queryset
-            employees = Employee.objects.select_related('departement')
 
-            # ✅ Accès en fonction du rôle
-            if role in ['admin', 'rh']:
-                # Admin et RH voient tous les employés
-                pass
-            elif role == 'manager':
-                if hasattr(user, 'employee') and user.employee.departement:
-                    employees = employees.filter(departement=user.employee.departement)
-                else:
-                    return Response({'error': 'Aucun département associé au manager.'}, status=status.HTTP_403_FORBIDDEN)
-            else:
+            # ✅ Accès en fonction du rôle : admin/rh voient tout, manager son département
+            if getattr(user, 'role', None) not in ['admin', 'rh', 'manager']:
                 return Response({'error': 'Accès refusé. Rôle non autorisé.'}, status=status.HTTP_403_FORBIDDEN)
 
+            employees = Employee.objects.visible_to(user)
+
             # 🔍 Filtres facultatifs
             department_id = request.query_params.get('department')
             is_active = request.query_params.get('is_active')
@@ -72,20 +69,17 @@ class EmployeeListView(APIView):
             if is_active is not None:
                 employees = employees.filter(is_active_employee=is_active.lower() == 'true')
             if search:
-                employees = employees.filter(
-                    Q(nom__icontains=search) |
-                    Q(prenom__icontains=search) |
-                    Q(email__icontains=search) |
-                    Q(immatricule__icontains=search)
-                )
-
-            employees = employees.order_by('nom', 'prenom')
-            serializer = EmployeeSerializer(employees, many=True, context={'request': request})
+                employees = employees.search(search)
+            else:
+                employees = employees.order_by('nom', 'prenom')
+            employees = EmployeeSerializer.optimize_queryset(employees, request)
+            page = self.paginate_queryset(employees)
+            serializer = EmployeeSerializer(page, many=True, context={'request': request})
 
-            return Response({'employees': serializer.data, 'count': employees.count()}, status=status.HTTP_200_OK)
+            return Response(self.get_paginated_data('employees', serializer.data), status=status.HTTP_200_OK)
 
-        except Authentication.DoesNotExist:
-            return Response({'error': 'Utilisateur non trouvé.'}, status=status.HTTP_404_NOT_FOUND)
+        except APIException:
+            raise  # page invalide (404), accès refusé... : réponse DRF habituelle
         except Exception as e:
             logger.error(f"Erreur récupération employés: {str(e)}")
             return Response({'error': 'Erreur interne.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -315,39 +309,45 @@ class EmployeeStatsView(APIView):
 #             logger.error(f"Erreur statistiques employés: {str(e)}")
 #             return Response({'error': 'Erreur lors de la récupération des statistiques'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class EmployeeSearchView(APIView):
+class EmployeeSearchView(PaginatedAPIViewMixin, APIView):
+    """
+    GET /api/employees/search/?q=...&page=&page_size=
+    Résultats classés (préfixe d'immatricule, puis similarité) et toujours paginés.
+    """
     permission_classes = [IsAuthenticated]
+    MIN_QUERY_LENGTH = 2
+    MAX_QUERY_LENGTH = 100
 
     def get(self, request):
-        query = request.query_params.get('q', '')
+        query = request.query_params.get('q', '').strip()
         if not query:
             return Response({"error": "Paramètre 'q' requis"}, status=status.HTTP_400_BAD_REQUEST)
+        if not self.MIN_QUERY_LENGTH <= len(query) <= self.MAX_QUERY_LENGTH:
+            return Response(
+                {"error": f"La recherche doit contenir entre {self.MIN_QUERY_LENGTH} et {self.MAX_QUERY_LENGTH} caractères"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        try:
-            auth_obj = Authentication.objects.get(id=request.user.id)
-            if auth_obj.role not in ['admin', 'rh', 'manager']:
-                return Response({"error": "Accès refusé"}, status=status.HTTP_403_FORBIDDEN)
-        except Authentication.DoesNotExist:
-            return Response({"error": "Utilisateur non trouvé"}, status=status.HTTP_404_NOT_FOUND)
-
-        employees = Employee.objects.filter(
-            Q(nom__icontains=query) |
-            Q(prenom__icontains=query) |
-            Q(email__icontains=query) |
-            Q(immatricule__icontains=query)
-        ).order_by('nom', 'prenom')
+        if getattr(request.user, 'role', None) not in ['admin', 'rh', 'manager']:
+            return Response({"error": "Accès refusé"}, status=status.HTTP_403_FORBIDDEN)
 
-        serializer = EmployeeSerializer(employees, many=True)
-        return Response({"results": serializer.data})
+        employees = EmployeeSerializer.optimize_queryset(Employee.objects.visible_to(request.user).search(query), request)
+        page = self.paginate_queryset(employees)
+        serializer = EmployeeSerializer(page, many=True, context={'request': request})
+        return Response(self.get_paginated_data('results', serializer.data))
 
 
-class EmployeesByDepartmentView(APIView):
+class EmployeesByDepartmentView(PaginatedAPIViewMixin, APIView):
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('nom', 'prenom', 'id')
 
     def get(self, request, department_id):
-        employees = Employee.objects.filter(departement_id=department_id).order_by('nom', 'prenom')
-        serializer = EmployeeSerializer(employees, many=True)
-        return Response({"employees": serializer.data})
+        employees = Employee.objects.filter(departement_id=department_id) \
+            .select_related('departement').order_by('nom', 'prenom')
+        employees = EmployeeSerializer.optimize_queryset(employees, request)
+        page = self.paginate_queryset(employees)
+        serializer = EmployeeSerializer(page, many=True, context={'request': request})
+        return Response(self.get_paginated_data('employees', serializer.data))
 
 
 
@@ -412,18 +412,20 @@ class AdminListEmployeesView(EmployeeListView):
             if auth_obj.role != 'admin':
                 return Response({'error': 'Accès refusé. Administrateur requis.'}, status=status.HTTP_403_FORBIDDEN)
 
-            employees = Employee.objects.all().order_by('nom', 'prenom')
-            serializer = EmployeeSerializer(employees, many=True)
-            
-            total_employees = employees.count()  # compter le total
-            
-            return Response({
-                'total': total_employees,
-                'employees': serializer.data
-            }, status=status.HTTP_200_OK)
+            employees = Employee.objects.select_related('departement').order_by('nom', 'prenom')
+            employees = EmployeeSerializer.optimize_queryset(employees, request)
+            page = self.paginate_queryset(employees)
+            serializer = EmployeeSerializer(page, many=True, context={'request': request})
+
+            data = self.get_paginated_data('employees', serializer.data)
+            if 'count' in data:
+                data['total'] = data['count']
+            return Response(data, status=status.HTTP_200_OK)
 
         except Authentication.DoesNotExist:
             return Response({'error': 'Utilisateur non trouvé'}, status=status.HTTP_404_NOT_FOUND)
+        except APIException:
+            raise
         except Exception as e:
             logger.error(f"Erreur récupération employés (admin): {str(e)}")
             return Response({'error': 'Erreur lors de la récupération des employés'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -503,18 +505,30 @@ class AdminUpdateBiometricView(APIView):
                 return Response({'error': 'Accès refusé. Administrateur requis.'}, status=status.HTTP_403_FORBIDDEN)
 
             employee = get_object_or_404(Employee, id=employee_id)
-            image_file = request.FILES.get('image')
-            if not image_file:
+            # Plusieurs prises de vue possibles (champ 'images'), chacune devient un modèle
+            image_files = request.FILES.getlist('images') or request.FILES.getlist('image')
+            if not image_files:
                 return Response({'error': 'Image requise pour mise à jour biométrique'}, status=status.HTTP_400_BAD_REQUEST)
 
-            encoding = extract_face_encoding(image_file)
-            if not encoding:
+            try:
+                images = [np.array(Image.open(image_file).convert('RGB')) for image_file in image_files]
+            except Exception:
+                return Response({'error': "Format d'image non supporté"}, status=status.HTTP_400_BAD_REQUEST)
+
+            replace = str(request.data.get('remplacer', '')).lower() in ('1', 'true')
+            encodings = face_recognition_handler.register_faces(employee.id, images, replace=replace)
+            if not encodings:
                 return Response({'error': "Visage non détecté dans l'image"}, status=status.HTTP_400_BAD_REQUEST)
 
-            employee.face_encoding = encoding
-            employee.save()
+            employee.face_encoding = encodings[-1].tolist()
+            employee.save(update_fields=['face_encoding', 'updated_at'])
 
-            return Response({'message': 'Données biométriques mises à jour avec succès', 'employee': EmployeeSerializer(employee).data}, status=status.HTTP_200_OK)
+            return Response({
+                'message': 'Données biométriques mises à jour avec succès',
+                'modeles_enregistres': len(encodings),
+                'images_rejetees': len(images) - len(encodings),
+                'employee': EmployeeSerializer(employee).data,
+            }, status=status.HTTP_200_OK)
 
         except Authentication.DoesNotExist:
             return Response({'error': 'Utilisateur non trouvé'}, status=status.HTTP_404_NOT_FOUND)
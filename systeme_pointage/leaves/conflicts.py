@@ -0,0 +1,72 @@
+# leaves/conflicts.py
+"""
+Détection des conflits d'une demande de congé : chevauchement avec les demandes non rejetées
+de l'employé et seuil d'absence du département (LEAVE_SETTINGS['MAX_ABSENCE_RATIO']).
+Une requête sur l'index leave_period_idx, plus le comptage de l'effectif, quel que soit le
+nombre de périodes testées.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from math import floor
+
+from django.conf import settings
+
+from employees.models import Employee
+from leaves.models import Leave
+
+MAX_WINDOW_DAYS = 366
+
+
+def find_conflicts(employee_id, departement_id, periodes, exclude_leave_id=None):
+    """
+    Pour chaque (date_debut, date_fin) de `periodes`, retourne
+    {'date_debut', 'date_fin', 'chevauchements': [ids de congés], 'jours_sous_effectif': [dates]}
+    Sans département (departement_id None) : chevauchements seulement, pas de seuil d'absence.
+    """
+    if not periodes:
+        return []
+    start = min(debut for debut, _fin in periodes)
+    end = max(fin for _debut, fin in periodes)
+
+    rows = Leave.objects.exclude(status_conge=Leave.STATUS_REJETE).overlapping(start, end)
+    if departement_id is None:
+        rows = rows.filter(employee_id=employee_id)
+    else:
+        rows = rows.filter(employee__departement_id=departement_id)
+    rows = rows.values_list('id', 'employee_id', 'date_debut', 'date_fin')
+    if exclude_leave_id:
+        rows = rows.exclude(pk=exclude_leave_id)
+
+    own = []
+    absents = defaultdict(set)  # jour -> autres employés absents
+    for leave_id, leave_employee_id, date_debut, date_fin in rows:
+        if leave_employee_id == employee_id:
+            own.append((leave_id, date_debut, date_fin))
+            continue
+        day, last = max(date_debut, start), min(date_fin, end)
+        while day <= last:
+            absents[day].add(leave_employee_id)
+            day += timedelta(days=1)
+
+    # Effectif compté une fois, seulement si d'autres employés sont absents sur la fenêtre.
+    # Le demandeur lui-même compte parmi les absents ; au moins une absence est toujours permise
+    max_absents = 1
+    if absents:
+        effectif = Employee.objects.filter(departement_id=departement_id, is_active_employee=True).count()
+        max_absents = max(1, floor(effectif * settings.LEAVE_SETTINGS['MAX_ABSENCE_RATIO']))
+
+    results = []
+    for debut, fin in periodes:
+        jours = []
+        day = debut
+        while day <= fin:
+            if len(absents.get(day, ())) + 1 > max_absents:
+                jours.append(day)
+            day += timedelta(days=1)
+        results.append({
+            'date_debut': debut,
+            'date_fin': fin,
+            'chevauchements': [pk for pk, d, f in own if d <= fin and f >= debut],
+            'jours_sous_effectif': jours,
+        })
+    return results
@@ -0,0 +1,196 @@
+# leaves/documents.py
+"""
+Réception des justificatifs de congé.
+
+Pendant la requête : le fichier (déjà écrit par morceaux dans un fichier temporaire par
+TemporaryFileUploadHandler) est haché en flux puis déplacé dans le répertoire d'attente.
+Un contenu déjà connu réutilise le LeaveDocument existant. Après le commit, un worker
+compresse les PDF, crée la miniature des images et copie le fichier dans le stockage
+configuré (leaves/storage.py).
+
+Le fichier d'attente est nommé par le sha256 : si le worker est interrompu (redémarrage),
+`manage.py process_pending_documents` retraite les documents restés en attente.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from leaves.models import LeaveDocument
+
+logger = logging.getLogger(__name__)
+
+# Un seul worker : le traitement des scans ne concurrence pas les requêtes
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='leave-document')
+
+EXTENSIONS = {
+    'application/pdf': '.pdf',
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+}
+
+
+def _spool_dir():
+    path = settings.LEAVE_SETTINGS['DOCUMENT_SPOOL_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def ingest(uploaded):
+    """
+    Enregistrer un fichier reçu et retourner son LeaveDocument (existant si même contenu)
+    """
+    digest = hashlib.sha256()
+    spool_path = None
+    if hasattr(uploaded, 'temporary_file_path'):
+        for chunk in uploaded.chunks():
+            digest.update(chunk)
+    else:
+        # Petit fichier reçu en mémoire : copié dans le répertoire d'attente en même temps
+        fd, spool_path = tempfile.mkstemp(dir=_spool_dir())
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in uploaded.chunks():
+                digest.update(chunk)
+                out.write(chunk)
+    sha256 = digest.hexdigest()
+
+    document, created = LeaveDocument.objects.get_or_create(sha256=sha256, defaults={
+        'nom_original': os.path.basename(uploaded.name or '')[:255],
+        'content_type': uploaded.content_type or '',
+        'taille': uploaded.size,
+    })
+    if not created:
+        # Nouvel envoi d'un contenu en échec : remis en attente par un seul des envois concurrents
+        retry = document.statut == LeaveDocument.STATUT_ECHEC and LeaveDocument.objects.filter(
+            pk=document.pk, statut=LeaveDocument.STATUT_ECHEC
+        ).update(statut=LeaveDocument.STATUT_EN_ATTENTE)
+        if not retry:
+            if spool_path:
+                os.remove(spool_path)
+            return document
+        document.statut = LeaveDocument.STATUT_EN_ATTENTE
+
+    path = os.path.join(_spool_dir(), sha256)
+    if spool_path is None:
+        shutil.move(uploaded.temporary_file_path(), path)
+    else:
+        os.replace(spool_path, path)
+    spool_path = path
+
+    document_id = document.pk
+    transaction.on_commit(lambda: _executor.submit(process, document_id, spool_path))
+    return document
+
+
+def process(document_id, path):
+    """
+    Compression, miniature et stockage définitif (exécuté par le worker)
+    """
+    close_old_connections()
+    document = LeaveDocument.objects.get(pk=document_id)
+    to_remove = {path}
+    try:
+        extension = EXTENSIONS.get(document.content_type, os.path.splitext(document.nom_original)[1].lower())
+        prefix = f"leave_documents/{document.sha256[:2]}/{document.sha256}"
+
+        if document.content_type == 'application/pdf':
+            path = _compress_pdf(path)
+            to_remove.add(path)
+        elif document.content_type.startswith('image/'):
+            thumbnail = _thumbnail(path)
+            if thumbnail:
+                document.miniature.save(f"{prefix}_thumb.jpg", ContentFile(thumbnail), save=False)
+
+        with open(path, 'rb') as f:
+            document.fichier.save(f"{prefix}{extension}", File(f), save=False)
+        document.taille_stockee = os.path.getsize(path)
+        document.statut = LeaveDocument.STATUT_PRET
+    except Exception as e:
+        logger.error(f"Erreur traitement du justificatif {document_id}: {str(e)}")
+        document.statut = LeaveDocument.STATUT_ECHEC
+    finally:
+        for p in to_remove:
+            if os.path.exists(p):
+                os.remove(p)
+
+    document.save(update_fields=['fichier', 'miniature', 'taille_stockee', 'statut'])
+    close_old_connections()
+
+
+def recover_pending(older_than):
+    """
+    Documents en attente depuis plus de `older_than` (timedelta) : retraités si le fichier
+    d'attente existe encore, sinon marqués en échec (un nouvel envoi du même contenu les
+    retraite). Les fichiers d'attente sans document sont supprimés.
+    Retourne (retraités, en échec, fichiers orphelins supprimés).
+    """
+    limit = timezone.now() - older_than
+    spool = _spool_dir()
+    reprocessed = failed = 0
+    stale = LeaveDocument.objects.filter(statut=LeaveDocument.STATUT_EN_ATTENTE, created_at__lt=limit)
+    for document_id, sha256 in stale.values_list('id', 'sha256'):
+        path = os.path.join(spool, sha256)
+        if os.path.exists(path):
+            if os.path.getmtime(path) >= limit.timestamp():
+                continue  # renvoyé récemment après un échec : traitement en cours
+            process(document_id, path)
+            reprocessed += 1
+        else:
+            LeaveDocument.objects.filter(pk=document_id, statut=LeaveDocument.STATUT_EN_ATTENTE) \
+                .update(statut=LeaveDocument.STATUT_ECHEC)
+            failed += 1
+
+    pending = set(
+        LeaveDocument.objects.filter(statut=LeaveDocument.STATUT_EN_ATTENTE).values_list('sha256', flat=True)
+    )
+    orphans = 0
+    for name in os.listdir(spool):
+        path = os.path.join(spool, name)
+        # Fichiers récents ignorés : envoi ou traitement en cours
+        if name not in pending and os.path.isfile(path) and os.path.getmtime(path) < limit.timestamp():
+            os.remove(path)
+            orphans += 1
+    return reprocessed, failed, orphans
+
+
+def _compress_pdf(path):
+    """
+    Recompresser les flux du PDF (pikepdf, optionnel). Retourne le plus petit des deux fichiers.
+    """
+    try:
+        import pikepdf
+    except ImportError:
+        return path
+
+    compressed = path + '.min.pdf'
+    with pikepdf.open(path) as pdf:
+        pdf.save(compressed, compress_streams=True,
+                 object_stream_mode=pikepdf.ObjectStreamMode.generate)
+    if os.path.getsize(compressed) < os.path.getsize(path):
+        return compressed
+    os.remove(compressed)
+    return path
+
+
+def _thumbnail(path):
+    from PIL import Image
+
+    size = settings.LEAVE_SETTINGS['DOCUMENT_THUMBNAIL_SIZE']
+    try:
+        with Image.open(path) as image:
+            image.thumbnail((size, size))
+            buffer = BytesIO()
+            image.convert('RGB').save(buffer, format='JPEG', quality=80)
+            return buffer.getvalue()
+    except OSError as e:
+        logger.error(f"Miniature impossible pour {path}: {str(e)}")
+        return None
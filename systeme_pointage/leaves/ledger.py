@@ -0,0 +1,184 @@
+# leaves/ledger.py
+"""
+Registre des soldes de congé.
+
+Chaque mouvement est une ligne LeaveBalanceEntry ; LeaveBalance (par employé et par année)
+et Employee.solde_conge_annuel sont mis à jour dans la même transaction avec des F().
+La ligne Employee est verrouillée (select_for_update) pour sérialiser les validations
+concurrentes d'un même employé.
+
+Employee.solde_conge_annuel reste le solde de référence (contrôle du solde suffisant,
+API de solde) ; les mouvements et LeaveBalance en sont l'historique détaillé par année.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from employees.models import Employee
+from leaves.models import LeaveBalance, LeaveBalanceEntry
+
+
+def record_entry(employee_id, annee, type_mouvement, jours, leave=None, commentaire=''):
+    """
+    Ajouter un mouvement et répercuter le delta sur les soldes
+    """
+    with transaction.atomic():
+        solde_actuel = Employee.objects.select_for_update() \
+            .filter(pk=employee_id).values_list('solde_conge_annuel', flat=True).get()
+        if solde_actuel + jours < 0:
+            raise ValidationError("Solde de congé annuel insuffisant.")
+
+        entry = LeaveBalanceEntry.objects.create(
+            employee_id=employee_id,
+            annee=annee,
+            type_mouvement=type_mouvement,
+            jours=jours,
+            leave=leave,
+            commentaire=commentaire,
+        )
+        _apply_deltas({(employee_id, annee): jours})
+        return entry
+
+
+def deduct_for_leave(leave):
+    """
+    Débiter le solde pour un congé annuel qui vient d'être validé
+    """
+    return record_entry(
+        leave.employee_id,
+        leave.date_debut.year,
+        LeaveBalanceEntry.TYPE_DEDUCTION,
+        -leave.duree_jours,
+        leave=leave if leave.pk else None,
+        commentaire=f"Congé du {leave.date_debut} au {leave.date_fin}",
+    )
+
+
+def deduct_for_leaves(leaves):
+    """
+    Débiter en bloc les congés annuels validés ensemble (validation groupée).
+    Retourne l'ensemble des ids de congés refusés pour solde insuffisant.
+    """
+    refused = set()
+    with transaction.atomic():
+        soldes = dict(
+            Employee.objects.select_for_update()
+            .filter(pk__in={leave.employee_id for leave in leaves})
+            .values_list('id', 'solde_conge_annuel')
+        )
+        entries = []
+        deltas = defaultdict(int)
+        for leave in leaves:
+            if soldes[leave.employee_id] < leave.duree_jours:
+                refused.add(leave.pk)
+                continue
+            soldes[leave.employee_id] -= leave.duree_jours
+            deltas[(leave.employee_id, leave.date_debut.year)] -= leave.duree_jours
+            entries.append(LeaveBalanceEntry(
+                employee_id=leave.employee_id,
+                annee=leave.date_debut.year,
+                type_mouvement=LeaveBalanceEntry.TYPE_DEDUCTION,
+                jours=-leave.duree_jours,
+                leave=leave,
+                commentaire=f"Congé du {leave.date_debut} au {leave.date_fin}",
+            ))
+        LeaveBalanceEntry.objects.bulk_create(entries)
+        _apply_deltas(deltas)
+    return refused
+
+
+def accrue_annual_leave(annee, jours=None, commentaire="Acquisition annuelle"):
+    """
+    Créditer tous les employés actifs en une insertion groupée. Retourne le nombre d'employés crédités.
+    Les employés déjà crédités pour `annee` sont ignorés : la commande peut être relancée.
+    """
+    if jours is None:
+        jours = settings.LEAVE_SETTINGS['ANNUAL_ACCRUAL_DAYS']
+    now = timezone.now()
+
+    with transaction.atomic():
+        employee_ids = list(
+            Employee.objects.select_for_update()
+            .filter(is_active_employee=True)
+            .values_list('id', flat=True)
+        )
+        # Sous verrou des lignes Employee : deux exécutions concurrentes ne créditent pas deux fois
+        already = set(
+            LeaveBalanceEntry.objects.filter(
+                annee=annee, type_mouvement=LeaveBalanceEntry.TYPE_ACQUISITION, employee_id__in=employee_ids
+            ).values_list('employee_id', flat=True)
+        )
+        employee_ids = [employee_id for employee_id in employee_ids if employee_id not in already]
+        if not employee_ids:
+            return 0
+
+        LeaveBalanceEntry.objects.bulk_create([
+            LeaveBalanceEntry(
+                employee_id=employee_id,
+                annee=annee,
+                type_mouvement=LeaveBalanceEntry.TYPE_ACQUISITION,
+                jours=jours,
+                commentaire=commentaire,
+            )
+            for employee_id in employee_ids
+        ])
+
+        existing = set(
+            LeaveBalance.objects.filter(annee=annee, employee_id__in=employee_ids)
+            .values_list('employee_id', flat=True)
+        )
+        LeaveBalance.objects.filter(annee=annee, employee_id__in=existing) \
+            .update(solde=F('solde') + jours, updated_at=now)
+        LeaveBalance.objects.bulk_create([
+            LeaveBalance(employee_id=employee_id, annee=annee, solde=jours)
+            for employee_id in employee_ids if employee_id not in existing
+        ])
+        Employee.objects.filter(pk__in=employee_ids) \
+            .update(solde_conge_annuel=F('solde_conge_annuel') + jours)
+
+    return len(employee_ids)
+
+
+def _apply_deltas(deltas):
+    """
+    Répercuter {(employee_id, annee): jours} sur LeaveBalance et Employee.solde_conge_annuel.
+    Appelé sous verrou des lignes Employee concernées : pas de création concurrente possible.
+    """
+    if not deltas:
+        return
+    employee_deltas = defaultdict(int)
+    for (employee_id, _annee), jours in deltas.items():
+        employee_deltas[employee_id] += jours
+
+    existing = {
+        (employee_id, annee): pk
+        for pk, employee_id, annee in LeaveBalance.objects.filter(
+            employee_id__in=employee_deltas, annee__in={annee for _e, annee in deltas}
+        ).values_list('id', 'employee_id', 'annee')
+    }
+    to_update = {existing[key]: jours for key, jours in deltas.items() if key in existing}
+    if to_update:
+        LeaveBalance.objects.filter(pk__in=to_update).update(
+            solde=F('solde') + _case('pk', to_update),
+            updated_at=timezone.now(),
+        )
+    LeaveBalance.objects.bulk_create([
+        LeaveBalance(employee_id=employee_id, annee=annee, solde=jours)
+        for (employee_id, annee), jours in deltas.items() if (employee_id, annee) not in existing
+    ])
+    Employee.objects.filter(pk__in=employee_deltas).update(
+        solde_conge_annuel=F('solde_conge_annuel') + _case('pk', employee_deltas)
+    )
+
+
+def _case(field, values):
+    # Une seule requête UPDATE pour des deltas différents par ligne
+    return Case(
+        *[When(**{field: key}, then=Value(value)) for key, value in values.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from leaves.ledger import accrue_annual_leave
+
+
+class Command(BaseCommand):
+    help = "Créditer le solde de congé annuel de tous les employés actifs (insertion groupée)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--annee', type=int, default=None, help="Année créditée (année courante par défaut)")
+        parser.add_argument('--jours', type=int, default=None, help="Jours crédités (LEAVE_SETTINGS['ANNUAL_ACCRUAL_DAYS'] par défaut)")
+
+    def handle(self, *args, **options):
+        annee = options['annee'] or timezone.localdate().year
+        count = accrue_annual_leave(annee, options['jours'])
+        self.stdout.write(self.style.SUCCESS(f"{count} employé(s) crédité(s) pour {annee}"))
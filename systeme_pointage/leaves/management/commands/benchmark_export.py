@@ -0,0 +1,85 @@
+import csv
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from departments.models import Department
+from employees.models import Employee
+from leaves.models import Leave
+from leaves.views import Echo, LeaveExportView
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesurer durée et pic mémoire de l'export CSV des congés sur des données synthétiques "
+        "(créées dans une transaction annulée à la fin)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conges', type=int, default=100000, help="Nombre de congés synthétiques")
+        parser.add_argument('--employes', type=int, default=1000, help="Nombre d'employés synthétiques")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._populate(options['employes'], options['conges'])
+            self._benchmark()
+            transaction.set_rollback(True)
+
+    def _populate(self, nb_employes, nb_conges):
+        started = time.perf_counter()
+        departement = Department.objects.create(nom="Benchmark export")
+        employees = Employee.objects.bulk_create([
+            Employee(
+                immatricule=f"BX{i:06d}", username=f"BX{i:06d}", nom=f"Nom{i}", prenom=f"Prenom{i}",
+                poste="Benchmark", departement=departement, email=f"bx{i}@benchmark.local",
+            )
+            for i in range(nb_employes)
+        ], batch_size=1000)
+
+        statuses = [key for key, _label in Leave.STATUS_CHOICES]
+        types = [key for key, _label in Leave.TYPE_CONGE_CHOICES]
+        start = date(2026, 1, 1)
+        batch = []
+        for i in range(nb_conges):
+            debut = start + timedelta(days=i % 365)
+            status = statuses[i % len(statuses)]
+            batch.append(Leave(
+                employee=employees[i % len(employees)], type_conge=types[i % len(types)],
+                motif=f"Congé synthétique {i}", date_debut=debut, date_fin=debut + timedelta(days=2),
+                duree_jours=3, status_conge=status,
+                validated_by_manager=employees[(i + 1) % len(employees)] if status != Leave.STATUS_EN_ATTENTE else None,
+                validated_by_rh=employees[(i + 2) % len(employees)] if status == Leave.STATUS_VALIDE else None,
+                rejected_by=employees[(i + 3) % len(employees)] if status == Leave.STATUS_REJETE else None,
+            ))
+            if len(batch) == 5000:
+                Leave.objects.bulk_create(batch)
+                batch = []
+        Leave.objects.bulk_create(batch)
+        self.stdout.write(
+            f"{nb_employes} employé(s), {nb_conges} congé(s) créés en {time.perf_counter() - started:.1f} s"
+        )
+
+    def _benchmark(self):
+        view = LeaveExportView()
+        writer = csv.writer(Echo())
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        first_row_ms, lines, size = None, 0, 0
+        for row in view.iter_rows(view.get_queryset({})):
+            size += len(writer.writerow(row).encode('utf-8'))
+            lines += 1
+            if first_row_ms is None and lines == 2:
+                first_row_ms = (time.perf_counter() - started) * 1000
+        elapsed = time.perf_counter() - started
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f"{lines - 1} ligne(s), {size / 1024 / 1024:.1f} Mo de CSV en {elapsed:.2f} s "
+            f"({(lines - 1) / elapsed:.0f} lignes/s), première ligne après {first_row_ms or 0:.0f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Pic mémoire Python : {peak / 1024 / 1024:.1f} Mo"))
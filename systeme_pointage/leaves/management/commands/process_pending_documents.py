@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from leaves.documents import recover_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Retraiter les justificatifs restés en attente (worker interrompu) et supprimer "
+        "les fichiers d'attente orphelins"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=15,
+                            help="Ancienneté minimale d'un document en attente pour être repris")
+
+    def handle(self, *args, **options):
+        reprocessed, failed, orphans = recover_pending(timedelta(minutes=options['minutes']))
+        self.stdout.write(self.style.SUCCESS(
+            f"{reprocessed} justificatif(s) retraité(s), {failed} marqué(s) en échec, "
+            f"{orphans} fichier(s) orphelin(s) supprimé(s)"
+        ))
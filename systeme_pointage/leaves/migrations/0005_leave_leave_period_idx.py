@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("leaves", "0004_remove_leave_approuve_par_leave_rejected_by_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="leave",
+            index=models.Index(
+                fields=["date_debut", "date_fin"], name="leave_period_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def create_opening_balances(apps, schema_editor):
+    # Solde d'ouverture : le solde actuel de chaque employé devient le premier mouvement
+    Employee = apps.get_model("employees", "Employee")
+    LeaveBalance = apps.get_model("leaves", "LeaveBalance")
+    LeaveBalanceEntry = apps.get_model("leaves", "LeaveBalanceEntry")
+
+    annee = timezone.now().year
+    soldes = list(Employee.objects.values_list("id", "solde_conge_annuel"))
+    LeaveBalanceEntry.objects.bulk_create([
+        LeaveBalanceEntry(
+            employee_id=employee_id,
+            annee=annee,
+            type_mouvement="ajustement",
+            jours=solde,
+            commentaire="Solde d'ouverture",
+        )
+        for employee_id, solde in soldes
+    ])
+    LeaveBalance.objects.bulk_create([
+        LeaveBalance(employee_id=employee_id, annee=annee, solde=solde)
+        for employee_id, solde in soldes
+    ])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employees", "0004_alter_employee_managers"),
+        ("leaves", "0005_leave_leave_period_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("annee", models.PositiveIntegerField()),
+                ("solde", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leave_balances",
+                        to="employees.employee",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Solde de congé",
+                "verbose_name_plural": "Soldes de congé",
+                "db_table": "leave_balance",
+                "unique_together": {("employee", "annee")},
+            },
+        ),
+        migrations.CreateModel(
+            name="LeaveBalanceEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("annee", models.PositiveIntegerField()),
+                (
+                    "type_mouvement",
+                    models.CharField(
+                        choices=[
+                            ("acquisition", "Acquisition"),
+                            ("deduction", "Déduction"),
+                            ("ajustement", "Ajustement"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("jours", models.IntegerField()),
+                (
+                    "commentaire",
+                    models.CharField(blank=True, default="", max_length=255),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leave_balance_entries",
+                        to="employees.employee",
+                    ),
+                ),
+                (
+                    "leave",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="balance_entries",
+                        to="leaves.leave",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Mouvement de solde",
+                "verbose_name_plural": "Mouvements de solde",
+                "db_table": "leave_balance_entry",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["employee", "annee"], name="leave_entry_emp_year_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_opening_balances, migrations.RunPython.noop),
+    ]
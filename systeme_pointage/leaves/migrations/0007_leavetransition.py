@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+STATUS_CHOICES = [
+    ("en_attente", "En attente"),
+    ("valide_manager", "Validé par le manager"),
+    ("en_attente_rh", "En attente validation RH"),
+    ("valide", "Validé par le RH"),
+    ("rejete", "Rejeté"),
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employees", "0004_alter_employee_managers"),
+        ("leaves", "0006_leavebalance_leavebalanceentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveTransition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(choices=STATUS_CHOICES, max_length=20)),
+                ("target", models.CharField(choices=STATUS_CHOICES, max_length=20)),
+                ("action", models.CharField(max_length=20)),
+                ("commentaire", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="leave_transitions",
+                        to="employees.employee",
+                    ),
+                ),
+                (
+                    "leave",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="transitions",
+                        to="leaves.leave",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Transition de congé",
+                "verbose_name_plural": "Transitions de congé",
+                "db_table": "leave_transition",
+                "ordering": ["created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import leaves.storage
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("leaves", "0007_leavetransition"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                ("nom_original", models.CharField(blank=True, max_length=255)),
+                ("content_type", models.CharField(blank=True, max_length=100)),
+                ("taille", models.PositiveBigIntegerField()),
+                ("taille_stockee", models.PositiveBigIntegerField(blank=True, null=True)),
+                (
+                    "fichier",
+                    models.FileField(
+                        blank=True,
+                        max_length=255,
+                        storage=leaves.storage.get_document_storage,
+                        upload_to="",
+                    ),
+                ),
+                (
+                    "miniature",
+                    models.FileField(
+                        blank=True,
+                        max_length=255,
+                        storage=leaves.storage.get_document_storage,
+                        upload_to="",
+                    ),
+                ),
+                (
+                    "statut",
+                    models.CharField(
+                        choices=[
+                            ("en_attente", "En attente de traitement"),
+                            ("pret", "Prêt"),
+                            ("echec", "Échec du traitement"),
+                        ],
+                        default="en_attente",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Justificatif",
+                "verbose_name_plural": "Justificatifs",
+                "db_table": "leave_document",
+            },
+        ),
+        migrations.AddField(
+            model_name="leave",
+            name="document",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="leaves",
+                to="leaves.leavedocument",
+            ),
+        ),
+    ]
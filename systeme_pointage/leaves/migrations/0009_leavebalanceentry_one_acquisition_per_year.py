@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("leaves", "0008_leavedocument_leave_document"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="leavebalanceentry",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("type_mouvement", "acquisition")),
+                fields=("employee", "annee"),
+                name="leave_entry_one_acquisition_per_year",
+            ),
+        ),
+    ]
@@ -1,8 +1,66 @@
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Q
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from employees.models import Employee
+from authentication.permissions import resolve_visibility, SCOPE_DEPARTMENT, SCOPE_SELF
+from leaves.storage import get_document_storage
+
+def leave_stats_expressions():
+    """
+    Compteurs (total, par statut, par type) évaluables en une seule requête
+    """
+    expressions = {'total': Count('id')}
+    for key, _label in Leave.STATUS_CHOICES:
+        expressions[key] = Count('id', filter=Q(status_conge=key))
+    for key, _label in Leave.TYPE_CONGE_CHOICES:
+        expressions[f'type_{key}'] = Count('id', filter=Q(type_conge=key))
+    return expressions
+
+class LeaveQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Congés visibles par l'utilisateur (admin/rh: tous, manager: son département, employé: les siens)
+        """
+        scope, value = resolve_visibility(user)
+        qs = self.select_related('employee')
+        if scope == SCOPE_DEPARTMENT:
+            return qs.filter(employee__departement_id=value)
+        if scope == SCOPE_SELF:
+            return qs.filter(employee_id=value)
+        return qs
+
+    def overlapping(self, start, end):
+        """
+        Congés qui chevauchent la période [start, end] (index leave_period_idx)
+        """
+        return self.filter(date_debut__lte=end, date_fin__gte=start)
+
+    def with_validators(self):
+        """
+        Charge employé, département, validateurs et justificatif dans la même requête (LeaveSerializer)
+        """
+        return self.select_related(
+            'employee__departement', 'validated_by_manager', 'validated_by_rh', 'rejected_by', 'document'
+        ).without_face_encodings()
+
+    def without_face_encodings(self):
+        """
+        Ne pas lire Employee.face_encoding (plusieurs Ko par ligne) des employés joints
+        """
+        return self.defer(
+            'employee__face_encoding', 'validated_by_manager__face_encoding',
+            'validated_by_rh__face_encoding', 'rejected_by__face_encoding',
+        )
+
+    def stats(self):
+        return self.select_related(None).aggregate(**leave_stats_expressions())
+
+    def stats_by_department(self):
+        return self.select_related(None).values(
+            'employee__departement_id', 'employee__departement__nom'
+        ).annotate(**leave_stats_expressions()).order_by('employee__departement__nom')
 
 class Leave(models.Model):
     # ✅ Définition des constantes pour les statuts
@@ -47,7 +105,10 @@ class Leave(models.Model):
     date_fin = models.DateField()
     duree_jours = models.PositiveIntegerField(validators=[MinValueValidator(1)])
 
-    document_justificatif = models.FileField(upload_to='leave_documents/', blank=True, null=True)
+    document_justificatif = models.FileField(upload_to='leave_documents/', blank=True, null=True)  # anciens envois
+    document = models.ForeignKey(
+        'LeaveDocument', on_delete=models.SET_NULL, null=True, blank=True, related_name='leaves'
+    )
     type_justificatif = models.CharField(max_length=20, choices=TYPE_JUSTIFICATIF_CHOICES, null=True, blank=True)
 
     assurance_entreprise = models.BooleanField(default=False, verbose_name="Assurance entreprise")
@@ -71,11 +132,16 @@ class Leave(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LeaveQuerySet.as_manager()
+
     class Meta:
         db_table = 'leave'
         verbose_name = 'Congé'
         verbose_name_plural = 'Congés'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['date_debut', 'date_fin'], name='leave_period_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employee.nom} - {self.type_conge} ({self.date_debut} - {self.date_fin})"
@@ -84,28 +150,178 @@ class Leave(models.Model):
         if self.date_debut and self.date_fin and self.date_debut > self.date_fin:
             raise ValidationError("La date de début ne peut pas être postérieure à la date de fin.")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Statut tel que lu en base : évite de relire la ligne dans save()
+        instance._loaded_status = instance.__dict__.get('status_conge')
+        return instance
+
     def save(self, *args, **kwargs):
+        from leaves.ledger import deduct_for_leave
+
         # ✅ Calcul automatique de la durée
         if self.date_debut and self.date_fin:
             self.duree_jours = (self.date_fin - self.date_debut).days + 1
 
-        # ✅ Déduction du solde de congé si le congé est validé
-        if self.pk:
-            old = Leave.objects.filter(pk=self.pk).first()
-            if (
-                old
-                and old.status_conge != self.STATUS_VALIDE
-                and self.status_conge == self.STATUS_VALIDE
-                and self.type_conge == 'annuel'
-            ):
-                if self.employee.solde_conge_annuel >= self.duree_jours:
-                    self.employee.solde_conge_annuel -= self.duree_jours
-                    self.employee.save()
-                else:
-                    raise ValidationError("Solde de congé annuel insuffisant.")
+        # ✅ Déduction du solde de congé si le congé devient validé
+        becomes_valid = False
+        if self.pk and self.status_conge == self.STATUS_VALIDE and self.type_conge == 'annuel':
+            old_status = getattr(self, '_loaded_status', None)
+            if old_status is None:
+                old_status = Leave.objects.filter(pk=self.pk).values_list('status_conge', flat=True).first()
+            becomes_valid = old_status is not None and old_status != self.STATUS_VALIDE
+
+        with transaction.atomic():
+            if becomes_valid:
+                deduct_for_leave(self)  # ValidationError si solde insuffisant
+            super().save(*args, **kwargs)
+        self._loaded_status = self.status_conge
+
+    @property
+    def approuve_par(self):
+        """Employé ayant pris la dernière décision (validateurs chargés par with_validators)"""
+        if self.status_conge in [self.STATUS_VALIDE, self.STATUS_EN_ATTENTE_RH] and self.validated_by_manager_id:
+            return self.validated_by_manager
+        if self.status_conge == self.STATUS_VALIDE and self.validated_by_rh_id:
+            return self.validated_by_rh
+        if self.status_conge == self.STATUS_REJETE and self.rejected_by_id:
+            return self.rejected_by
+        return None
+
+    @property
+    def document_url(self):
+        if self.document_id:
+            return self.document.fichier.url if self.document.fichier else None
+        return self.document_justificatif.url if self.document_justificatif else None
+
+
+class LeaveDocument(models.Model):
+    """
+    Justificatif stocké une seule fois par contenu (sha256), traité en arrière-plan (leaves/documents.py)
+    """
+    STATUT_EN_ATTENTE = 'en_attente'
+    STATUT_PRET = 'pret'
+    STATUT_ECHEC = 'echec'
+
+    STATUT_CHOICES = [
+        (STATUT_EN_ATTENTE, 'En attente de traitement'),
+        (STATUT_PRET, 'Prêt'),
+        (STATUT_ECHEC, 'Échec du traitement'),
+    ]
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    nom_original = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    taille = models.PositiveBigIntegerField()  # octets reçus
+    taille_stockee = models.PositiveBigIntegerField(null=True, blank=True)
+    fichier = models.FileField(storage=get_document_storage, max_length=255, blank=True)
+    miniature = models.FileField(storage=get_document_storage, max_length=255, blank=True)
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default=STATUT_EN_ATTENTE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'leave_document'
+        verbose_name = 'Justificatif'
+        verbose_name_plural = 'Justificatifs'
+
+    def __str__(self):
+        return f"{self.nom_original} ({self.sha256[:12]})"
+
+
+class LeaveBalance(models.Model):
+    """
+    Solde courant matérialisé par employé et par année (somme des LeaveBalanceEntry)
+    """
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_balances')
+    annee = models.PositiveIntegerField()
+    solde = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'leave_balance'
+        verbose_name = 'Solde de congé'
+        verbose_name_plural = 'Soldes de congé'
+        unique_together = ['employee', 'annee']
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.annee} : {self.solde} j"
+
+
+class LeaveBalanceEntry(models.Model):
+    """
+    Mouvement du registre des soldes (ajout uniquement, jamais modifié ni supprimé)
+    """
+    TYPE_ACQUISITION = 'acquisition'
+    TYPE_DEDUCTION = 'deduction'
+    TYPE_AJUSTEMENT = 'ajustement'
 
+    TYPE_MOUVEMENT_CHOICES = [
+        (TYPE_ACQUISITION, 'Acquisition'),
+        (TYPE_DEDUCTION, 'Déduction'),
+        (TYPE_AJUSTEMENT, 'Ajustement'),
+    ]
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_balance_entries')
+    annee = models.PositiveIntegerField()
+    type_mouvement = models.CharField(max_length=20, choices=TYPE_MOUVEMENT_CHOICES)
+    jours = models.IntegerField()  # positif = crédit, négatif = débit
+    leave = models.ForeignKey(Leave, on_delete=models.SET_NULL, null=True, blank=True, related_name='balance_entries')
+    commentaire = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'leave_balance_entry'
+        verbose_name = 'Mouvement de solde'
+        verbose_name_plural = 'Mouvements de solde'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['employee', 'annee'], name='leave_entry_emp_year_idx'),
+        ]
+        constraints = [
+            # Une seule acquisition annuelle par employé et par année (accrue_annual_leave rejouable)
+            models.UniqueConstraint(
+                fields=['employee', 'annee'], condition=Q(type_mouvement='acquisition'),
+                name='leave_entry_one_acquisition_per_year',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.type_mouvement} {self.jours:+d} j ({self.annee})"
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValidationError("Un mouvement de solde ne peut pas être modifié.")
         super().save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Un mouvement de solde ne peut pas être supprimé.")
+
+
+class LeaveTransition(models.Model):
+    """
+    Historique des changements de statut effectués par le workflow (leaves/workflow.py)
+    """
+    leave = models.ForeignKey(Leave, on_delete=models.CASCADE, related_name='transitions')
+    source = models.CharField(max_length=20, choices=Leave.STATUS_CHOICES)
+    target = models.CharField(max_length=20, choices=Leave.STATUS_CHOICES)
+    action = models.CharField(max_length=20)
+    actor = models.ForeignKey(
+        Employee, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='leave_transitions'
+    )
+    commentaire = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'leave_transition'
+        verbose_name = 'Transition de congé'
+        verbose_name_plural = 'Transitions de congé'
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.leave_id} : {self.source} -> {self.target} ({self.action})"
+
 # from django.db import models
 # from django.core.validators import MinValueValidator
 # from django.core.exceptions import ValidationError
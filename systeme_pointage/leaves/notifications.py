@@ -0,0 +1,62 @@
+# leaves/notifications.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.mail import send_mass_mail
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Un seul worker : les mails partent dans l'ordre, hors du thread de la requête
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='leave-mail')
+
+
+def decision_email(leave, action, par, commentaire=''):
+    """
+    (sujet, message) du mail envoyé au demandeur après une décision,
+    ou None si la décision ne donne pas lieu à un mail.
+    `par` vaut 'rh' ou 'manager'.
+    """
+    prenom = leave.employee.prenom
+    periode = f"du {leave.date_debut} au {leave.date_fin}"
+
+    if par == 'rh' and action == 'valider':
+        return (
+            "✅ Demande de congé approuvée",
+            f"Bonjour {prenom},\n\n"
+            f"Votre demande de congé {periode} a été *validée* par le RH.\n"
+            f"Bonne continuation !\n\nRH"
+        )
+    if par == 'rh' and action == 'rejeter':
+        return (
+            "❌ Demande de congé rejetée",
+            f"Bonjour {prenom},\n\n"
+            f"Votre demande de congé {periode} a été *rejetée* par le RH.\n"
+            f"Motif : {commentaire}\n\nCordialement,\nRH"
+        )
+    if par == 'manager' and action == 'rejeter':
+        return (
+            "❌ Demande de congé rejetée par votre manager",
+            f"Bonjour {prenom},\n\n"
+            f"Votre demande de congé {periode} a été *rejetée* par votre manager.\n"
+            f"Motif : {commentaire}\n\nCordialement,\nVotre manager"
+        )
+    return None
+
+
+def enqueue_emails(messages):
+    """
+    Envoyer une liste de (sujet, message, expéditeur, [destinataires]) après le commit
+    de la transaction courante, en arrière-plan et sur une seule connexion SMTP.
+    """
+    messages = [m for m in messages if m]
+    if not messages:
+        return
+    transaction.on_commit(lambda: _executor.submit(_send, messages))
+
+
+def _send(messages):
+    try:
+        send_mass_mail(messages, fail_silently=True)
+    except Exception as e:
+        logger.error(f"Erreur envoi des notifications de congé: {str(e)}")
@@ -2,6 +2,25 @@ from rest_framework import serializers
 from .models import Leave
 from employees.models import Employee
 from django.db.models import Sum
+from django.conf import settings
+from .conflicts import find_conflicts, MAX_WINDOW_DAYS
+from .documents import ingest, EXTENSIONS
+from utils.serializers import SparseFieldsetMixin
+
+
+def validate_no_conflict(employee_id, departement_id, date_debut, date_fin, exclude_leave_id=None):
+    if date_debut > date_fin:
+        raise serializers.ValidationError("La date de début ne peut pas être postérieure à la date de fin.")
+    conflict = find_conflicts(employee_id, departement_id, [(date_debut, date_fin)], exclude_leave_id)[0]
+    if conflict['chevauchements']:
+        raise serializers.ValidationError(
+            "Vous avez déjà une demande de congé sur cette période."
+        )
+    if conflict['jours_sous_effectif']:
+        jours = ', '.join(str(day) for day in conflict['jours_sous_effectif'])
+        raise serializers.ValidationError(
+            f"Trop d'absences dans le département sur ces jours : {jours}."
+        )
 
 class DepartmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,9 +32,41 @@ class DepartmentSerializer(serializers.ModelSerializer):
         model = Employee._meta.get_field('departement').related_model
         fields = ['id', 'nom', 'description']
 
-class LeaveSerializer(serializers.ModelSerializer):
+class LeaveDocumentMixin:
+    """
+    Le justificatif reçu passe par leaves/documents.py et la demande référence le LeaveDocument
+    """
+    def validate_document_justificatif(self, fichier):
+        if fichier is None:
+            return fichier
+        if fichier.size > settings.LEAVE_SETTINGS['DOCUMENT_MAX_SIZE']:
+            raise serializers.ValidationError("Le justificatif est trop volumineux.")
+        if fichier.content_type not in EXTENSIONS:
+            raise serializers.ValidationError("Format accepté : PDF, JPEG ou PNG.")
+        return fichier
+
+    def _ingest_document(self, validated_data):
+        fichier = validated_data.pop('document_justificatif', None)
+        if fichier:
+            validated_data['document'] = ingest(fichier)
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self._ingest_document(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self._ingest_document(validated_data))
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if 'document_justificatif' in self.fields:
+            data['document_justificatif'] = instance.document_url
+        return data
+
+class LeaveSerializer(SparseFieldsetMixin, LeaveDocumentMixin, serializers.ModelSerializer):
     employee = serializers.PrimaryKeyRelatedField(read_only=True)
     approuve_par = serializers.SerializerMethodField()
+    document_justificatif = serializers.FileField(write_only=True, required=False, allow_null=True)
 
     class Meta:
         model = Leave
@@ -29,19 +80,31 @@ class LeaveSerializer(serializers.ModelSerializer):
             'employee', 'duree_jours', 'status_conge', 'commentaire_admin',
             'approuve_par', 'date_approbation', 'created_at'
         ]
+        field_dependencies = {
+            'approuve_par': ['status_conge', 'validated_by_manager', 'validated_by_rh', 'rejected_by'],
+            'document_justificatif': ['document', 'document_justificatif'],
+        }
 
     def get_approuve_par(self, obj):
-        if obj.status_conge in ['valide', 'en_attente_rh'] and obj.validated_by_manager:
-            return obj.validated_by_manager.nom
-        elif obj.status_conge == 'valide' and obj.validated_by_rh:
-            return obj.validated_by_rh.nom
-        elif obj.status_conge == 'rejete' and obj.rejected_by:
-            return obj.rejected_by.nom
-        return None
+        validateur = obj.approuve_par
+        return validateur.nom if validateur else None
+
+    def validate(self, attrs):
+        # Modification des dates : mêmes contrôles qu'à la création, hors demande elle-même
+        if self.instance is not None and ('date_debut' in attrs or 'date_fin' in attrs):
+            validate_no_conflict(
+                self.instance.employee_id,
+                self.instance.employee.departement_id,
+                attrs.get('date_debut', self.instance.date_debut),
+                attrs.get('date_fin', self.instance.date_fin),
+                exclude_leave_id=self.instance.pk,
+            )
+        return attrs
 
 
 
-class LeaveCreateSerializer(serializers.ModelSerializer):
+class LeaveCreateSerializer(LeaveDocumentMixin, serializers.ModelSerializer):
+    document_justificatif = serializers.FileField(write_only=True, required=False, allow_null=True)
     type_justificatif = serializers.ChoiceField(
         choices=[('certificat', 'Certificat médical'), ('carnet', 'Carnet de santé')],
         required=False, allow_null=True
@@ -55,7 +118,9 @@ class LeaveCreateSerializer(serializers.ModelSerializer):
         ]
 
     def validate(self, attrs):
-        # ... même logique que dans ton code initial
+        user = self.context['request'].user
+        departement_id = getattr(user, 'departement_id', None) or user.employee.departement_id
+        validate_no_conflict(user.employee_id, departement_id, attrs['date_debut'], attrs['date_fin'])
         return attrs
 
 class LeaveActionSerializer(serializers.Serializer):
@@ -67,6 +132,39 @@ class LeaveActionSerializer(serializers.Serializer):
             raise serializers.ValidationError("Un commentaire est requis pour rejeter une demande.")
         return attrs
 
+class LeaveBulkActionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+    action = serializers.ChoiceField(choices=['valider', 'rejeter'])
+    commentaire = serializers.CharField(required=False, allow_blank=True, default='')
+
+class LeavePeriodeSerializer(serializers.Serializer):
+    date_debut = serializers.DateField()
+    date_fin = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['date_debut'] > attrs['date_fin']:
+            raise serializers.ValidationError("La date de début ne peut pas être postérieure à la date de fin.")
+        return attrs
+
+class LeaveConflictCheckSerializer(serializers.Serializer):
+    employee_id = serializers.IntegerField(required=False, min_value=1)
+    periodes = serializers.ListField(child=LeavePeriodeSerializer(), allow_empty=False, max_length=100)
+
+    def validate_periodes(self, periodes):
+        start = min(p['date_debut'] for p in periodes)
+        end = max(p['date_fin'] for p in periodes)
+        if (end - start).days >= MAX_WINDOW_DAYS:
+            raise serializers.ValidationError(f"Les périodes doivent tenir dans {MAX_WINDOW_DAYS} jours.")
+        return periodes
+
+def total_conges_approuves(employee):
+    # Annotation de Employee.objects.with_leave_balance() si présente, sinon requête
+    total = getattr(employee, 'total_conges_approuves', None)
+    if total is None:
+        total = Leave.objects.filter(employee=employee, status_conge=Leave.STATUS_VALIDE)\
+                             .aggregate(total=Sum('duree_jours'))['total'] or 0
+    return total
+
 class EmployeeWithLeaveBalanceSerializer(serializers.ModelSerializer):
     total_conges_approuves = serializers.SerializerMethodField()
 
@@ -78,8 +176,7 @@ class EmployeeWithLeaveBalanceSerializer(serializers.ModelSerializer):
         ]
 
     def get_total_conges_approuves(self, employee):
-        return Leave.objects.filter(employee=employee, status_conge='approuve')\
-                            .aggregate(total=Sum('duree_jours'))['total'] or 0
+        return total_conges_approuves(employee)
 
 # class EmployeeOwnLeaveBalanceSerializer(serializers.ModelSerializer):
 #     departement_info = DepartmentSerializer(source='departement', read_only=True)
@@ -124,19 +221,23 @@ class EmployeeOwnLeaveBalanceSerializer(serializers.ModelSerializer):
         ]
 
     def get_total_conges_approuves(self, employee):
-        return Leave.objects.filter(employee=employee, status_conge='approuve')\
-                            .aggregate(total=Sum('duree_jours'))['total'] or 0
+        return total_conges_approuves(employee)
 
     def get_demandes_en_attente(self, employee):
-        return Leave.objects.filter(employee=employee, status_conge='en_attente').count()
+        count = getattr(employee, 'demandes_en_attente', None)
+        if count is None:
+            count = Leave.objects.filter(employee=employee, status_conge=Leave.STATUS_EN_ATTENTE).count()
+        return count
 
     def get_total_restant(self, employee):
-        total = self.get_total_conges_approuves(employee)
-        return max(employee.solde_conge_annuel - total, 0)
+        # solde_conge_annuel est déjà diminué à chaque validation (Leave.save)
+        return max(employee.solde_conge_annuel, 0)
 
     def get_autres_conges(self, employee):
-        queryset = Leave.objects.filter(
-            employee=employee,
-            status_conge__in=["valide", "rejete"]
-        ).order_by('-created_at')  # optionnel : pour avoir les plus récents d'abord
+        queryset = getattr(employee, 'autres_conges_list', None)
+        if queryset is None:
+            queryset = Leave.objects.filter(
+                employee=employee,
+                status_conge__in=[Leave.STATUS_VALIDE, Leave.STATUS_REJETE]
+            ).with_validators().order_by('-created_at')
         return LeaveSerializer(queryset, many=True).data
\ No newline at end of file
@@ -0,0 +1,15 @@
+from django.dispatch import receiver
+
+from leaves.notifications import decision_email, enqueue_emails
+from leaves.workflow import leave_transitioned
+
+
+@receiver(leave_transitioned)
+def notify_leave_decision(sender, leaves, transition, actor, commentaire='', **kwargs):
+    """Mail au demandeur après une décision (envoyé après le commit)"""
+    emails = []
+    for leave in leaves:
+        email = decision_email(leave, transition.action, transition.role, commentaire)
+        if email and leave.employee.email:
+            emails.append((*email, actor.email, [leave.employee.email]))
+    enqueue_emails(emails)
@@ -0,0 +1,105 @@
+# leaves/storage.py
+"""
+Stockage des justificatifs de congé.
+
+Le backend est choisi par LEAVE_SETTINGS['DOCUMENT_STORAGE'] :
+    {'BACKEND': 'leaves.storage.LocalBlobStorage', 'OPTIONS': {...}}
+Les noms de fichiers sont dérivés du hash du contenu : un nom existant désigne
+toujours le même contenu et n'est jamais renommé.
+"""
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import LazyObject, cached_property
+from django.utils.module_loading import import_string
+
+
+@deconstructible
+class LocalBlobStorage(FileSystemStorage):
+    """Système de fichiers local (MEDIA_ROOT par défaut)"""
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+
+@deconstructible
+class S3BlobStorage(Storage):
+    """
+    Stockage compatible S3 via boto3 (AWS, ou MinIO en local avec endpoint_url).
+    """
+
+    def __init__(self, bucket, endpoint_url=None, access_key=None, secret_key=None,
+                 region=None, public_url=None, url_expiration=3600):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.public_url = public_url
+        self.url_expiration = url_expiration
+
+    @cached_property
+    def client(self):
+        import boto3
+        return boto3.client(
+            's3',
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=self.access_key,
+            aws_secret_access_key=self.secret_key,
+            region_name=self.region,
+        )
+
+    def _open(self, name, mode='rb'):
+        obj = self.client.get_object(Bucket=self.bucket, Key=name)
+        return ContentFile(obj['Body'].read(), name=name)
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        self.client.upload_fileobj(content, self.bucket, name)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def exists(self, name):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+        except self.client.exceptions.ClientError:
+            return False
+        return True
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+    def size(self, name):
+        return self.client.head_object(Bucket=self.bucket, Key=name)['ContentLength']
+
+    def url(self, name):
+        if self.public_url:
+            return f"{self.public_url.rstrip('/')}/{name}"
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': name}, ExpiresIn=self.url_expiration
+        )
+
+
+class DocumentStorage(LazyObject):
+    def _setup(self):
+        config = settings.LEAVE_SETTINGS.get('DOCUMENT_STORAGE', {})
+        backend = import_string(config.get('BACKEND', 'leaves.storage.LocalBlobStorage'))
+        self._wrapped = backend(**config.get('OPTIONS', {}))
+
+
+document_storage = DocumentStorage()
+
+
+def get_document_storage():
+    return document_storage
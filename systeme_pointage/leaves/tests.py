@@ -1,3 +1,481 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from authentication.models import Authentication
+from departments.models import Department
+from employees.models import Employee
+from leaves import documents, workflow
+from leaves.conflicts import find_conflicts
+from leaves.ledger import accrue_annual_leave
+from leaves.models import Leave, LeaveBalance, LeaveBalanceEntry, LeaveDocument, LeaveTransition
+from leaves.storage import LocalBlobStorage
+
+
+class LeaveQueryCountTests(APITestCase):
+    """
+    Nombre de requêtes des endpoints de congés : il ne doit pas dépendre du nombre de lignes
+    (select_related / prefetch / agrégats, pas de N+1)
+    """
+
+    START = date(2026, 3, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.departement = Department.objects.create(nom="Informatique")
+        cls.rh = cls._employee('RH001', "Rakoto")
+        cls.manager = cls._employee('MG001', "Rabe")
+        cls.rh_user = Authentication.objects.create_user(
+            email='rh@example.com', password='secret', employee=cls.rh, role='rh'
+        )
+        cls.employees = [cls._employee(f"EMP{i:03d}", f"Employe{i}") for i in range(3)]
+        cls._leaves(cls.employees + [cls.rh], offset=0)
+
+    @classmethod
+    def _employee(cls, immatricule, nom):
+        return Employee.objects.create(
+            immatricule=immatricule, nom=nom, poste="Développeur", departement=cls.departement,
+            email=f"{immatricule.lower()}@example.com", face_encoding=[0.0] * 8,
+        )
+
+    @classmethod
+    def _leaves(cls, employees, offset):
+        # Un congé par statut et par employé, avec les validateurs correspondants
+        leaves = []
+        for i, employee in enumerate(employees):
+            debut = cls.START + timedelta(days=offset + i)
+            common = dict(
+                employee=employee, type_conge='annuel', motif="Test",
+                date_debut=debut, date_fin=debut + timedelta(days=2), duree_jours=3,
+            )
+            leaves += [
+                Leave(status_conge=Leave.STATUS_EN_ATTENTE, **common),
+                Leave(status_conge=Leave.STATUS_EN_ATTENTE_RH, validated_by_manager=cls.manager, **common),
+                Leave(status_conge=Leave.STATUS_VALIDE, validated_by_manager=cls.manager,
+                      validated_by_rh=cls.rh, **common),
+                Leave(status_conge=Leave.STATUS_REJETE, rejected_by=cls.manager, **common),
+            ]
+        Leave.objects.bulk_create(leaves)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(user=self.rh_user)
+
+    def _get(self, url, params=None):
+        cache.clear()
+        response = self.client.get(url, params or {})
+        if hasattr(response, 'streaming_content'):
+            b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertConstantQueries(self, url, params=None):
+        with CaptureQueriesContext(connection) as baseline:
+            self._get(url, params)
+        more = [self._employee(f"NEW{i:03d}", f"Nouveau{i}") for i in range(5)]
+        self._leaves(more, offset=3)
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            self._get(url, params)
+
+    def test_list(self):
+        self.assertConstantQueries(reverse('leave-list'))
+
+    def test_detail(self):
+        simple = Leave.objects.filter(status_conge=Leave.STATUS_EN_ATTENTE).first()
+        complet = Leave.objects.filter(status_conge=Leave.STATUS_VALIDE).first()
+        with CaptureQueriesContext(connection) as baseline:
+            self._get(reverse('leave-detail', args=[simple.pk]))
+        # Employé, département et validateurs chargés avec le congé
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            self._get(reverse('leave-detail', args=[complet.pk]))
+
+    def test_calendar(self):
+        window = {'start': '2026-03-01', 'end': '2026-03-31'}
+        self.assertConstantQueries(reverse('leave-calendar'), window)
+
+    def test_calendar_occupation(self):
+        window = {'start': '2026-03-01', 'end': '2026-03-31', 'mode': 'occupation'}
+        self.assertConstantQueries(reverse('leave-calendar'), window)
+
+    def test_stats(self):
+        self.assertConstantQueries(reverse('leave-stats'))
+
+    def test_stats_by_department(self):
+        self.assertConstantQueries(reverse('leave-stats'), {'group_by': 'departement'})
+
+    def test_stats_cached(self):
+        self._get(reverse('leave-stats'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('leave-stats'))
+
+    def test_balance_me(self):
+        self.assertConstantQueries(reverse('leave-balance-me'))
+
+    def test_balance_me_documents(self):
+        with CaptureQueriesContext(connection) as baseline:
+            self._get(reverse('leave-balance-me'))
+        for i, leave in enumerate(Leave.objects.filter(employee=self.rh)):
+            leave.document = LeaveDocument.objects.create(sha256=f"{i:064d}", taille=10)
+            leave.save(update_fields=['document'])
+        # Justificatifs chargés avec les congés préchargés
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            self._get(reverse('leave-balance-me'))
+
+    def test_balance_list(self):
+        self.assertConstantQueries(reverse('leave-balance'))
+
+    def test_balance_total(self):
+        self.assertConstantQueries(reverse('leave-balance-total'))
+
+    def test_export(self):
+        self.assertConstantQueries(reverse('leave-export'))
+
+    def test_export_filtered(self):
+        filters = {'start': '2026-03-01', 'end': '2026-03-31', 'status': 'valide,rejete'}
+        self.assertConstantQueries(reverse('leave-export'), filters)
+
+    def test_face_encodings_not_loaded(self):
+        requests = [
+            (reverse('leave-list'), {}),
+            (reverse('leave-list'), {'fields': 'id,employee,approuve_par'}),
+            (reverse('leave-calendar'), {'start': '2026-03-01', 'end': '2026-03-31', 'fields': 'id,approuve_par'}),
+            (reverse('leave-export'), {}),
+        ]
+        for url, params in requests:
+            with CaptureQueriesContext(connection) as queries:
+                response = self._get(url, params)
+            if params.get('fields'):
+                self.assertIn('approuve_par', response.data['results'][0])
+            for query in queries.captured_queries:
+                self.assertNotIn('face_encoding', query['sql'], (url, params))
+
+    def test_export_invalid_dates(self):
+        for params in ({'start': '01/03/2026'}, {'end': 'demain'}, {'start': '2026-02-30'}):
+            response = self.client.get(reverse('leave-export'), params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class AccrueAnnualLeaveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        departement = Department.objects.create(nom="Comptabilité")
+        cls.employee = Employee.objects.create(
+            immatricule='CPT001', nom="Rasoa", poste="Comptable", departement=departement,
+            solde_conge_annuel=0,
+        )
+
+    def test_rejouable(self):
+        self.assertEqual(accrue_annual_leave(2026, 30), 1)
+        self.assertEqual(accrue_annual_leave(2026, 30), 0)
+
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.solde_conge_annuel, 30)
+        self.assertEqual(LeaveBalance.objects.get(employee=self.employee, annee=2026).solde, 30)
+        self.assertEqual(LeaveBalanceEntry.objects.filter(employee=self.employee, annee=2026).count(), 1)
+
+
+class LeaveTransitionTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        departement = Department.objects.create(nom="Finance")
+        cls.users = {}
+        for role, immatricule in (('manager', 'FIN001'), ('rh', 'FIN002'), ('employee', 'FIN003')):
+            employee = Employee.objects.create(
+                immatricule=immatricule, nom=role.capitalize(), poste=role, departement=departement,
+                email=f"{immatricule.lower()}@example.com",
+            )
+            cls.users[role] = Authentication.objects.create_user(
+                email=employee.email, password='secret', employee=employee, role=role
+            )
+        cls.employee = cls.users['employee'].employee
+
+    def _leave(self, status_conge=Leave.STATUS_EN_ATTENTE, jours=3):
+        debut = date(2026, 4, 6)
+        return Leave.objects.create(
+            employee=self.employee, type_conge='annuel', motif="Vacances", status_conge=status_conge,
+            date_debut=debut, date_fin=debut + timedelta(days=jours - 1), duree_jours=jours,
+        )
+
+    def _action(self, role, leave, action):
+        self.client.force_authenticate(user=self.users[role])
+        url = reverse('manager-action' if role == 'manager' else 'rh-action', args=[leave.pk])
+        return self.client.post(url, {'action': action}, format='json')
+
+    def test_validation_manager(self):
+        leave = self._leave()
+        response = self._action('manager', leave, 'valider')
+        self.assertEqual(response.status_code, 200)
+        leave.refresh_from_db()
+        self.assertEqual(leave.status_conge, Leave.STATUS_EN_ATTENTE_RH)
+        self.assertEqual(leave.validated_by_manager_id, self.users['manager'].employee_id)
+        self.assertTrue(LeaveTransition.objects.filter(leave=leave, target=Leave.STATUS_EN_ATTENTE_RH).exists())
+
+    def test_validation_rh_debite_le_solde(self):
+        leave = self._leave(Leave.STATUS_EN_ATTENTE_RH)
+        response = self._action('rh', leave, 'valider')
+        self.assertEqual(response.status_code, 200)
+        leave.refresh_from_db()
+        self.employee.refresh_from_db()
+        self.assertEqual(leave.status_conge, Leave.STATUS_VALIDE)
+        self.assertIsNotNone(leave.date_approbation)
+        self.assertEqual(self.employee.solde_conge_annuel, 27)
+        self.assertEqual(LeaveBalanceEntry.objects.get(leave=leave).jours, -3)
+
+    def test_rejet(self):
+        leave = self._leave()
+        response = self._action('manager', leave, 'rejeter')
+        self.assertEqual(response.status_code, 200)
+        leave.refresh_from_db()
+        self.assertEqual(leave.status_conge, Leave.STATUS_REJETE)
+        self.assertEqual(leave.rejected_by_id, self.users['manager'].employee_id)
+
+    def test_statut_inattendu(self):
+        leave = self._leave(Leave.STATUS_REJETE)
+        self.assertEqual(self._action('manager', leave, 'valider').status_code, 400)
+
+    def test_double_validation_concurrente(self):
+        leave = self._leave(Leave.STATUS_EN_ATTENTE_RH)
+        # Deux RH ont chargé la demande avant que l'un d'eux ne la valide
+        first, second = (
+            Leave.objects.select_related('employee', 'employee__auth_user').get(pk=leave.pk) for _ in range(2)
+        )
+        self.assertIsNone(workflow.apply([first], self.users['rh'], 'valider')[leave.pk])
+        error = workflow.apply([second], self.users['rh'], 'valider')[leave.pk]
+        self.assertEqual(error.status_code, 409)
+
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.solde_conge_annuel, 27)
+        self.assertEqual(LeaveTransition.objects.filter(leave=leave).count(), 1)
+
+    def test_solde_insuffisant(self):
+        Employee.objects.filter(pk=self.employee.pk).update(solde_conge_annuel=2)
+        leave = self._leave(Leave.STATUS_EN_ATTENTE_RH)
+        before = Leave.objects.values('updated_at', 'date_approbation').get(pk=leave.pk)
+
+        response = self._action('rh', leave, 'valider')
+        self.assertEqual(response.status_code, 400)
+        leave.refresh_from_db()
+        self.employee.refresh_from_db()
+        self.assertEqual(leave.status_conge, Leave.STATUS_EN_ATTENTE_RH)
+        self.assertIsNone(leave.validated_by_rh_id)
+        self.assertEqual(Leave.objects.values('updated_at', 'date_approbation').get(pk=leave.pk), before)
+        self.assertEqual(self.employee.solde_conge_annuel, 2)
+        self.assertFalse(LeaveBalanceEntry.objects.filter(leave=leave).exists())
+        self.assertFalse(LeaveTransition.objects.filter(leave=leave).exists())
+
+    def test_validation_groupee_partielle(self):
+        Employee.objects.filter(pk=self.employee.pk).update(solde_conge_annuel=4)
+        courte, longue = self._leave(Leave.STATUS_EN_ATTENTE_RH, 3), self._leave(Leave.STATUS_EN_ATTENTE_RH, 3)
+        self.client.force_authenticate(user=self.users['rh'])
+        response = self.client.post(
+            reverse('leave-bulk-action'), {'ids': [courte.pk, longue.pk], 'action': 'valider'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['traitees'], 1)
+        self.assertEqual(
+            sorted(Leave.objects.filter(pk__in=[courte.pk, longue.pk]).values_list('status_conge', flat=True)),
+            sorted([Leave.STATUS_VALIDE, Leave.STATUS_EN_ATTENTE_RH]),
+        )
+
+    def test_annulation_par_le_demandeur(self):
+        self.client.force_authenticate(user=self.users['employee'])
+        pending, done = self._leave(), self._leave(Leave.STATUS_VALIDE)
+        self.assertEqual(self.client.delete(reverse('leave-detail', args=[pending.pk])).status_code, 204)
+        self.assertEqual(self.client.delete(reverse('leave-detail', args=[done.pk])).status_code, 400)
+        self.assertFalse(Leave.objects.filter(pk=pending.pk).exists())
+
+
+def _png():
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', (600, 400), 'white').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+# process() ferme les connexions hors transaction : neutralisé dans les tests (TestCase = transaction)
+@mock.patch('leaves.documents.close_old_connections')
+class LeaveDocumentTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.spool = os.path.join(root, 'spool')
+        overrides = override_settings(
+            MEDIA_ROOT=os.path.join(root, 'media'),
+            LEAVE_SETTINGS={**settings.LEAVE_SETTINGS, 'DOCUMENT_SPOOL_DIR': self.spool},
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def _upload(self, content=b'%PDF-1.4 justificatif', name='certificat.pdf', content_type='application/pdf'):
+        with self.captureOnCommitCallbacks() as callbacks:
+            document = documents.ingest(SimpleUploadedFile(name, content, content_type=content_type))
+        return document, callbacks
+
+    def _age(self, document, path=None):
+        old = timezone.now() - timedelta(hours=1)
+        LeaveDocument.objects.filter(pk=document.pk).update(created_at=old)
+        if path:
+            os.utime(path, (old.timestamp(), old.timestamp()))
+
+    def test_ingest(self, _close):
+        document, callbacks = self._upload()
+        self.assertEqual(document.statut, LeaveDocument.STATUT_EN_ATTENTE)
+        self.assertEqual(len(callbacks), 1)
+        # Fichier d'attente nommé par le hash : retrouvable par recover_pending
+        self.assertEqual(os.listdir(self.spool), [document.sha256])
+
+    def test_ingest_contenu_connu(self, _close):
+        first, _ = self._upload()
+        second, callbacks = self._upload(name='copie.pdf')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(os.listdir(self.spool), [first.sha256])
+
+    def test_ingest_relance_un_echec(self, _close):
+        document, _ = self._upload()
+        LeaveDocument.objects.filter(pk=document.pk).update(statut=LeaveDocument.STATUT_ECHEC)
+        again, callbacks = self._upload()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(again.statut, LeaveDocument.STATUT_EN_ATTENTE)
+        self.assertEqual(LeaveDocument.objects.get(pk=document.pk).statut, LeaveDocument.STATUT_EN_ATTENTE)
+
+        # Déjà remis en attente : un second envoi concurrent ne relance pas le traitement
+        _, callbacks = self._upload()
+        self.assertEqual(callbacks, [])
+
+    def test_process_image(self, _close):
+        document, _ = self._upload(_png(), 'scan.png', 'image/png')
+        documents.process(document.pk, os.path.join(self.spool, document.sha256))
+        document.refresh_from_db()
+        self.assertEqual(document.statut, LeaveDocument.STATUT_PRET)
+        self.assertTrue(document.fichier.name.endswith('.png'))
+        self.assertTrue(document.miniature.name.endswith('_thumb.jpg'))
+        self.assertTrue(document.fichier.storage.exists(document.fichier.name))
+        self.assertEqual(os.listdir(self.spool), [])
+
+    def test_process_fichier_absent(self, _close):
+        document, _ = self._upload()
+        os.remove(os.path.join(self.spool, document.sha256))
+        documents.process(document.pk, os.path.join(self.spool, document.sha256))
+        document.refresh_from_db()
+        self.assertEqual(document.statut, LeaveDocument.STATUT_ECHEC)
+
+    def test_recover_pending(self, _close):
+        repris, _ = self._upload(_png(), 'scan.png', 'image/png')
+        self._age(repris, os.path.join(self.spool, repris.sha256))
+        perdu, _ = self._upload(b'contenu perdu')
+        os.remove(os.path.join(self.spool, perdu.sha256))
+        self._age(perdu)
+        recent, _ = self._upload(b'envoi en cours')
+        orphelin = os.path.join(self.spool, 'orphelin')
+        with open(orphelin, 'wb') as f:
+            f.write(b'x')
+        os.utime(orphelin, (time.time() - 3600, time.time() - 3600))
+
+        self.assertEqual(documents.recover_pending(timedelta(minutes=15)), (1, 1, 1))
+        statuts = dict(LeaveDocument.objects.values_list('pk', 'statut'))
+        self.assertEqual(statuts[repris.pk], LeaveDocument.STATUT_PRET)
+        self.assertEqual(statuts[perdu.pk], LeaveDocument.STATUT_ECHEC)
+        self.assertEqual(statuts[recent.pk], LeaveDocument.STATUT_EN_ATTENTE)
+        self.assertEqual(os.listdir(self.spool), [recent.sha256])
+
+
+class LocalBlobStorageTests(TestCase):
+    def test_nom_derive_du_contenu_jamais_renomme(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalBlobStorage(location=root)
+            self.assertEqual(storage.save('ab/abcd.pdf', ContentFile(b'premier')), 'ab/abcd.pdf')
+            # Même nom = même contenu : pas de suffixe, fichier existant conservé
+            self.assertEqual(storage.save('ab/abcd.pdf', ContentFile(b'second')), 'ab/abcd.pdf')
+            with storage.open('ab/abcd.pdf') as f:
+                self.assertEqual(f.read(), b'premier')
+
+
+@override_settings(LEAVE_SETTINGS={**settings.LEAVE_SETTINGS, 'MAX_ABSENCE_RATIO': 0.5})
+class LeaveConflictCheckTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        departement = Department.objects.create(nom="Achats")
+        cls.demandeur, cls.b, cls.c, cls.d = [
+            Employee.objects.create(
+                immatricule=f"ACH{i:03d}", nom=f"Acheteur{i}", poste="Acheteur", departement=departement,
+                email=f"ach{i:03d}@example.com",
+            )
+            for i in range(4)
+        ]
+        cls.user = Authentication.objects.create_user(
+            email=cls.demandeur.email, password='secret', employee=cls.demandeur, role='employee'
+        )
+        autre = Employee.objects.create(
+            immatricule='VEN001', nom="Vendeur", poste="Manager", departement=Department.objects.create(nom="Ventes"),
+            email='ven001@example.com',
+        )
+        cls.autre_manager = Authentication.objects.create_user(
+            email=autre.email, password='secret', employee=autre, role='manager'
+        )
+        cls._leave(cls.b, date(2026, 5, 11), date(2026, 5, 13), Leave.STATUS_VALIDE)
+        cls._leave(cls.c, date(2026, 5, 12), date(2026, 5, 12), Leave.STATUS_EN_ATTENTE)
+        cls._leave(cls.d, date(2026, 5, 11), date(2026, 5, 15), Leave.STATUS_REJETE)
+        cls.own = cls._leave(cls.demandeur, date(2026, 5, 13), date(2026, 5, 14), Leave.STATUS_EN_ATTENTE)
+
+    @classmethod
+    def _leave(cls, employee, debut, fin, status_conge):
+        return Leave.objects.create(
+            employee=employee, type_conge='annuel', motif="Test", status_conge=status_conge,
+            date_debut=debut, date_fin=fin, duree_jours=(fin - debut).days + 1,
+        )
+
+    def _check(self, user, periodes, **data):
+        self.client.force_authenticate(user=user)
+        periodes = [{'date_debut': debut, 'date_fin': fin} for debut, fin in periodes]
+        return self.client.post(reverse('leave-conflicts'), {'periodes': periodes, **data}, format='json')
+
+    def test_chevauchements_et_sous_effectif(self):
+        response = self._check(self.user, [
+            ('2026-05-11', '2026-05-12'), ('2026-05-13', '2026-05-13'), ('2026-05-18', '2026-05-19'),
+        ])
+        self.assertEqual(response.status_code, 200)
+        resultats = response.data['resultats']
+        # 4 employés, ratio 0.5 : 2 absents au plus ; le 12, B et C sont absents en plus du demandeur
+        self.assertEqual(resultats[0]['jours_sous_effectif'], [date(2026, 5, 12)])
+        self.assertEqual(resultats[0]['chevauchements'], [])
+        self.assertTrue(resultats[0]['conflit'])
+        self.assertEqual(resultats[1]['chevauchements'], [self.own.pk])
+        self.assertEqual(resultats[1]['jours_sous_effectif'], [])
+        self.assertFalse(resultats[2]['conflit'])
+
+    def test_employe_non_visible(self):
+        response = self._check(self.autre_manager, [('2026-05-11', '2026-05-12')], employee_id=self.demandeur.pk)
+        self.assertEqual(response.status_code, 404)
+
+    def test_sans_departement_pas_de_seuil(self):
+        [resultat] = find_conflicts(self.demandeur.pk, None, [(date(2026, 5, 11), date(2026, 5, 14))])
+        self.assertEqual(resultat['chevauchements'], [self.own.pk])
+        self.assertEqual(resultat['jours_sous_effectif'], [])
+
+    def test_nombre_de_requetes_constant(self):
+        periodes = [('2026-05-11', '2026-05-15')]
+        with CaptureQueriesContext(connection) as few:
+            self._check(self.user, periodes)
+        for employee in (self.b, self.c, self.d):
+            self._leave(employee, date(2026, 5, 14), date(2026, 5, 15), Leave.STATUS_EN_ATTENTE)
+        with CaptureQueriesContext(connection) as many:
+            response = self._check(self.user, periodes)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(many), len(few))
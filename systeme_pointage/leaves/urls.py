@@ -1,8 +1,8 @@
 from django.urls import path
 from .views import (
-    LeaveCreateView, LeaveListView, LeaveDetailView,
+    LeaveCreateView, LeaveListView, LeaveDetailView, LeaveConflictCheckView,
     LeaveTypeListView, LeaveTypePublicView,
-    RHLeaveActionView, ManagerLeaveActionView,
+    RHLeaveActionView, ManagerLeaveActionView, LeaveBulkActionView,
     LeaveStatsView, EmployeeOwnLeaveBalanceView,
     EmployeeLeaveBalanceView, LeaveBalanceView,
     LeaveCalendarView, LeaveExportView,
@@ -15,6 +15,9 @@ urlpatterns = [
     # 📝 Créer une demande de congé (POST) - réservé à l'employé connecté
     path('create/', LeaveCreateView.as_view(), name='leave-create'),
 
+    # 🧮 Simulation (POST) - conflits et seuil d'absence pour plusieurs périodes envisagées
+    path('conflicts/', LeaveConflictCheckView.as_view(), name='leave-conflicts'),
+
     # 🔍/✏️/🗑️ Détail, modification ou suppression d’une demande de congé (GET, PUT, DELETE)
     # Seul le propriétaire peut modifier/supprimer si en attente
     path('<int:pk>/', LeaveDetailView.as_view(), name='leave-detail'),
@@ -25,6 +28,9 @@ urlpatterns = [
     # ✅❌ Action Manager (POST) - approuver ou rejeter une demande de son département
     path('<int:pk>/manager-action/', ManagerLeaveActionView.as_view(), name='manager-action'),
 
+    # ✅❌ Action groupée Manager/RH (POST) - {"ids": [...], "action": "valider"|"rejeter"}
+    path('bulk-action/', LeaveBulkActionView.as_view(), name='leave-bulk-action'),
+
     # 📄 Liste des types de congés (GET) - pour les utilisateurs connectés
     path('types/', LeaveTypeListView.as_view(), name='leave-types'),
 
@@ -43,9 +49,10 @@ urlpatterns = [
     # 🧾 Solde total des congés approuvés (GET) - admin/RH/employé
     path('balance/total/', LeaveBalanceView.as_view(), name='leave-balance-total'),
 
-    # 📅 Calendrier des congés (GET) - pour affichage sous forme calendrier
+    # 📅 Calendrier des congés (GET) - ?start=&end= (mois en cours par défaut, 366 jours au plus),
+    # ?status= pour filtrer les statuts, ?mode=occupation pour la vue compacte
     path('calendar/', LeaveCalendarView.as_view(), name='leave-calendar'),
 
-    # 📤 Exporter les congés en CSV (GET) - réservé à l’admin ou RH
+    # 📤 Exporter les congés en CSV (GET, en flux) - réservé à l’admin ou RH ; ?start=&end=&status=&type=&departement=
     path('export/', LeaveExportView.as_view(), name='leave-export'),
 ]
@@ -2,22 +2,38 @@ from rest_framework import generics, status, views
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from collections import defaultdict
+from datetime import timedelta
 import csv
-from django.db.models import Q, Sum
+from django.db.models import Q, Sum, Prefetch
 from rest_framework.views import APIView
 
 from .models import Leave
 from .serializers import (
     LeaveSerializer, LeaveCreateSerializer, LeaveActionSerializer,
-    EmployeeWithLeaveBalanceSerializer, EmployeeOwnLeaveBalanceSerializer
+    EmployeeWithLeaveBalanceSerializer, EmployeeOwnLeaveBalanceSerializer,
+    LeaveBulkActionSerializer, LeaveConflictCheckSerializer
 )
-from authentication.permissions import IsRHUser, IsManagerUser
+from .conflicts import find_conflicts
+from . import workflow
+from authentication.permissions import IsRHUser, IsManagerUser, resolve_visibility, SCOPE_ALL
 from employees.models import Employee
 from authentication.models import Authentication
 from leaves.models import Leave
 
-from django.core.mail import send_mail
+
+class StreamedUploadMixin:
+    """Fichiers reçus écrits par morceaux sur disque, jamais gardés en mémoire"""
+
+    def initial(self, request, *args, **kwargs):
+        request.upload_handlers = [TemporaryFileUploadHandler(request._request)]
+        super().initial(request, *args, **kwargs)
 
 
 # 1. Liste des congés selon rôle
@@ -26,19 +42,12 @@ class LeaveListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        role = getattr(user, 'role', None)
-
-        if user.is_staff or role in ['admin', 'rh']:
-            return Leave.objects.all().order_by('-created_at')
-        elif role == 'manager':
-            return Leave.objects.filter(employee__departement=user.employee.departement).order_by('-created_at')
-        else:
-            return Leave.objects.filter(employee=user.employee).order_by('-created_at')
+        queryset = Leave.objects.visible_to(self.request.user).with_validators().order_by('-created_at')
+        return LeaveSerializer.optimize_queryset(queryset, self.request)
 
 
 # 2. Création d’une demande congé (employé connecté)
-class LeaveCreateView(generics.CreateAPIView):
+class LeaveCreateView(StreamedUploadMixin, generics.CreateAPIView):
     serializer_class = LeaveCreateSerializer
     permission_classes = [IsAuthenticated]
 
@@ -54,24 +63,40 @@ class LeaveCreateView(generics.CreateAPIView):
         return Response(full_data, status=status.HTTP_201_CREATED)
 
 
-# 3. Détail, modification, suppression congé (avec restrictions)
-class LeaveDetailView(generics.RetrieveUpdateDestroyAPIView):
-    serializer_class = LeaveSerializer
+# 2 bis. Simulation : conflits de plusieurs périodes envisagées (planification)
+class LeaveConflictCheckView(APIView):
+    """
+    POST {"periodes": [{"date_debut": "...", "date_fin": "..."}, ...], "employee_id": optionnel}
+    Sans employee_id : l'employé connecté. Sinon un employé visible par l'utilisateur (manager/RH).
+    """
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
-        user = self.request.user
+    def post(self, request):
+        serializer = LeaveConflictCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        employee_id = serializer.validated_data.get('employee_id', request.user.employee_id)
 
-        if user.is_staff or getattr(user, 'role', None) == 'admin':
-            return Leave.objects.all()
+        # Employé absent ou non visible : 404 ; sans département : pas de seuil d'effectif
+        found = list(Employee.objects.visible_to(request.user).filter(pk=employee_id)
+                     .values_list('departement_id', flat=True)[:1])
+        if not found:
+            return Response({'detail': 'Employé non trouvé.'}, status=status.HTTP_404_NOT_FOUND)
+        departement_id = found[0]
 
-        if getattr(user, 'role', None) == 'manager':
-            return Leave.objects.filter(employee__departement=user.employee.departement)
+        periodes = [(p['date_debut'], p['date_fin']) for p in serializer.validated_data['periodes']]
+        resultats = find_conflicts(employee_id, departement_id, periodes)
+        for r in resultats:
+            r['conflit'] = bool(r['chevauchements'] or r['jours_sous_effectif'])
+        return Response({'employee_id': employee_id, 'resultats': resultats})
 
-        if getattr(user, 'role', None) == 'rh':
-            return Leave.objects.all()
 
-        return Leave.objects.filter(employee=user.employee)
+# 3. Détail, modification, suppression congé (avec restrictions)
+class LeaveDetailView(StreamedUploadMixin, generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = LeaveSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Leave.objects.visible_to(self.request.user).with_validators()
 
     def update(self, request, *args, **kwargs):
         leave = self.get_object()
@@ -91,72 +116,7 @@ class RHLeaveActionView(APIView):
     permission_classes = [IsAuthenticated, IsRHUser]
 
     def post(self, request, pk):
-        try:
-            leave = Leave.objects.get(pk=pk)
-        except Leave.DoesNotExist:
-            return Response({"detail": "Demande non trouvée."}, status=404)
-
-        demandeur = leave.employee
-
-        try:
-            auth_obj = Authentication.objects.get(employee=demandeur)
-            demandeur_role = auth_obj.role
-        except Authentication.DoesNotExist:
-            return Response({"detail": "Le rôle du demandeur est introuvable."}, status=400)
-
-        if demandeur == request.user.employee and demandeur_role == 'rh':
-            return Response({"detail": "Vous ne pouvez pas valider votre propre demande."}, status=400)
-
-        if demandeur_role == 'manager':
-            if leave.status_conge != Leave.STATUS_EN_ATTENTE:
-                return Response({"detail": "La demande n'est pas en attente."}, status=400)
-        else:
-            if leave.status_conge != Leave.STATUS_EN_ATTENTE_RH:
-                return Response({"detail": "La demande n'est pas encore validée par un manager."}, status=400)
-
-        action = request.data.get('action')
-        sujet = ""
-        message = ""
-
-        if action == 'valider':
-            leave.status_conge = Leave.STATUS_VALIDE
-            leave.validated_by_rh = request.user.employee
-            leave.date_approbation = timezone.now()
-            sujet = "✅ Demande de congé approuvée"
-            message = (
-                f"Bonjour {demandeur.prenom},\n\n"
-                f"Votre demande de congé du {leave.date_debut} au {leave.date_fin} a été *validée* par le RH.\n"
-                f"Bonne continuation !\n\nRH"
-            )
-        elif action == 'rejeter':
-            leave.status_conge = Leave.STATUS_REJETE
-            leave.rejected_by = request.user.employee
-            commentaire = request.data.get('commentaire', '')
-            leave.commentaire_admin = commentaire
-            sujet = "❌ Demande de congé rejetée"
-            message = (
-                f"Bonjour {demandeur.prenom},\n\n"
-                f"Votre demande de congé du {leave.date_debut} au {leave.date_fin} a été *rejetée* par le RH.\n"
-                f"Motif : {commentaire}\n\nCordialement,\nRH"
-            )
-        else:
-            return Response({"detail": "Action invalide. Utilisez 'valider' ou 'rejeter'."}, status=400)
-
-        leave.save()
-
-        if demandeur.email:
-            try:
-                send_mail(
-                    sujet,
-                    message,
-                    request.user.email,
-                    [demandeur.email],
-                    fail_silently=True
-                )
-            except Exception as e:
-                return Response({"detail": f"Demande enregistrée mais erreur email : {str(e)}"})
-
-        return Response({"detail": f"Demande {action} avec succès."})
+        return leave_action_response(request, pk)
 
 # class RHLeaveActionView(APIView):
 #     permission_classes = [IsAuthenticated, IsRHUser]
@@ -213,57 +173,21 @@ class ManagerLeaveActionView(APIView):
     permission_classes = [IsAuthenticated, IsManagerUser]
 
     def post(self, request, pk):
-        try:
-            leave = Leave.objects.get(pk=pk)
-        except Leave.DoesNotExist:
-            return Response({"detail": "Demande non trouvée."}, status=404)
-
-        if leave.employee == request.user.employee:
-            return Response({"detail": "Vous ne pouvez pas valider votre propre demande."}, status=400)
-
-        if leave.employee.departement != request.user.employee.departement:
-            return Response({"detail": "Vous ne pouvez valider que les demandes de votre département."}, status=403)
-
-        if leave.status_conge != Leave.STATUS_EN_ATTENTE:
-            return Response({"detail": "Cette demande a déjà été traitée."}, status=400)
-
-        action = request.data.get('action')
-        sujet = ""
-        message = ""
-
-        if action == 'valider':
-            leave.status_conge = Leave.STATUS_EN_ATTENTE_RH
-            leave.validated_by_manager = request.user.employee
-
-        elif action == 'rejeter':
-            leave.status_conge = Leave.STATUS_REJETE
-            leave.rejected_by = request.user.employee
-            commentaire = request.data.get('commentaire', '')
-            sujet = "❌ Demande de congé rejetée par votre manager"
-            message = (
-                f"Bonjour {leave.employee.prenom},\n\n"
-                f"Votre demande de congé du {leave.date_debut} au {leave.date_fin} a été *rejetée* par votre manager.\n"
-                f"Motif : {commentaire}\n\nCordialement,\nVotre manager"
-            )
-        else:
-            return Response({"detail": "Action invalide. Utilisez 'valider' ou 'rejeter'."}, status=400)
-
-        leave.save()
-
-        # Envoi email uniquement si rejeté
-        if action == 'rejeter' and leave.employee.email:
-            try:
-                send_mail(
-                    sujet,
-                    message,
-                    request.user.email,
-                    [leave.employee.email],
-                    fail_silently=True
-                )
-            except Exception as e:
-                return Response({"detail": f"Demande traitée mais erreur email : {str(e)}"})
-
-        return Response({"detail": f"Demande {action} avec succès."})
+        return leave_action_response(request, pk)
+
+
+def leave_action_response(request, pk):
+    """Action unitaire Manager / RH via le workflow (leaves/workflow.py)"""
+    try:
+        leave = Leave.objects.select_related('employee', 'employee__auth_user').get(pk=pk)
+    except Leave.DoesNotExist:
+        return Response({"detail": "Demande non trouvée."}, status=404)
+
+    action = request.data.get('action')
+    error = workflow.apply([leave], request.user, action, request.data.get('commentaire', ''))[leave.pk]
+    if error:
+        return Response({"detail": str(error)}, status=error.status_code)
+    return Response({"detail": f"Demande {action} avec succès."})
 
 # class ManagerLeaveActionView(APIView):
 #     permission_classes = [IsAuthenticated, IsManagerUser]
@@ -298,6 +222,40 @@ class ManagerLeaveActionView(APIView):
     
 
 
+# 5 bis. Action groupée Manager / RH : valider/rejeter une liste de demandes
+class LeaveBulkActionView(APIView):
+    """
+    POST {"ids": [..], "action": "valider"|"rejeter", "commentaire": ""}
+    Mêmes transitions que ManagerLeaveActionView / RHLeaveActionView (leaves/workflow.py),
+    appliquées à tout le lot dans une seule transaction. Retourne le résultat pour chaque id.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        user = request.user
+        role = getattr(user, 'role', None)
+        if role not in ['manager', 'rh']:
+            return Response({"detail": "Action réservée aux managers et au RH."}, status=403)
+
+        serializer = LeaveBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data['action']
+        commentaire = serializer.validated_data['commentaire']
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        leaves = Leave.objects.select_related('employee', 'employee__auth_user').in_bulk(ids)
+        results = {pk: workflow.TransitionError("Demande non trouvée.", 404) for pk in ids if pk not in leaves}
+        results.update(workflow.apply(leaves.values(), user, action, commentaire))
+
+        return Response({
+            'action': action,
+            'traitees': sum(1 for pk in ids if results[pk] is None),
+            'resultats': [
+                {'id': pk, 'succes': results[pk] is None, 'detail': results[pk] and str(results[pk])}
+                for pk in ids
+            ],
+        })
+
+
 # 6. Admin : peut voir toutes les demandes, mais ne peut pas valider — pas d’action de validation admin
 
 
@@ -307,24 +265,38 @@ class LeaveStatsView(views.APIView):
 
     def get(self, request):
         user = request.user
-        qs = Leave.objects.all()
-
-        if not (user.is_staff or getattr(user, 'role', None) == 'admin' or getattr(user, 'role', None) == 'rh'):
-            # Employé : ses congés uniquement
-            qs = qs.filter(employee=user.employee)
-        # Manager peut voir congés de son département
-        elif getattr(user, 'role', None) == 'manager':
-            qs = qs.filter(employee__departement=user.employee.departement)
-
-        data = {
-            'total': qs.count(),
-            'en_attente': qs.filter(status_conge='en_attente').count(),
-            'approuve': qs.filter(status_conge='approuve').count(),
-            'rejete': qs.filter(status_conge='rejete').count(),
-            'annule': qs.filter(status_conge='annule').count(),
-        }
+        scope, value = resolve_visibility(user)
+        group_by = request.query_params.get('group_by')
+
+        if group_by == 'departement' and scope != SCOPE_ALL:
+            return Response({'detail': 'Regroupement par département réservé aux admin/RH.'}, status=status.HTTP_403_FORBIDDEN)
+
+        # Cache court par portée : tous les admin/RH partagent la même entrée
+        cache_key = f"leaves:stats:{scope}:{value}:{group_by or ''}"
+        data = cache.get(cache_key)
+        if data is None:
+            qs = Leave.objects.visible_to(user)
+            data = self._format(qs.stats())
+            if group_by == 'departement':
+                data['departements'] = [
+                    {
+                        'id': row.pop('employee__departement_id'),
+                        'nom': row.pop('employee__departement__nom'),
+                        **self._format(row),
+                    }
+                    for row in qs.stats_by_department()
+                ]
+            cache.set(cache_key, data, settings.LEAVE_SETTINGS['STATS_CACHE_TTL'])
         return Response(data)
 
+    @staticmethod
+    def _format(counts):
+        data = {'total': counts['total']}
+        for key, _label in Leave.STATUS_CHOICES:
+            data[key] = counts[key]
+        data['par_type'] = {key: counts[f'type_{key}'] for key, _label in Leave.TYPE_CONGE_CHOICES}
+        return data
+
 
 # 8. Solde congés employé connecté
 class EmployeeOwnLeaveBalanceView(generics.RetrieveAPIView):
@@ -332,7 +304,16 @@ class EmployeeOwnLeaveBalanceView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user.employee
+        # Totaux annotés + congés traités préchargés : 2 requêtes au total
+        autres_conges = Leave.objects.filter(
+            status_conge__in=[Leave.STATUS_VALIDE, Leave.STATUS_REJETE]
+        ).select_related('validated_by_manager', 'validated_by_rh', 'rejected_by', 'document').defer(
+            'validated_by_manager__face_encoding', 'validated_by_rh__face_encoding', 'rejected_by__face_encoding'
+        ).order_by('-created_at')
+        return Employee.objects.with_leave_balance() \
+            .select_related('departement') \
+            .prefetch_related(Prefetch('leaves', queryset=autres_conges, to_attr='autres_conges_list')) \
+            .get(pk=self.request.user.employee_id)
 
 
 # 9. Liste des employés avec total congés approuvés (admin, rh)
@@ -342,9 +323,10 @@ class EmployeeLeaveBalanceView(generics.ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
+        employees = Employee.objects.with_leave_balance().order_by('nom', 'prenom')
         if user.is_staff or getattr(user, 'role', None) in ['admin', 'rh']:
-            return Employee.objects.all()
-        return Employee.objects.filter(id=user.employee.id)
+            return employees
+        return employees.filter(id=user.employee_id)
 
 
 # 10. Solde congés global ou par employé (admin, rh, employé)
@@ -355,15 +337,9 @@ class LeaveBalanceView(views.APIView):
         user = request.user
         employee_id = request.query_params.get('employee_id')
 
-        if user.is_staff or getattr(user, 'role', None) in ['admin', 'rh']:
-            if employee_id:
-                leaves = Leave.objects.filter(employee_id=employee_id, status_conge='approuve')
-            else:
-                leaves = Leave.objects.filter(status_conge='approuve')
-        elif getattr(user, 'role', None) == 'manager':
-            leaves = Leave.objects.filter(employee__departement=user.employee.departement, status_conge='approuve')
-        else:
-            leaves = Leave.objects.filter(employee=user.employee, status_conge='approuve')
+        leaves = Leave.objects.visible_to(user).filter(status_conge=Leave.STATUS_VALIDE)
+        if employee_id and (user.is_staff or getattr(user, 'role', None) in ['admin', 'rh']):
+            leaves = leaves.filter(employee_id=employee_id)
 
         total_days = leaves.aggregate(total=Sum('duree_jours'))['total'] or 0
         return Response({'total_conges_approuves': total_days})
@@ -371,18 +347,82 @@ class LeaveBalanceView(views.APIView):
 
 # 11. Calendrier congés
 class LeaveCalendarView(generics.ListAPIView):
+    """
+    GET /api/leaves/calendar/?start=YYYY-MM-DD&end=YYYY-MM-DD[&status=valide,en_attente][&mode=occupation]
+
+    - sans mode : liste (paginée) des congés qui chevauchent la période
+    - mode=occupation : par département, jour -> ids des employés en congé
+    Par défaut la période est le mois en cours.
+    """
     serializer_class = LeaveSerializer
     permission_classes = [IsAuthenticated]
+    MAX_WINDOW_DAYS = 366
 
-    def get_queryset(self):
-        user = self.request.user
-        qs = Leave.objects.all()
-        if not (user.is_staff or getattr(user, 'role', None) in ['admin', 'rh']):
-            if getattr(user, 'role', None) == 'manager':
-                qs = qs.filter(employee__departement=user.employee.departement)
+    def get_window(self):
+        params = self.request.query_params
+        today = timezone.localdate()
+        try:
+            start = parse_date(params['start']) if params.get('start') else today.replace(day=1)
+            if params.get('end'):
+                end = parse_date(params['end'])
             else:
-                qs = qs.filter(employee=user.employee)
-        return qs.order_by('date_debut')
+                next_month = (today.replace(day=28) + timedelta(days=4)).replace(day=1)
+                end = next_month - timedelta(days=1)
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            raise ValidationError({'detail': "Dates invalides. Format attendu : YYYY-MM-DD."})
+        if start > end:
+            raise ValidationError({'detail': "La date de début doit précéder la date de fin."})
+        if (end - start).days >= self.MAX_WINDOW_DAYS:
+            raise ValidationError({'detail': f"Période limitée à {self.MAX_WINDOW_DAYS} jours."})
+        return start, end
+
+    def get_statuses(self, default=None):
+        statuses = self.request.query_params.get('status')
+        if statuses:
+            return [s for s in statuses.split(',') if s]
+        return default
+
+    def get_queryset(self):
+        start, end = self.get_window()
+        qs = Leave.objects.visible_to(self.request.user).overlapping(start, end)
+        statuses = self.get_statuses()
+        if statuses:
+            qs = qs.filter(status_conge__in=statuses)
+        return LeaveSerializer.optimize_queryset(qs.with_validators().order_by('date_debut'), self.request)
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('mode') != 'occupation':
+            return super().list(request, *args, **kwargs)
+
+        start, end = self.get_window()
+        # Les congés rejetés n'occupent pas le calendrier, sauf filtre explicite
+        statuses = self.get_statuses(default=[
+            Leave.STATUS_EN_ATTENTE, Leave.STATUS_VALIDE_MANAGER,
+            Leave.STATUS_EN_ATTENTE_RH, Leave.STATUS_VALIDE,
+        ])
+        rows = Leave.objects.visible_to(request.user).select_related(None).overlapping(start, end) \
+            .filter(status_conge__in=statuses) \
+            .values_list('employee_id', 'employee__departement_id', 'date_debut', 'date_fin')
+
+        # Un seul passage sur les lignes, chaque congé étant borné à la période demandée
+        occupation = defaultdict(lambda: defaultdict(set))
+        for employee_id, departement_id, date_debut, date_fin in rows:
+            day = max(date_debut, start)
+            last = min(date_fin, end)
+            while day <= last:
+                occupation[departement_id][day.isoformat()].add(employee_id)
+                day += timedelta(days=1)
+
+        return Response({
+            'start': start,
+            'end': end,
+            'departements': {
+                str(departement_id): {day: sorted(ids) for day, ids in sorted(days.items())}
+                for departement_id, days in occupation.items()
+            },
+        })
 
 class LeaveTypeListView(APIView):
     permission_classes = [IsAuthenticated]
@@ -399,26 +439,75 @@ class LeaveTypePublicView(APIView):
         return Response(types)
     
 # 12. Export CSV des congés (admin et rh)
+class Echo:
+    """Pseudo-buffer : csv.writer écrit une ligne, on la renvoie telle quelle"""
+
+    def write(self, value):
+        return value
+
+
 class LeaveExportView(views.APIView):
+    """
+    GET /api/leaves/export/?start=&end=&status=valide,rejete&type=annuel&departement=<id>
+    CSV envoyé au fil de l'eau : mémoire constante quel que soit le nombre de congés.
+    """
     permission_classes = [IsAuthenticated]
+    HEADER = [
+        'ID', 'Employé', 'Type de congé', 'Motif', 'Date début', 'Date fin', 'Durée (jours)',
+        'Statut', 'Commentaire Admin', 'Approuvé par', 'Date approbation', 'Créé le'
+    ]
 
     def get(self, request):
         user = request.user
         if not (user.is_staff or getattr(user, 'role', None) in ['admin', 'rh']):
             return Response({'detail': 'Permission refusée.'}, status=status.HTTP_403_FORBIDDEN)
 
-        leaves = Leave.objects.all().order_by('-created_at')
-        response = HttpResponse(content_type='text/csv')
+        try:
+            leaves = self.get_queryset(request.query_params)
+        except ValueError:
+            return Response({'detail': 'Filtres invalides.'}, status=status.HTTP_400_BAD_REQUEST)
+        writer = csv.writer(Echo())
+        rows = (writer.writerow(row) for row in self.iter_rows(leaves))
+        response = StreamingHttpResponse(rows, content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename="conges_export.csv"'
+        return response
 
-        writer = csv.writer(response)
-        writer.writerow([
-            'ID', 'Employé', 'Type de congé', 'Motif', 'Date début', 'Date fin', 'Durée (jours)',
-            'Statut', 'Commentaire Admin', 'Approuvé par', 'Date approbation', 'Créé le'
-        ])
-
-        for leave in leaves:
-            writer.writerow([
+    def get_queryset(self, params):
+        leaves = Leave.objects.select_related(
+            'employee', 'validated_by_manager', 'validated_by_rh', 'rejected_by'
+        ).without_face_encodings().order_by('-created_at')
+
+        start = self.parse_date_param(params, 'start')
+        end = self.parse_date_param(params, 'end')
+        if start and end:
+            leaves = leaves.overlapping(start, end)
+        elif start:
+            leaves = leaves.filter(date_fin__gte=start)
+        elif end:
+            leaves = leaves.filter(date_debut__lte=end)
+        if params.get('status'):
+            leaves = leaves.filter(status_conge__in=params['status'].split(','))
+        if params.get('type'):
+            leaves = leaves.filter(type_conge__in=params['type'].split(','))
+        if params.get('departement'):
+            leaves = leaves.filter(employee__departement_id=params['departement'])
+        return leaves
+
+    @staticmethod
+    def parse_date_param(params, name):
+        if not params.get(name):
+            return None
+        # parse_date : None si le format est faux, ValueError si la date n'existe pas
+        value = parse_date(params[name])
+        if value is None:
+            raise ValueError(name)
+        return value
+
+    def iter_rows(self, leaves):
+        yield self.HEADER
+        for leave in leaves.iterator(chunk_size=2000):
+            validateur = leave.approuve_par
+            yield [
                 leave.id,
                 str(leave.employee),
                 leave.get_type_conge_display(),
@@ -428,9 +517,7 @@ class LeaveExportView(views.APIView):
                 leave.duree_jours,
                 leave.get_status_conge_display(),
                 leave.commentaire_admin or '',
-                str(leave.approuve_par) if leave.approuve_par else '',
+                str(validateur) if validateur else '',
                 leave.date_approbation.strftime('%Y-%m-%d %H:%M:%S') if leave.date_approbation else '',
                 leave.created_at.strftime('%Y-%m-%d %H:%M:%S') if leave.created_at else '',
-            ])
-
-        return response
+            ]
@@ -0,0 +1,171 @@
+# leaves/workflow.py
+"""
+Workflow des demandes de congé.
+
+Les transitions autorisées sont déclarées dans TRANSITIONS. Les demandes encore dans le
+statut attendu sont verrouillées (SELECT ... FOR UPDATE) : une demande traitée entre-temps
+par quelqu'un d'autre échoue (409). Le solde est débité avant l'UPDATE, dans un savepoint :
+un refus n'écrit rien. Chaque transition réussie est historisée dans LeaveTransition puis
+signalée par `leave_transitioned` (effets de bord : notifications...).
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from authentication.permissions import resolve_visibility
+from leaves.ledger import deduct_for_leaves
+from leaves.models import Leave, LeaveTransition
+
+# Envoyé dans la transaction, après l'écriture des demandes traitées.
+# kwargs : leaves (liste), transition, actor, commentaire
+leave_transitioned = Signal()
+
+ACTIONS = ('valider', 'rejeter')
+
+
+class TransitionError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass(frozen=True)
+class Transition:
+    role: str                     # rôle de celui qui agit
+    action: str                   # 'valider' ou 'rejeter'
+    source: str                   # statut attendu en base
+    target: str
+    actor_field: str              # FK renseignée avec l'employé qui agit
+    erreur_statut: str            # message si la demande n'est pas dans `source`
+    demandeur_manager: Optional[bool] = None  # None : quel que soit le rôle du demandeur
+    debite_solde: bool = False
+    garde_commentaire: bool = False
+
+
+TRANSITIONS = [
+    # Manager : demandes de son département, en attente
+    Transition('manager', 'valider', Leave.STATUS_EN_ATTENTE, Leave.STATUS_EN_ATTENTE_RH,
+               'validated_by_manager', "Cette demande a déjà été traitée."),
+    Transition('manager', 'rejeter', Leave.STATUS_EN_ATTENTE, Leave.STATUS_REJETE,
+               'rejected_by', "Cette demande a déjà été traitée."),
+    # RH : directement pour un manager, après le manager pour les autres
+    Transition('rh', 'valider', Leave.STATUS_EN_ATTENTE, Leave.STATUS_VALIDE,
+               'validated_by_rh', "La demande n'est pas en attente.",
+               demandeur_manager=True, debite_solde=True),
+    Transition('rh', 'valider', Leave.STATUS_EN_ATTENTE_RH, Leave.STATUS_VALIDE,
+               'validated_by_rh', "La demande n'est pas encore validée par un manager.",
+               demandeur_manager=False, debite_solde=True),
+    Transition('rh', 'rejeter', Leave.STATUS_EN_ATTENTE, Leave.STATUS_REJETE,
+               'rejected_by', "La demande n'est pas en attente.",
+               demandeur_manager=True, garde_commentaire=True),
+    Transition('rh', 'rejeter', Leave.STATUS_EN_ATTENTE_RH, Leave.STATUS_REJETE,
+               'rejected_by', "La demande n'est pas encore validée par un manager.",
+               demandeur_manager=False, garde_commentaire=True),
+]
+
+
+def get_transition(leave, role, action, actor_id, departement_id=None):
+    """
+    Transition applicable à `leave` (chargé avec employee__auth_user) ou TransitionError
+    """
+    if action not in ACTIONS:
+        raise TransitionError("Action invalide. Utilisez 'valider' ou 'rejeter'.")
+    if leave.employee_id == actor_id:
+        raise TransitionError("Vous ne pouvez pas valider votre propre demande.")
+    if role == 'manager' and leave.employee.departement_id != departement_id:
+        raise TransitionError("Vous ne pouvez valider que les demandes de votre département.", 403)
+
+    auth_obj = getattr(leave.employee, 'auth_user', None)
+    if auth_obj is None:
+        raise TransitionError("Le rôle du demandeur est introuvable.")
+    demandeur_manager = auth_obj.role == 'manager'
+
+    for t in TRANSITIONS:
+        if t.role != role or t.action != action:
+            continue
+        if t.demandeur_manager is not None and t.demandeur_manager != demandeur_manager:
+            continue
+        if leave.status_conge != t.source:
+            raise TransitionError(t.erreur_statut)
+        return t
+    raise TransitionError("Action non autorisée pour votre rôle.", 403)
+
+
+def apply(leaves, actor, action, commentaire=''):
+    """
+    Appliquer `action` aux demandes (chargées avec employee__auth_user) au nom de `actor`.
+    Retourne {leave_id: None si traitée, sinon la TransitionError correspondante}.
+    """
+    role = getattr(actor, 'role', None)
+    _scope, departement_id = resolve_visibility(actor)
+    results = {}
+    groups = defaultdict(list)
+    for leave in leaves:
+        try:
+            groups[get_transition(leave, role, action, actor.employee_id, departement_id)].append(leave)
+        except TransitionError as e:
+            results[leave.pk] = e
+
+    with transaction.atomic():
+        for t, group in groups.items():
+            done = _execute(t, group, actor.employee_id, commentaire, results)
+            if not done:
+                continue
+            LeaveTransition.objects.bulk_create([
+                LeaveTransition(
+                    leave=leave, source=t.source, target=t.target, action=t.action,
+                    actor_id=actor.employee_id, commentaire=commentaire,
+                )
+                for leave in done
+            ])
+            leave_transitioned.send(
+                sender=Leave, leaves=done, transition=t, actor=actor, commentaire=commentaire
+            )
+            for leave in done:
+                results[leave.pk] = None
+    return results
+
+
+def _execute(t, group, actor_id, commentaire, results):
+    """
+    Verrouiller les demandes encore dans `t.source`, débiter le solde puis les passer dans
+    `t.target` ; retourne les demandes effectivement modifiées
+    """
+    now = timezone.now()
+    values = {'status_conge': t.target, t.actor_field + '_id': actor_id, 'updated_at': now}
+    if t.target == Leave.STATUS_VALIDE:
+        values['date_approbation'] = now
+    if t.garde_commentaire:
+        values['commentaire_admin'] = commentaire
+
+    with transaction.atomic():
+        locked = set(
+            Leave.objects.select_for_update()
+            .filter(pk__in=[leave.pk for leave in group], status_conge=t.source)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        for leave in group:
+            if leave.pk not in locked:
+                results[leave.pk] = TransitionError(
+                    "Cette demande vient d'être traitée par quelqu'un d'autre.", 409
+                )
+        group = [leave for leave in group if leave.pk in locked]
+
+        if t.debite_solde:
+            refused = deduct_for_leaves([leave for leave in group if leave.type_conge == 'annuel'])
+            for pk in refused:
+                results[pk] = TransitionError("Solde de congé annuel insuffisant.")
+            group = [leave for leave in group if leave.pk not in refused]
+
+        if group:
+            Leave.objects.filter(pk__in=[leave.pk for leave in group]).update(**values)
+
+    for leave in group:
+        for field, value in values.items():
+            setattr(leave, field, value)
+        leave._loaded_status = t.target
+    return group
@@ -1,6 +1,35 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+def should_warm_up() -> bool:
+    """
+    Préchauffage dans ready() : seulement dans le processus qui sert runserver
+    (WARM_UP_ON_READY), ou si FACE_WARM_UP=1 est posé explicitement pour ce processus.
+    Jamais pour celery, les tests, django-admin ou les autres commandes. Avec gunicorn,
+    ready() s'exécute dans le maître sous --preload (avant le fork) : utiliser le hook
+    post_worker_init de utils.face_recognition_utils dans gunicorn.conf.py.
+    """
+    if os.environ.get('FACE_WARM_UP') == '1':
+        return True
+    if not settings.FACE_RECOGNITION_SETTINGS.get('WARM_UP_ON_READY'):
+        return False
+    if sys.argv[1:2] != ['runserver']:
+        return False
+    # Avec l'autoreloader, seul le processus enfant (RUN_MAIN) sert les requêtes
+    return '--noreload' in sys.argv or os.environ.get('RUN_MAIN') == 'true'
 
 
 class PointageConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pointage"
+
+    def ready(self):
+        # Préchauffage du moteur facial au démarrage (opt-in, voir should_warm_up)
+        if not should_warm_up():
+            return
+        from utils.face_recognition_utils import warm_up
+        warm_up()
@@ -1,8 +1,9 @@
 # pointage/serializers.py
 from rest_framework import serializers
 from .models import Pointage
+from utils.serializers import SparseFieldsetMixin
 
-class PointageSerializer(serializers.ModelSerializer):
+class PointageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     heure_entree_str = serializers.SerializerMethodField()
     heure_sortie_str = serializers.SerializerMethodField()
     temps_travaille_str = serializers.SerializerMethodField()
@@ -11,6 +12,11 @@ class PointageSerializer(serializers.ModelSerializer):
         model = Pointage
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at', 'temps_travaille', 'heures_supplementaires', 'retard']
+        field_dependencies = {
+            'heure_entree_str': ['heure_entree'],
+            'heure_sortie_str': ['heure_sortie'],
+            'temps_travaille_str': ['temps_travaille'],
+        }
 
     def get_heure_entree_str(self, obj):
         return obj.heure_entree.strftime('%H:%M') if obj.heure_entree else None
@@ -3,7 +3,9 @@ from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.conf import settings
 from django.utils import timezone
+from PIL import Image
 from datetime import datetime, timedelta, time, date
 from django.db.models import Q
 from .models import Pointage
@@ -11,17 +13,54 @@ from .serializers import PointageSerializer
 from employees.models import Employee
 from leaves.models import Leave
 from authentication.permissions import IsRHOrAdmin  # custom permission
+from utils.pagination import PaginatedAPIViewMixin
+from utils.face_recognition_utils import face_recognition_handler
 import logging
 from datetime import date
 from django.core.mail import send_mail
 
 logger = logging.getLogger(__name__)
 
+
+def verify_face_response(request):
+    """
+    Vérification 1:1 du visage de l'employé connecté (champ 'image' : fichier ou base64).
+    Retourne une Response d'erreur, ou None si le pointage peut continuer.
+    """
+    image = request.FILES.get('image') or request.data.get('image')
+    if not image:
+        if settings.ATTENDANCE_SETTINGS.get('REQUIRE_FACE_VERIFICATION'):
+            return Response({'detail': 'Image du visage requise.'}, status=400)
+        return None
+
+    if hasattr(image, 'read'):
+        try:
+            image = Image.open(image).convert('RGB')
+        except Exception:
+            return Response({'detail': "Format d'image non supporté"}, status=400)
+
+    result = face_recognition_handler.verify_face(request.user.employee_id, image)
+    if result.get('reason'):
+        return Response({'detail': result['message'], 'motif': result['reason']}, status=400)
+    if not result['match']:
+        # La distance reste côté serveur : elle guiderait un essai d'images jusqu'au seuil
+        logger.warning(
+            f"Pointage refusé pour l'employé {request.user.employee_id}: {result['message']} "
+            f"(distance: {result['distance']})"
+        )
+        return Response({'detail': result['message']}, status=403)
+    return None
+
+
 class FacialCheckInView(APIView):
     serializer_class = PointageSerializer
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        error = verify_face_response(request)
+        if error:
+            return error
+
         employee = request.user.employee
         now = timezone.now()
         heure_entree = now.time()
@@ -42,7 +81,7 @@ class FacialCheckInView(APIView):
             pointage.retard = datetime.combine(today, heure_entree) - datetime.combine(today, heure_limite)
         else:
             pointage.status = 'present'
-        pointage.save()
+        pointage.save()  # tableau de bord du jour invalidé par departments/signals.py
         return Response({'detail': 'Entrée enregistrée', 'status': pointage.status})
 
 class FacialCheckOutView(APIView):
@@ -50,6 +89,10 @@ class FacialCheckOutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        error = verify_face_response(request)
+        if error:
+            return error
+
         employee = request.user.employee
         now = timezone.now()
         today = now.date()
@@ -72,7 +115,8 @@ class PointageListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Pointage.objects.filter(employee=self.request.user.employee)
+        queryset = Pointage.objects.filter(employee_id=self.request.user.employee_id)
+        return PointageSerializer.optimize_queryset(queryset, self.request)
 
 class PointageTodayView(generics.RetrieveAPIView):
     serializer_class = PointageSerializer
@@ -83,9 +127,11 @@ class PointageTodayView(generics.RetrieveAPIView):
 
 class AdminPointageListView(generics.ListAPIView):
     serializer_class = PointageSerializer
-    queryset = Pointage.objects.all()
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        return PointageSerializer.optimize_queryset(Pointage.objects.all(), self.request)
+
 class AdminPointageStatsView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -114,7 +160,7 @@ class AdminPointageReportsView(generics.ListAPIView):
         queryset = Pointage.objects.all()
         if start and end:
             queryset = queryset.filter(date__range=[start, end])
-        return queryset
+        return PointageSerializer.optimize_queryset(queryset, self.request)
 
 class AdminEmployeeAttendanceView(generics.ListAPIView):
     serializer_class = PointageSerializer
@@ -122,10 +168,14 @@ class AdminEmployeeAttendanceView(generics.ListAPIView):
 
     def get_queryset(self):
         employee_id = self.kwargs['employee_id']
-        return Pointage.objects.filter(employee_id=employee_id)
+        return PointageSerializer.optimize_queryset(Pointage.objects.filter(employee_id=employee_id), self.request)
 
-class AdminPointageNotificationsView(APIView):
+class AdminPointageNotificationsView(PaginatedAPIViewMixin, APIView):
+    """
+    Absents du jour paginés (?page= / ?cursor= / ?count=false) ; retards du jour en entier
+    """
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('id',)
 
     def get(self, request):
         today = date.today()  # ou timezone.now().date() si tu veux gérer les fuseaux horaires
@@ -144,16 +194,19 @@ class AdminPointageNotificationsView(APIView):
         # Absents = employés actifs non présents ET pas en congé validé
         absents = Employee.objects.filter(is_active=True) \
             .exclude(id__in=present_ids) \
-            .exclude(id__in=conges_valide_ids)
+            .exclude(id__in=conges_valide_ids) \
+            .order_by('id') \
+            .values('id', 'nom')
 
-        # Retards = pointages avec status retard aujourd’hui
-        retards = Pointage.objects.filter(date=today, status='retard')
+        # Retards = pointages avec status retard aujourd’hui (une seule requête)
+        retards = Pointage.objects.filter(date=today, status='retard') \
+            .values_list('employee_id', 'employee__nom', 'heure_entree')
 
-        return Response({
-            'date': today,
-            'absents': [{'id': e.id, 'nom': e.nom} for e in absents],
-            'retards': [{'id': p.employee.id, 'nom': p.employee.nom, 'heure_entree': p.heure_entree} for p in retards]
-        })
+        return Response(self.get_paginated_data(
+            'absents', list(self.paginate_queryset(absents)),
+            date=today,
+            retards=[{'id': pk, 'nom': nom, 'heure_entree': heure} for pk, nom, heure in retards],
+        ))
 
 class ManagerDepartmentPointagesView(APIView):
     permission_classes = [IsAuthenticated]
@@ -21,6 +21,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # pg_trgm : recherche d'employés
     
     # Third party apps
     'rest_framework',
@@ -46,6 +47,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'utils.metrics.ServerTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'systeme_pointage.urls'
@@ -151,7 +153,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-         'rest_framework_simplejwt.authentication.JWTAuthentication',
+         'authentication.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -204,6 +206,16 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Authentification par claims JWT (sans requête utilisateur à chaque appel)
+JWT_CLAIMS_AUTHENTICATION = {
+    # True = utilisateur construit depuis les claims du token, sans chargement de l'utilisateur.
+    # STATE_CACHE doit être partagé entre workers : avec LocMemCache, une désactivation ou un
+    # changement de rôle ne serait vu que par le worker qui l'a enregistré.
+    'ENABLED': True,
+    'STATE_CACHE': 'shared',  # Alias CACHES du cache de révocation (invalidé par les signaux)
+    'STATE_CACHE_TTL': 60,  # Secondes avant de revérifier un compte (désactivation, rôle)
+}
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # React dev server
@@ -233,11 +245,36 @@ CORS_ALLOWED_HEADERS = [
 # Face Recognition Settings
 FACE_RECOGNITION_SETTINGS = {
     'ENCODINGS_FILE': os.path.join(MEDIA_ROOT, 'face_encodings.pkl'),
-    'TOLERANCE': 800.0,  # Seuil pour MediaPipe (distance euclidienne)
+    'TOLERANCE': 0.5,  # Distance euclidienne entre embeddings alignés (unité : écart entre les yeux)
     'MAX_IMAGE_SIZE': 800,  # Taille maximale de l'image en pixels
     'MIN_FACE_SIZE': 100,   # Taille minimale du visage détecté
     'DETECTION_CONFIDENCE': 0.5,  # Confiance minimale pour la détection
     'RECOGNITION_CONFIDENCE': 0.7,  # Confiance minimale pour la reconnaissance
+    'MAX_TEMPLATES': 5,  # Modèles conservés par employé (les moins utilisés puis les plus anciens sont évincés)
+    'AUTO_TEMPLATE_RANGE': None,  # (min, max) : distance d'une reconnaissance qui ajoute l'image comme modèle, ex. (0.2, 0.35)
+    # Utilisations des modèles (éviction) : cache partagé entre workers, alimenté toutes les N secondes
+    'TEMPLATE_HITS_CACHE': 'shared',
+    'TEMPLATE_HITS_FLUSH_INTERVAL': 60,
+    # Construire MediaPipe et faire une inférence à vide au démarrage de runserver (pointage.apps ;
+    # FACE_WARM_UP=1 pour un autre processus). Avec gunicorn, jamais dans ready() (exécuté dans
+    # le maître sous --preload) : post_worker_init de utils.face_recognition_utils dans gunicorn.conf.py
+    'WARM_UP_ON_READY': False,
+    'RECOGNITION_CACHE_TTL': 10,  # Secondes de cache d'un résultat d'identification (0 : désactivé)
+    'RECOGNITION_CACHE': 'shared',  # Alias de CACHES : partagé entre workers (LocMemCache : un cache par processus)
+    # Contrôle qualité avant FaceMesh (image réduite à SIZE px) : netteté, exposition, visage unique
+    'QUALITY_GATE': {
+        'ENABLED': True,
+        'SIZE': 160,
+        'MIN_SHARPNESS': 50.0,     # Variance minimale du laplacien
+        'DARK_LEVEL': 40,          # Niveaux de gris considérés comme sombres (< DARK_LEVEL)
+        'BRIGHT_LEVEL': 220,       # ... et comme surexposés (>= BRIGHT_LEVEL)
+        'MAX_CLIPPED_RATIO': 0.6,  # Part maximale de pixels sombres ou surexposés
+    },
+    # Index des encodages (utils/face_index.py) : ExactIndex, ou IVFIndex pour les grandes populations
+    'INDEX': {
+        'BACKEND': 'utils.face_index.IVFIndex',
+        'OPTIONS': {'nprobe': 8, 'min_train_size': 1000},
+    },
 }
 
 # Seuil de reconnaissance faciale (pour compatibilité)
@@ -257,6 +294,33 @@ ATTENDANCE_SETTINGS = {
     'OVERTIME_THRESHOLD_MINUTES': 30,  # Minutes supplémentaires pour overtime
     'MAX_DAILY_HOURS': 10,       # Heures maximales par jour
     'WEEKEND_DAYS': [5, 6],      # Samedi et Dimanche (0=Lundi)
+    'DASHBOARD_CACHE_TTL': 300,  # Secondes de cache du tableau de bord (vidé à chaque pointage d'entrée)
+    'DASHBOARD_CACHE': 'shared',  # Alias CACHES : partagé entre workers pour que l'invalidation soit vue partout
+    'REQUIRE_FACE_VERIFICATION': False,  # Pointage refusé sans image du visage de l'employé connecté
+}
+
+# Métriques (GET /metrics, format Prometheus)
+METRICS_SETTINGS = {
+    'TOKEN': os.environ.get('METRICS_TOKEN'),  # Authorization: Bearer <token> exigé ; sans token, /metrics est refusé
+    'SERVER_TIMING': DEBUG,  # Durées des étapes du pipeline facial dans l'en-tête Server-Timing
+}
+
+# Configuration des congés
+LEAVE_SETTINGS = {
+    'STATS_CACHE_TTL': 30,  # Secondes de cache pour /api/leaves/stats/
+    'ANNUAL_ACCRUAL_DAYS': 30,  # Jours crédités par `manage.py accrue_annual_leave`
+    'MAX_ABSENCE_RATIO': 0.5,  # Part maximale d'un département absente le même jour
+    # Justificatifs : stockage (LocalBlobStorage ou S3BlobStorage, ex. MinIO en local)
+    'DOCUMENT_STORAGE': {
+        'BACKEND': 'leaves.storage.LocalBlobStorage',
+        'OPTIONS': {},
+        # 'BACKEND': 'leaves.storage.S3BlobStorage',
+        # 'OPTIONS': {'bucket': 'justificatifs', 'endpoint_url': 'http://localhost:9000',
+        #             'access_key': 'minioadmin', 'secret_key': 'minioadmin'},
+    },
+    'DOCUMENT_SPOOL_DIR': os.path.join(MEDIA_ROOT, 'leave_documents_spool'),
+    'DOCUMENT_MAX_SIZE': 10 * 1024 * 1024,  # 10 Mo
+    'DOCUMENT_THUMBNAIL_SIZE': 256,  # Côté max de la miniature en pixels
 }
 
 # Configuration de géolocalisation (optionnel)
@@ -364,7 +428,13 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # Cache commun à tous les workers (entrées invalidées explicitement, ex. tableau de bord).
+    # Table créée par la migration departments 0004 (createcachetable) ; Redis/Memcached possibles en production.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'shared_cache',
+    },
 }
 
 # Configuration de session
@@ -4,6 +4,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from utils.metrics import metrics_view
 
 urlpatterns = [
     # Administration Django
@@ -19,6 +20,9 @@ urlpatterns = [
     path('api/pointage/', include('pointage.urls')),
     path('api/leaves/', include('leaves.urls')),
     path('api/departments/', include('departments.urls')),
+
+    # Métriques Prometheus
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Servir les fichiers média en développement
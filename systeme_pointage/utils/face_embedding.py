@@ -0,0 +1,99 @@
+# utils/face_embedding.py
+"""
+Embedding compact calculé à partir des landmarks FaceMesh.
+
+Les coordonnées brutes (478 points x/y/z) dépendent de la position, de la taille et de
+l'orientation du visage dans l'image. On les exprime dans un repère lié au visage :
+origine au milieu des yeux, axe x vers le coin externe de l'autre œil, axe y vers le bout
+du nez, unité = distance entre les yeux. On ne garde ensuite qu'un sous-ensemble de points
+stables (sourcils, yeux, iris, nez, bouche, contour) : EMBEDDING_DIM valeurs en float16.
+
+Les distances entre embeddings sont ainsi comparables d'une image à l'autre (TOLERANCE
+s'exprime en distances inter-oculaires) et ~12 fois moins coûteuses à calculer et à stocker.
+
+Module sans dépendance à MediaPipe/OpenCV.
+"""
+from typing import Optional
+
+import numpy as np
+
+# Ancres du repère (indices FaceMesh)
+LEFT_EYE_OUTER = 33
+RIGHT_EYE_OUTER = 263
+NOSE_TIP = 1
+
+LANDMARK_SUBSET = (
+    # Sourcils
+    70, 105, 107, 300, 334, 336,
+    # Yeux (coin interne, paupières) et centres des iris (refine_landmarks)
+    133, 159, 145, 362, 386, 374, 468, 473,
+    # Nez
+    168, 6, 197, 4, 2, 98, 327,
+    # Bouche
+    61, 291, 0, 17, 13, 14,
+    # Contour du visage
+    10, 152, 234, 454, 172, 397, 58, 288, 136, 365, 109, 338, 67, 297,
+)
+NUM_LANDMARKS = 478
+EMBEDDING_DIM = len(LANDMARK_SUBSET) * 3
+EMBEDDING_DTYPE = np.float16
+
+
+def align_landmarks(points: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Exprimer des points (N, 3) en pixels dans le repère du visage
+    """
+    left = points[LEFT_EYE_OUTER]
+    right = points[RIGHT_EYE_OUTER]
+    center = (left + right) / 2
+
+    x_axis = right - left
+    scale = np.linalg.norm(x_axis)
+    if scale < 1e-6:
+        return None
+    x_axis = x_axis / scale
+
+    y_axis = points[NOSE_TIP] - center
+    y_axis = y_axis - y_axis.dot(x_axis) * x_axis
+    norm = np.linalg.norm(y_axis)
+    if norm < 1e-6:
+        return None
+    y_axis = y_axis / norm
+
+    basis = np.stack([x_axis, y_axis, np.cross(x_axis, y_axis)])
+    return (points - center) @ basis.T / scale
+
+
+def embed_points(points: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Points FaceMesh (478, 3) en pixels -> embedding compact
+    """
+    if points.shape != (NUM_LANDMARKS, 3):
+        return None
+    aligned = align_landmarks(points.astype(np.float64))
+    if aligned is None:
+        return None
+    return aligned[list(LANDMARK_SUBSET)].ravel().astype(EMBEDDING_DTYPE)
+
+
+def embed_landmarks(face_landmarks, width: int, height: int) -> Optional[np.ndarray]:
+    """
+    Résultat FaceMesh (coordonnées normalisées) -> embedding compact.
+    z est à la même échelle que x dans MediaPipe.
+    """
+    points = np.array(
+        [(lm.x * width, lm.y * height, lm.z * width) for lm in face_landmarks.landmark]
+    )
+    return embed_points(points)
+
+
+def is_compact(encoding) -> bool:
+    return encoding is not None and len(encoding) == EMBEDDING_DIM
+
+
+def distances(matrix: np.ndarray, probe: np.ndarray) -> np.ndarray:
+    """
+    Distances euclidiennes entre `probe` et chaque ligne de `matrix` (calcul en float32)
+    """
+    diff = matrix.astype(np.float32) - probe.astype(np.float32)
+    return np.sqrt(np.einsum('ij,ij->i', diff, diff))
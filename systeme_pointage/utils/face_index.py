@@ -0,0 +1,310 @@
+# utils/face_index.py
+"""
+Index des embeddings faciaux enregistrés.
+
+Le backend est choisi par FACE_RECOGNITION_SETTINGS['INDEX'] :
+    {'BACKEND': 'utils.face_index.IVFIndex', 'OPTIONS': {'nprobe': 8}}
+
+Tous les backends stockent les vecteurs dans une matrice contiguë (float16) avec, pour
+chaque ligne, l'id de l'employé (`labels`). Un employé peut avoir plusieurs lignes : la
+recherche retourne la distance minimale par employé.
+
+- ExactIndex : distance à toutes les lignes (O(N·d)), adapté à quelques milliers d'employés.
+- IVFIndex : quantificateur grossier k-means ; seules les lignes des `nprobe` cellules les
+  plus proches de la sonde sont comparées, avec la distance exacte. En dessous de
+  `min_train_size` lignes l'index n'est pas entraîné et se comporte comme ExactIndex.
+
+L'index est dérivé du fichier des encodages et persisté à côté (save/load) ; `version`
+identifie l'état du fichier des encodages dont il provient.
+"""
+import copy
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from utils.face_embedding import EMBEDDING_DIM, EMBEDDING_DTYPE, distances
+
+DEFAULT_BACKEND = 'utils.face_index.ExactIndex'
+
+
+class FaceIndex:
+    """
+    Base des index : matrice contiguë + labels, recherche du minimum par employé
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self.vectors = np.empty((0, dim), dtype=EMBEDDING_DTYPE)
+        self.labels = np.empty(0, dtype=np.int64)
+        self.version = 0
+        self._rows_by_label = None
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def backend(self):
+        return f"{type(self).__module__}.{type(self).__qualname__}"
+
+    def build(self, labels, vectors):
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.vectors = np.asarray(vectors, dtype=EMBEDDING_DTYPE).reshape(-1, self.dim)
+        self._rows_by_label = None
+        self._on_build()
+
+    def add(self, label, vectors):
+        vectors = np.asarray(vectors, dtype=EMBEDDING_DTYPE).reshape(-1, self.dim)
+        start = len(self.labels)
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.labels = np.concatenate([self.labels, np.full(len(vectors), label, dtype=np.int64)])
+        self._rows_by_label = None
+        self._on_add(start)
+
+    def copy(self) -> 'FaceIndex':
+        """
+        Copie à modifier puis substituer à l'index partagé : add/remove/train réaffectent les
+        tableaux sans les modifier sur place, l'original reste cohérent pour les recherches en cours
+        """
+        return copy.copy(self)
+
+    def remove(self, label):
+        keep = self.labels != label
+        if keep.all():
+            return
+        self.vectors = self.vectors[keep]
+        self.labels = self.labels[keep]
+        self._rows_by_label = None
+        self._on_remove(keep)
+
+    def templates(self, label) -> np.ndarray:
+        """
+        Vecteurs enregistrés pour un employé (vérification 1:1)
+        """
+        if self._rows_by_label is None:
+            # Une passe sur les labels, puis accès direct tant que l'index ne change pas
+            order = np.argsort(self.labels, kind='stable')
+            unique, starts = np.unique(self.labels[order], return_index=True)
+            ends = np.append(starts[1:], len(order))
+            self._rows_by_label = {
+                int(label): order[start:end] for label, start, end in zip(unique, starts, ends)
+            }
+        rows = self._rows_by_label.get(int(label))
+        return self.vectors[rows] if rows is not None else self.vectors[:0]
+
+    def search(self, probe, k=1) -> List[Tuple[int, float]]:
+        """
+        Les k employés les plus proches : [(employee_id, distance), ...] par distance croissante
+        """
+        if not len(self.labels):
+            return []
+        probe = np.asarray(probe, dtype=np.float32).ravel()
+        rows = self._candidates(probe)
+        labels = self.labels if rows is None else self.labels[rows]
+        if not len(labels):
+            return []
+        candidate_distances = distances(self.vectors if rows is None else self.vectors[rows], probe)
+        return _best_per_label(labels, candidate_distances, k)
+
+    # Points d'extension des sous-classes
+
+    def _on_build(self):
+        pass
+
+    def _on_add(self, start):
+        pass
+
+    def _on_remove(self, keep):
+        pass
+
+    def _candidates(self, probe) -> Optional[np.ndarray]:
+        """Lignes à comparer ; None pour toutes"""
+        return None
+
+    # Persistance
+
+    def _state(self):
+        return {}
+
+    def _load_state(self, data):
+        pass
+
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f, backend=np.array(self.backend), version=np.array(self.version, dtype=np.int64),
+                labels=self.labels, vectors=self.vectors, **self._state()
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_file(cls, path, **options):
+        index = cls(**options)
+        with np.load(path, allow_pickle=False) as data:
+            if str(data['backend']) != index.backend or data['vectors'].shape[1] != index.dim:
+                return None
+            index.version = int(data['version'])
+            index.labels = data['labels']
+            index.vectors = data['vectors']
+            index._load_state(data)
+        return index
+
+
+class ExactIndex(FaceIndex):
+    """Recherche exhaustive vectorisée"""
+
+    def __init__(self, dim=EMBEDDING_DIM, **options):
+        # Options des autres backends (nprobe...) ignorées : on peut changer BACKEND seul
+        super().__init__(dim)
+
+
+class IVFIndex(FaceIndex):
+    """
+    Inverted file : k-means sur les vecteurs, chaque ligne rangée dans la cellule de son
+    centroïde. La recherche compare la sonde aux centroïdes puis aux seules lignes des
+    `nprobe` cellules les plus proches (distance exacte sur les vecteurs complets).
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM, nlist=None, nprobe=8, min_train_size=1000,
+                 retrain_factor=4, iterations=10):
+        super().__init__(dim)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_factor = retrain_factor
+        self.iterations = iterations
+        self.centroids = None
+        self.assign = np.empty(0, dtype=np.int32)
+        self.trained_size = 0
+        self._lists = None
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def train(self):
+        """
+        (Ré)entraîner le quantificateur sur les vecteurs courants
+        """
+        if len(self.labels) < self.min_train_size:
+            self.centroids = None
+            self.assign = np.empty(0, dtype=np.int32)
+            self.trained_size = 0
+        else:
+            nlist = min(self.nlist or int(np.sqrt(len(self.labels))), len(self.labels))
+            self.centroids = _kmeans(self.vectors, nlist, self.iterations)
+            self.assign = _nearest(self.vectors, self.centroids)
+            self.trained_size = len(self.labels)
+        self._lists = None
+
+    def _on_build(self):
+        self.train()
+
+    def _on_add(self, start):
+        if not self.is_trained:
+            if len(self.labels) >= self.min_train_size:
+                self.train()
+            return
+        if len(self.labels) >= self.retrain_factor * self.trained_size:
+            self.train()
+            return
+        self.assign = np.concatenate([self.assign, _nearest(self.vectors[start:], self.centroids)])
+        self._lists = None
+
+    def _on_remove(self, keep):
+        if self.is_trained:
+            self.assign = self.assign[keep]
+            self._lists = None
+
+    def _inverted_lists(self):
+        # Lignes triées par cellule + bornes de chaque cellule, recalculées après modification
+        if self._lists is None:
+            order = np.argsort(self.assign, kind='stable')
+            bounds = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, bounds)
+        return self._lists
+
+    def _candidates(self, probe):
+        if not self.is_trained:
+            return None
+        nprobe = min(self.nprobe, len(self.centroids))
+        cells = np.argpartition(distances(self.centroids, probe), nprobe - 1)[:nprobe]
+        order, bounds = self._inverted_lists()
+        return np.concatenate([order[bounds[c]:bounds[c + 1]] for c in cells])
+
+    def _state(self):
+        if not self.is_trained:
+            return {}
+        return {'centroids': self.centroids, 'assign': self.assign,
+                'trained_size': np.array(self.trained_size)}
+
+    def _load_state(self, data):
+        if 'centroids' in data:
+            self.centroids = data['centroids']
+            self.assign = data['assign']
+            self.trained_size = int(data['trained_size'])
+
+
+def _best_per_label(labels, label_distances, k):
+    # Tri par (label, distance) : la première ligne de chaque label est son minimum
+    order = np.lexsort((label_distances, labels))
+    sorted_labels = labels[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_labels[1:] != sorted_labels[:-1]
+    best_labels = sorted_labels[first]
+    best_distances = label_distances[order][first]
+    top = np.argsort(best_distances)[:k]
+    return [(int(best_labels[i]), float(best_distances[i])) for i in top]
+
+
+def _nearest(vectors, centroids):
+    data = vectors.astype(np.float32)
+    # ||x - c||² = ||x||² - 2 x·c + ||c||² ; ||x||² ne change pas l'argmin
+    scores = (centroids ** 2).sum(axis=1) - 2 * data @ centroids.T
+    return scores.argmin(axis=1).astype(np.int32)
+
+
+def _kmeans(vectors, k, iterations, sample_size=64, seed=0):
+    rng = np.random.default_rng(seed)
+    data = vectors.astype(np.float32)
+    if len(data) > k * sample_size:
+        data = data[rng.choice(len(data), k * sample_size, replace=False)]
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=k)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+def _index_config():
+    return settings.FACE_RECOGNITION_SETTINGS.get('INDEX', {})
+
+
+def create_index() -> FaceIndex:
+    """
+    Index vide du backend configuré
+    """
+    config = _index_config()
+    backend = import_string(config.get('BACKEND', DEFAULT_BACKEND))
+    return backend(**config.get('OPTIONS', {}))
+
+
+def load_index(path) -> Optional[FaceIndex]:
+    """
+    Index persisté, ou None s'il est absent ou construit avec un autre backend
+    """
+    if not os.path.exists(path):
+        return None
+    config = _index_config()
+    backend = import_string(config.get('BACKEND', DEFAULT_BACKEND))
+    try:
+        return backend.from_file(path, **config.get('OPTIONS', {}))
+    except (OSError, KeyError, ValueError):
+        return None
@@ -1,24 +1,111 @@
 # utils/face_recognition_utils.py
-import cv2
+# OpenCV et MediaPipe sont importés à la première utilisation du moteur (voir get_face_recognition_handler)
 import numpy as np
-import mediapipe as mp
 from PIL import Image
 import pickle
 import os
 import logging
+import time
+import hashlib
+import threading
+from collections import Counter
+from contextlib import contextmanager
 from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
 from typing import Optional, List, Tuple, Dict
 import base64
 from io import BytesIO
 
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité au processus
+    fcntl = None
+
+from utils import metrics
+from utils.face_embedding import EMBEDDING_DTYPE, distances, embed_landmarks, is_compact
+from utils.face_index import FaceIndex, create_index, load_index
+
 logger = logging.getLogger(__name__)
 
+# Enregistrés à l'import (comme metrics.stage_seconds) : présents dans /metrics avant la
+# construction du moteur facial
+gate_counts = metrics.counter(
+    'face_quality_gate_total', "Images acceptées ou rejetées par le contrôle qualité", 'result'
+)
+cache_counts = metrics.counter(
+    'face_recognition_cache_total', "Succès et échecs du cache d'identification", 'result'
+)
+
+
+def new_template(encoding, added_at=None) -> Dict:
+    if is_compact(encoding):
+        encoding = np.asarray(encoding, dtype=EMBEDDING_DTYPE)
+    return {'encoding': encoding, 'added_at': time.time() if added_at is None else added_at, 'hits': 0}
+
+
+def _result(employee_id, distance, message, reason=None) -> Dict:
+    return {'employee_id': employee_id, 'distance': distance, 'reason': reason, 'message': message}
+
+
+def _content_hash(image_data) -> Optional[str]:
+    """
+    Empreinte du contenu envoyé (base64, octets, image PIL ou array) ; None pour un chemin de fichier
+    """
+    if isinstance(image_data, str):
+        if len(image_data) < 4096 and os.path.exists(image_data):
+            return None
+        data = image_data.encode()
+    elif isinstance(image_data, (bytes, bytearray)):
+        data = bytes(image_data)
+    elif isinstance(image_data, Image.Image):
+        data = f"{image_data.mode}{image_data.size}".encode() + image_data.tobytes()
+    elif isinstance(image_data, np.ndarray):
+        data = f"{image_data.dtype}{image_data.shape}".encode() + image_data.tobytes()
+    else:
+        return None
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _encoding_hash(face_encoding: np.ndarray) -> str:
+    # Arrondi : deux encodages quasi identiques (même image réencodée) ont la même empreinte
+    rounded = np.round(face_encoding.astype(np.float32), 2).astype(EMBEDDING_DTYPE)
+    return hashlib.blake2b(rounded.tobytes(), digest_size=16).hexdigest()
+
+
+def _template_digest(encoding) -> str:
+    # Identifie un modèle par son contenu, quelle que soit sa position dans le fichier
+    return hashlib.blake2b(np.asarray(encoding, dtype=EMBEDDING_DTYPE).tobytes(), digest_size=8).hexdigest()
+
+
+def face_templates(value) -> List[Dict]:
+    """
+    Modèles d'un employé dans le fichier des encodages : [{'encoding', 'added_at', 'hits'}, ...]
+    (ancien format : un encodage seul)
+    """
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        return value
+    return [new_template(value, added_at=0)]
+
+
+# Motifs de rejet du contrôle qualité (avant FaceMesh)
+GATE_MESSAGES = {
+    'flou': 'Image floue, veuillez rester immobile',
+    'sous_expose': 'Image trop sombre',
+    'sur_expose': 'Image surexposée',
+    'aucun_visage': 'Aucun visage détecté',
+    'plusieurs_visages': 'Plusieurs visages détectés. Une seule personne doit être présente.',
+}
+
+
 class FaceRecognitionHandler:
     """
     Gestionnaire de reconnaissance faciale utilisant MediaPipe
     """
     
     def __init__(self):
+        import mediapipe as mp
+
         self.mp_face_detection = mp.solutions.face_detection
         self.mp_face_mesh = mp.solutions.face_mesh
         self.mp_drawing = mp.solutions.drawing_utils
@@ -36,6 +123,28 @@ class FaceRecognitionHandler:
         
         self.encodings_file = settings.FACE_RECOGNITION_SETTINGS['ENCODINGS_FILE']
         self.tolerance = settings.FACE_RECOGNITION_SETTINGS['TOLERANCE']
+        # Index dérivé du fichier des encodages, persisté à côté (utils/face_index.py)
+        self.index_file = os.path.splitext(self.encodings_file)[0] + '.index.npz'
+        self._index = None
+        # Plusieurs modèles par employé (lunettes, éclairage...), évincés au-delà de MAX_TEMPLATES
+        self.max_templates = settings.FACE_RECOGNITION_SETTINGS.get('MAX_TEMPLATES', 5)
+        self.auto_template_range = settings.FACE_RECOGNITION_SETTINGS.get('AUTO_TEMPLATE_RANGE')
+        # Utilisations des modèles : {(employee_id, empreinte du modèle): n} en mémoire, reportées
+        # dans le cache partagé (TEMPLATE_HITS_CACHE) au plus tard après TEMPLATE_HITS_FLUSH_INTERVAL
+        self._pending_hits = Counter()
+        self._hits_lock = threading.Lock()
+        self._hits_flushed_at = time.monotonic()
+        self.hits_cache_alias = settings.FACE_RECOGNITION_SETTINGS.get('TEMPLATE_HITS_CACHE', 'default')
+        self.hits_flush_interval = settings.FACE_RECOGNITION_SETTINGS.get('TEMPLATE_HITS_FLUSH_INTERVAL', 60)
+        # Réécritures du fichier des encodages : threads du processus, puis verrou de fichier
+        self._write_lock = threading.Lock()
+        self.gate_settings = settings.FACE_RECOGNITION_SETTINGS.get('QUALITY_GATE', {})
+        self.gate_counts = gate_counts
+        # Cache des résultats d'identification (même image renvoyée après un timeout...)
+        self.recognition_cache_ttl = settings.FACE_RECOGNITION_SETTINGS.get('RECOGNITION_CACHE_TTL', 0)
+        # Alias de CACHES partagé entre workers (le renvoi peut arriver sur un autre processus)
+        self.recognition_cache_alias = settings.FACE_RECOGNITION_SETTINGS.get('RECOGNITION_CACHE', 'default')
+        self.cache_counts = cache_counts
         
     def preprocess_image(self, image_data) -> Optional[np.ndarray]:
         """
@@ -47,6 +156,9 @@ class FaceRecognitionHandler:
         - Numpy array
         - Chemin de fichier image sur disque
         """
+        import cv2
+
+        started = time.perf_counter()
         try:
             image = None
 
@@ -88,6 +200,8 @@ class FaceRecognitionHandler:
                 logger.error("L'image n'a pas pu être convertie en array numpy")
                 return None
 
+            started = metrics.record_stage('decode', started)
+
             # Redimensionner si nécessaire
             max_size = settings.FACE_RECOGNITION_SETTINGS['MAX_IMAGE_SIZE']
             height, width = image.shape[:2]
@@ -100,6 +214,7 @@ class FaceRecognitionHandler:
                     new_width = max_size
                     new_height = int(height * (max_size / width))
                 image = cv2.resize(image, (new_width, new_height))
+            metrics.record_stage('preprocess', started)
 
             logger.debug(f"Image prétraitée avec succès: shape = {image.shape}")
             return image
@@ -112,6 +227,8 @@ class FaceRecognitionHandler:
         """
         Détecter les visages dans une image
         """
+        import cv2
+
         try:
             # Convertir en RGB si nécessaire
             if len(image.shape) == 3 and image.shape[2] == 3:
@@ -119,7 +236,9 @@ class FaceRecognitionHandler:
             else:
                 rgb_image = image
             
+            started = time.perf_counter()
             results = self.face_detection.process(rgb_image)
+            metrics.record_stage('detect', started)
             faces = []
             
             if results.detections:
@@ -145,10 +264,54 @@ class FaceRecognitionHandler:
             logger.error(f"Erreur lors de la détection de visages: {e}")
             return []
     
+    def quality_gate(self, image: np.ndarray) -> Optional[str]:
+        """
+        Contrôles peu coûteux sur une image réduite avant l'inférence FaceMesh :
+        netteté (variance du laplacien), exposition (histogramme), puis détection seule.
+        Retourne le motif de rejet (clé de GATE_MESSAGES) ou None si l'image est exploitable.
+        """
+        import cv2
+
+        config = self.gate_settings
+        if not config.get('ENABLED', True):
+            return None
+
+        started = time.perf_counter()
+        reason = None
+        size = config.get('SIZE', 160)
+        height, width = image.shape[:2]
+        scale = size / max(height, width)
+        small = cv2.resize(image, (int(width * scale), int(height * scale))) if scale < 1 else image
+        gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY) if small.ndim == 3 else small
+
+        histogram = np.bincount(gray.ravel(), minlength=256) / gray.size
+        if cv2.Laplacian(gray, cv2.CV_64F).var() < config.get('MIN_SHARPNESS', 50.0):
+            reason = 'flou'
+        elif histogram[:config.get('DARK_LEVEL', 40)].sum() > config.get('MAX_CLIPPED_RATIO', 0.6):
+            reason = 'sous_expose'
+        elif histogram[config.get('BRIGHT_LEVEL', 220):].sum() > config.get('MAX_CLIPPED_RATIO', 0.6):
+            reason = 'sur_expose'
+        else:
+            metrics.record_stage('gate', started)
+            faces = self.detect_faces(small)
+            if not faces:
+                reason = 'aucun_visage'
+            elif len(faces) > 1:
+                reason = 'plusieurs_visages'
+
+        if reason in ('flou', 'sous_expose', 'sur_expose'):
+            metrics.record_stage('gate', started)
+        self.gate_counts.inc(reason or 'accepte')
+        if reason:
+            logger.info(f"Image rejetée avant FaceMesh: {reason}")
+        return reason
+
     def extract_face_encoding(self, image: np.ndarray) -> Optional[np.ndarray]:
         """
-        Extraire l'encodage facial d'une image
+        Extraire l'encodage facial d'une image (embedding compact, voir utils/face_embedding.py)
         """
+        import cv2
+
         try:
             # Convertir en RGB si nécessaire
             if len(image.shape) == 3 and image.shape[2] == 3:
@@ -157,17 +320,14 @@ class FaceRecognitionHandler:
                 rgb_image = image
             
             # Utiliser FaceMesh pour extraire les landmarks
+            started = time.perf_counter()
             results = self.face_mesh.process(rgb_image)
+            metrics.record_stage('mesh', started)
             
             if results.multi_face_landmarks:
                 face_landmarks = results.multi_face_landmarks[0]
-                
-                # Extraire les coordonnées des landmarks
-                landmarks = []
-                for landmark in face_landmarks.landmark:
-                    landmarks.extend([landmark.x, landmark.y, landmark.z])
-                
-                return np.array(landmarks)
+                height, width = rgb_image.shape[:2]
+                return embed_landmarks(face_landmarks, width, height)
             
             return None
             
@@ -177,27 +337,139 @@ class FaceRecognitionHandler:
     
     def save_face_encoding(self, employee_id: int, encoding: np.ndarray) -> bool:
         """
-        Sauvegarder l'encodage facial d'un employé
+        Ajouter un encodage facial (modèle) à un employé
+        """
+        return self.save_face_templates(employee_id, [encoding])
+
+    def save_face_templates(self, employee_id: int, encodings: List[np.ndarray], replace: bool = False,
+                            blocking: bool = True) -> bool:
+        """
+        Ajouter des modèles à un employé (replace=True : remplacer les existants).
+        Au-delà de MAX_TEMPLATES, les anciens modèles les moins utilisés puis les plus
+        anciens sont évincés ; les nouveaux sont toujours conservés.
+        blocking=False : abandonner si un autre processus réécrit le fichier des encodages.
         """
         try:
-            # Charger les encodages existants
-            encodings_data = self.load_face_encodings()
-            
-            # Ajouter le nouvel encodage
-            encodings_data[str(employee_id)] = encoding.tolist()
-            
-            # Sauvegarder
-            os.makedirs(os.path.dirname(self.encodings_file), exist_ok=True)
-            with open(self.encodings_file, 'wb') as f:
-                pickle.dump(encodings_data, f)
-            
-            logger.info(f"Encodage sauvegardé pour l'employé {employee_id}")
+            with self.encodings_lock(blocking) as locked:
+                if not locked:
+                    logger.info(f"Fichier des encodages en cours d'écriture : modèle non ajouté pour l'employé {employee_id}")
+                    return False
+
+                # Relus sous le verrou : inclut les écritures des autres workers
+                index = self.get_index()
+                encodings_data = self.load_face_encodings()
+                key = str(employee_id)
+                existing = []
+                if not replace and key in encodings_data:
+                    existing = [t for t in face_templates(encodings_data[key]) if is_compact(t['encoding'])]
+
+                # Ajouter les nouveaux modèles, évincer les anciens si nécessaire
+                added = [new_template(encoding) for encoding in encodings][-self.max_templates:]
+                room = self.max_templates - len(added)
+                hits = self.template_hits(employee_id, existing)
+                ranked = sorted(zip(hits, existing), key=lambda h: (h[0], h[1]['added_at']), reverse=True)
+                kept = [t for _, t in ranked[:room]]
+                templates = sorted(kept + added, key=lambda t: t['added_at'])
+
+                encodings_data[key] = templates
+                self.write_face_encodings(encodings_data)
+
+                # Nouvel index substitué à l'ancien : les recherches en cours gardent un état cohérent
+                index = index.copy()
+                index.remove(employee_id)
+                index.add(employee_id, np.stack([t['encoding'] for t in templates]))
+                self._store_index(index)
+                self._forget_template_hits(employee_id, [t for _, t in ranked[room:]])
+            
+            logger.info(
+                f"{len(added)} modèle(s) sauvegardé(s) pour l'employé {employee_id} "
+                f"({len(templates)} au total, {len(existing) - len(kept)} évincé(s))"
+            )
             return True
             
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde d'encodage: {e}")
             return False
+
+    @contextmanager
+    def encodings_lock(self, blocking: bool = True):
+        """
+        Verrou des réécritures du fichier des encodages, partagé entre workers (fichier .lock
+        à côté). Donne False si blocking=False et qu'un autre écrit déjà.
+        """
+        if not self._write_lock.acquire(blocking=blocking):
+            yield False
+            return
+        try:
+            os.makedirs(os.path.dirname(self.encodings_file), exist_ok=True)
+            with open(self.encodings_file + '.lock', 'a') as lock_file:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        yield False
+                        return
+                # Libéré à la fermeture du fichier
+                yield True
+        finally:
+            self._write_lock.release()
     
+    def write_face_encodings(self, encodings_data: Dict):
+        """
+        Réécrire le fichier des encodages (sous encodings_lock). Fichier temporaire puis
+        remplacement : les autres workers ne lisent jamais un fichier à moitié écrit.
+        """
+        os.makedirs(os.path.dirname(self.encodings_file), exist_ok=True)
+        tmp_path = f"{self.encodings_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(encodings_data, f)
+        os.replace(tmp_path, self.encodings_file)
+
+    def template_hits(self, employee_id: int, templates: List[Dict]) -> List[int]:
+        """
+        Utilisations de chaque modèle : compteur du fichier (ancien format) + cache partagé
+        """
+        self.flush_template_hits()
+        hits = [template.get('hits', 0) for template in templates]
+        keys = [self._hits_key(employee_id, t['encoding']) for t in templates]
+        try:
+            stored = caches[self.hits_cache_alias].get_many(keys)
+        except Exception as e:
+            # Éviction par ancienneté seule
+            logger.error(f"Erreur lors de la lecture des utilisations de modèles: {e}")
+            return hits
+        return [h + stored.get(key, 0) for h, key in zip(hits, keys)]
+
+    def flush_template_hits(self):
+        """
+        Reporter les utilisations en attente dans le cache partagé (TEMPLATE_HITS_CACHE).
+        incr n'est pas atomique sur tous les backends : compteur indicatif, utilisé pour l'éviction.
+        """
+        with self._hits_lock:
+            pending, self._pending_hits = self._pending_hits, Counter()
+            self._hits_flushed_at = time.monotonic()
+        if not pending:
+            return
+        hits_cache = caches[self.hits_cache_alias]
+        try:
+            for (employee_id, digest), count in pending.items():
+                key = f"face:template_hits:{employee_id}:{digest}"
+                hits_cache.add(key, 0, None)
+                hits_cache.incr(key, count)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'enregistrement des utilisations de modèles: {e}")
+
+    def _hits_key(self, employee_id: int, encoding) -> str:
+        return f"face:template_hits:{employee_id}:{_template_digest(encoding)}"
+
+    def _forget_template_hits(self, employee_id: int, templates: List[Dict]):
+        if not templates:
+            return
+        try:
+            caches[self.hits_cache_alias].delete_many([self._hits_key(employee_id, t['encoding']) for t in templates])
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression des utilisations de modèles: {e}")
+
     def load_face_encodings(self) -> Dict:
         """
         Charger tous les encodages faciaux
@@ -212,14 +484,67 @@ class FaceRecognitionHandler:
             logger.error(f"Erreur lors du chargement des encodages: {e}")
             return {}
     
+    def _encodings_version(self) -> int:
+        try:
+            return os.stat(self.encodings_file).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def get_index(self) -> FaceIndex:
+        """
+        Index des encodages connus : en mémoire, sinon relu depuis le disque, sinon reconstruit.
+        Rechargé quand le fichier des encodages a été modifié (par un autre worker par exemple).
+        """
+        version = self._encodings_version()
+        if self._index is not None and self._index.version == version:
+            return self._index
+
+        started = time.perf_counter()
+        index = load_index(self.index_file)
+        if index is None or index.version != version:
+            index = self.build_index()
+        metrics.record_stage('index_load', started)
+        self._index = index
+        return index
+
+    def build_index(self) -> FaceIndex:
+        """
+        Reconstruire l'index depuis le fichier des encodages et le persister
+        """
+        labels, vectors, legacy = [], [], 0
+        for employee_id, value in self.load_face_encodings().items():
+            for template in face_templates(value):
+                # Les anciens encodages (landmarks bruts) ne sont pas comparables
+                if not is_compact(template['encoding']):
+                    legacy += 1
+                    continue
+                labels.append(int(employee_id))
+                vectors.append(np.asarray(template['encoding'], dtype=EMBEDDING_DTYPE))
+        if legacy:
+            logger.warning(f"{legacy} encodage(s) à l'ancien format ignoré(s) : lancer `manage.py reencode_faces`")
+
+        index = create_index()
+        index.build(labels, vectors)
+        self._store_index(index)
+        logger.info(f"Index facial reconstruit: {len(index)} encodage(s) ({index.backend})")
+        return index
+
+    def _store_index(self, index: FaceIndex):
+        index.version = self._encodings_version()
+        try:
+            index.save(self.index_file)
+        except OSError as e:
+            # L'index reste utilisable en mémoire ; il sera reconstruit au prochain démarrage
+            logger.error(f"Erreur lors de la sauvegarde de l'index facial: {e}")
+        self._index = index
+
     def compare_faces(self, known_encoding: np.ndarray, face_encoding: np.ndarray) -> float:
         """
         Comparer deux encodages faciaux et retourner la distance
         """
         try:
             # Calculer la distance euclidienne
-            distance = np.linalg.norm(known_encoding - face_encoding)
-            return distance
+            return float(distances(np.asarray(known_encoding).reshape(1, -1), np.asarray(face_encoding))[0])
             
         except Exception as e:
             logger.error(f"Erreur lors de la comparaison: {e}")
@@ -229,119 +554,248 @@ class FaceRecognitionHandler:
         """
         Reconnaître un visage et retourner l'ID de l'employé
         """
+        return self.identify_face(image_data)['employee_id']
+
+    def identify_face(self, image_data) -> Dict[str, any]:
+        """
+        Identification 1:N avec le détail du résultat :
+        {'employee_id': int ou None, 'distance': float ou None, 'reason': motif de rejet ou None, 'message': str}
+
+        Le résultat est mis en cache (RECOGNITION_CACHE_TTL) par empreinte du contenu reçu, puis
+        par empreinte de l'encodage ; les clés incluent la version du fichier des encodages.
+        """
         try:
-            # Préprocesser l'image
-            image = self.preprocess_image(image_data)
-            if image is None:
-                return None
-            
-            # Extraire l'encodage du visage
-            face_encoding = self.extract_face_encoding(image)
-            if face_encoding is None:
-                logger.warning("Aucun visage détecté dans l'image")
-                return None
-            
-            # Charger les encodages connus
-            known_encodings = self.load_face_encodings()
-            if not known_encodings:
-                logger.warning("Aucun encodage facial enregistré")
-                return None
-            
-            # Comparer avec tous les encodages connus
-            best_match_id = None
-            best_distance = float('inf')
-            
-            for employee_id, known_encoding in known_encodings.items():
-                known_encoding = np.array(known_encoding)
-                distance = self.compare_faces(known_encoding, face_encoding)
-                
-                if distance < best_distance:
-                    best_distance = distance
-                    best_match_id = int(employee_id)
-            
-            # Vérifier si la distance est dans la tolérance
-            if best_distance <= self.tolerance:
-                logger.info(f"Visage reconnu: employé {best_match_id} (distance: {best_distance})")
-                return best_match_id
-            else:
-                logger.warning(f"Visage non reconnu (meilleure distance: {best_distance})")
-                return None
-                
+            image_key = self._recognition_cache_key('image', image_data)
+            result = self._cached_result(image_key, 'image')
+            if result is None:
+                self.cache_counts.inc('miss')
+                result = self._identify_face(image_data)
+                self._cache_result(image_key, result)
+            return result
+
         except Exception as e:
             logger.error(f"Erreur lors de la reconnaissance faciale: {e}")
+            return _result(None, None, 'Erreur lors de la reconnaissance faciale')
+
+    def _recognition_cache_key(self, kind: str, value) -> Optional[str]:
+        if not self.recognition_cache_ttl:
+            return None
+        digest = _encoding_hash(value) if kind == 'encoding' else _content_hash(value)
+        if not digest:
             return None
+        return f"face:recognition:{kind}:{self._encodings_version()}:{digest}"
+
+    def _cached_result(self, key: Optional[str], kind: str) -> Optional[Dict]:
+        if key is None:
+            return None
+        try:
+            result = caches[self.recognition_cache_alias].get(key)
+        except Exception as e:
+            # Cache indisponible : l'identification continue sans
+            logger.error(f"Erreur lors de la lecture du cache d'identification: {e}")
+            return None
+        if result is not None:
+            self.cache_counts.inc(f'hit_{kind}')
+        return result
+
+    def _cache_result(self, key: Optional[str], result: Dict):
+        if key is None:
+            return
+        try:
+            caches[self.recognition_cache_alias].set(key, result, self.recognition_cache_ttl)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'écriture du cache d'identification: {e}")
+
+    def _identify_face(self, image_data) -> Dict[str, any]:
+        # Préprocesser l'image
+        image = self.preprocess_image(image_data)
+        if image is None:
+            return _result(None, None, 'Image invalide ou format non supporté')
+        
+        # Rejeter les images inexploitables avant FaceMesh
+        reason = self.quality_gate(image)
+        if reason:
+            return _result(None, None, GATE_MESSAGES[reason], reason)
+        
+        # Extraire l'encodage du visage
+        face_encoding = self.extract_face_encoding(image)
+        if face_encoding is None:
+            logger.warning("Aucun visage détecté dans l'image")
+            return _result(None, None, 'Aucun visage détecté')
+
+        encoding_key = self._recognition_cache_key('encoding', face_encoding)
+        result = self._cached_result(encoding_key, 'encoding')
+        if result is not None:
+            return result
+        
+        # Chercher l'employé le plus proche (minimum sur ses modèles)
+        index = self.get_index()
+        started = time.perf_counter()
+        matches = index.search(face_encoding, k=1)
+        metrics.record_stage('match', started)
+        if not matches:
+            logger.warning("Aucun encodage facial enregistré")
+            return _result(None, None, 'Aucun visage enregistré')
+        best_match_id, best_distance = matches[0]
+        
+        # Vérifier si la distance est dans la tolérance
+        if best_distance <= self.tolerance:
+            logger.info(f"Visage reconnu: employé {best_match_id} (distance: {best_distance})")
+            self._record_match(best_match_id, face_encoding, best_distance)
+            result = _result(best_match_id, best_distance, 'Visage reconnu')
+        else:
+            logger.warning(f"Visage non reconnu (meilleure distance: {best_distance})")
+            result = _result(None, best_distance, 'Visage non reconnu')
+
+        self._cache_result(encoding_key, result)
+        return result
     
-    def register_face(self, employee_id: int, image_data) -> bool:
+    def verify_face(self, employee_id: int, image_data) -> Dict[str, any]:
         """
-        Enregistrer un nouveau visage pour un employé
+        Vérification 1:1 : comparer l'image aux seuls encodages de l'employé annoncé
+        (badge, immatricule, session). Coût indépendant du nombre d'employés enregistrés.
         """
         try:
-            # Préprocesser l'image
+            templates = self.get_index().templates(employee_id)
+            if not len(templates):
+                return {'match': False, 'distance': None, 'message': 'Aucun visage enregistré pour cet employé'}
+
             image = self.preprocess_image(image_data)
             if image is None:
-                return False
-            
-            # Vérifier qu'il y a un visage dans l'image
-            faces = self.detect_faces(image)
-            if not faces:
-                logger.error("Aucun visage détecté dans l'image")
-                return False
-            
-            if len(faces) > 1:
-                logger.error("Plusieurs visages détectés. Une seule personne doit être présente.")
-                return False
-            
-            # Extraire l'encodage
+                return {'match': False, 'distance': None, 'message': 'Image invalide ou format non supporté'}
+
+            reason = self.quality_gate(image)
+            if reason:
+                return {'match': False, 'distance': None, 'message': GATE_MESSAGES[reason], 'reason': reason}
+
             face_encoding = self.extract_face_encoding(image)
             if face_encoding is None:
-                logger.error("Impossible d'extraire l'encodage facial")
-                return False
-            
-            # Sauvegarder l'encodage
-            success = self.save_face_encoding(employee_id, face_encoding)
-            
-            if success:
-                # Sauvegarder aussi l'image
-                image_path = os.path.join(
-                    settings.FACE_IMAGES_DIR, 
-                    f"employee_{employee_id}.jpg"
-                )
-                cv2.imwrite(image_path, cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
-                
-            return success
+                return {'match': False, 'distance': None, 'message': 'Aucun visage détecté'}
+
+            started = time.perf_counter()
+            distance = float(distances(templates, face_encoding).min())
+            metrics.record_stage('match', started)
+            if distance <= self.tolerance:
+                logger.info(f"Visage vérifié: employé {employee_id} (distance: {distance})")
+                self._record_match(employee_id, face_encoding, distance)
+                return {'match': True, 'distance': distance, 'message': 'Visage vérifié'}
+            logger.warning(f"Vérification échouée pour l'employé {employee_id} (distance: {distance})")
+            return {'match': False, 'distance': distance, 'message': 'Le visage ne correspond pas'}
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la vérification faciale: {e}")
+            return {'match': False, 'distance': None, 'message': 'Erreur lors de la vérification faciale'}
+
+    def _record_match(self, employee_id: int, face_encoding: np.ndarray, distance: float):
+        """
+        Compter l'utilisation du modèle le plus proche ; ajouter l'image comme nouveau modèle
+        si la correspondance est sûre sans être redondante (AUTO_TEMPLATE_RANGE)
+        """
+        templates = self.get_index().templates(employee_id)
+        if len(templates):
+            nearest = templates[int(np.argmin(distances(templates, face_encoding)))]
+            with self._hits_lock:
+                self._pending_hits[(employee_id, _template_digest(nearest))] += 1
+                flush = time.monotonic() - self._hits_flushed_at >= self.hits_flush_interval
+            if flush:
+                self.flush_template_hits()
+        if self.auto_template_range:
+            low, high = self.auto_template_range
+            if low <= distance <= high:
+                # Sur le chemin de la requête : pas d'attente si un autre worker écrit déjà
+                self.save_face_templates(employee_id, [face_encoding], blocking=False)
+
+    def _enrollment_encoding(self, image_data) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Image prétraitée et encodage d'une image d'enrôlement (un seul visage), ou (None, None)
+        """
+        # Préprocesser l'image
+        image = self.preprocess_image(image_data)
+        if image is None:
+            return None, None
+        
+        # Netteté, exposition et présence d'un seul visage
+        reason = self.quality_gate(image)
+        if reason:
+            logger.error(f"Image d'enrôlement refusée: {GATE_MESSAGES[reason]}")
+            return None, None
+        
+        # Extraire l'encodage
+        face_encoding = self.extract_face_encoding(image)
+        if face_encoding is None:
+            logger.error("Impossible d'extraire l'encodage facial")
+            return None, None
+        return image, face_encoding
+
+    def register_face(self, employee_id: int, image_data) -> bool:
+        """
+        Enregistrer un nouveau visage pour un employé
+        """
+        return bool(self.register_faces(employee_id, [image_data]))
+
+    def register_faces(self, employee_id: int, images, replace: bool = False) -> List[np.ndarray]:
+        """
+        Enregistrer plusieurs images d'un employé en une fois (un modèle par image valide).
+        Retourne les encodages enregistrés (liste vide en cas d'échec).
+        """
+        import cv2
+
+        try:
+            encodings, last_image = [], None
+            for image_data in images:
+                image, face_encoding = self._enrollment_encoding(image_data)
+                if face_encoding is not None:
+                    encodings.append(face_encoding)
+                    last_image = image
+            if not encodings:
+                return []
+            
+            # Sauvegarder les encodages
+            if not self.save_face_templates(employee_id, encodings, replace=replace):
+                return []
+            
+            # Sauvegarder aussi l'image
+            image_path = os.path.join(
+                settings.FACE_IMAGES_DIR, 
+                f"employee_{employee_id}.jpg"
+            )
+            cv2.imwrite(image_path, cv2.cvtColor(last_image, cv2.COLOR_RGB2BGR))
+            return encodings
             
         except Exception as e:
             logger.error(f"Erreur lors de l'enregistrement du visage: {e}")
-            return False
+            return []
     
     def delete_face_encoding(self, employee_id: int) -> bool:
         """
         Supprimer l'encodage facial d'un employé
         """
         try:
-            # Charger les encodages existants
-            encodings_data = self.load_face_encodings()
-            
-            # Supprimer l'encodage
-            if str(employee_id) in encodings_data:
+            with self.encodings_lock():
+                index = self.get_index()
+
+                # Charger les encodages existants
+                encodings_data = self.load_face_encodings()
+                if str(employee_id) not in encodings_data:
+                    return False
+
+                # Supprimer l'encodage
                 del encodings_data[str(employee_id)]
-                
-                # Sauvegarder
-                with open(self.encodings_file, 'wb') as f:
-                    pickle.dump(encodings_data, f)
-                
-                # Supprimer l'image associée
-                image_path = os.path.join(
-                    settings.FACE_IMAGES_DIR, 
-                    f"employee_{employee_id}.jpg"
-                )
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-                
-                logger.info(f"Encodage supprimé pour l'employé {employee_id}")
-                return True
-            
-            return False
+                self.write_face_encodings(encodings_data)
+                index = index.copy()
+                index.remove(employee_id)
+                self._store_index(index)
+
+            # Supprimer l'image associée
+            image_path = os.path.join(
+                settings.FACE_IMAGES_DIR, 
+                f"employee_{employee_id}.jpg"
+            )
+            if os.path.exists(image_path):
+                os.remove(image_path)
+            
+            logger.info(f"Encodage supprimé pour l'employé {employee_id}")
+            return True
             
         except Exception as e:
             logger.error(f"Erreur lors de la suppression d'encodage: {e}")
@@ -416,8 +870,57 @@ class FaceRecognitionHandler:
                 'message': 'Erreur lors de la validation de l\'image'
             }
 
-# Instance globale du gestionnaire
-face_recognition_handler = FaceRecognitionHandler()
+_handler = None
+_handler_lock = threading.Lock()
+
+
+def get_face_recognition_handler() -> FaceRecognitionHandler:
+    """
+    Moteur de reconnaissance faciale, construit à la première utilisation : les commandes
+    manage.py, migrations et workers qui ne font pas de reconnaissance n'importent ni
+    MediaPipe ni OpenCV.
+    """
+    global _handler
+    if _handler is None:
+        with _handler_lock:
+            if _handler is None:
+                _handler = FaceRecognitionHandler()
+    return _handler
+
+
+# Instance globale du gestionnaire (construite au premier accès)
+face_recognition_handler = SimpleLazyObject(get_face_recognition_handler)
+
+
+def warm_up() -> float:
+    """
+    Construire le moteur, charger l'index et exécuter une inférence à vide pour que la
+    première reconnaissance ne paie pas le démarrage des graphes MediaPipe.
+    Retourne la durée en secondes.
+    """
+    started = time.perf_counter()
+    try:
+        handler = get_face_recognition_handler()
+        blank = np.zeros((240, 240, 3), dtype=np.uint8)
+        handler.detect_faces(blank)
+        handler.extract_face_encoding(blank)
+        handler.get_index()
+    except Exception as e:
+        logger.error(f"Erreur lors du préchauffage de la reconnaissance faciale: {e}")
+    elapsed = time.perf_counter() - started
+    logger.info(f"Moteur de reconnaissance faciale prêt en {elapsed:.2f} s (pid {os.getpid()})")
+    return elapsed
+
+
+def post_worker_init(worker):
+    """
+    Hook gunicorn, à déclarer dans gunicorn.conf.py :
+        from utils.face_recognition_utils import post_worker_init
+    Appelé dans chaque worker une fois l'application Django chargée (contrairement à
+    post_fork, appelé avant) ; les graphes MediaPipe ne sont donc jamais créés dans le
+    processus maître puis partagés par fork.
+    """
+    warm_up()
 
 # Ajoutez ces fonctions à la fin de votre fichier face_recognition_utils.py
 
@@ -0,0 +1,164 @@
+# utils/metrics.py
+"""
+Métriques en mémoire du processus, exposées au format texte Prometheus (GET /metrics).
+
+- Compteurs (collections.Counter enregistrés sous un nom) : c.inc('valeur du label')
+- Histogrammes de durée par étape du pipeline facial, alimentés par record_stage()
+
+Avec METRICS_SETTINGS['SERVER_TIMING'], ServerTimingMiddleware ajoute aussi les durées
+des étapes de la requête dans l'en-tête Server-Timing (débogage des bornes de pointage).
+
+Chaque worker a ses propres valeurs : Prometheus les agrège par instance.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+# Durées des étapes de la requête en cours : [(étape, secondes), ...] ou None hors requête
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class CounterMetric(Counter):
+    def __init__(self, name, help_text, label):
+        super().__init__()
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._lock = threading.Lock()
+
+    def inc(self, value, amount=1):
+        # `+=` sur un Counter n'est pas atomique entre threads (lecture puis écriture)
+        with self._lock:
+            self[value] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self.items())
+        for value, count in items:
+            lines.append(f'{self.name}{{{self.label}="{value}"}} {count}')
+        return lines
+
+
+class HistogramMetric:
+    def __init__(self, name, help_text, label, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, amount):
+        with self._lock:
+            counts, total = self._series.get(value, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect_left(self.buckets, amount)] += 1
+            self._series[value] = (counts, total + amount)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {value: (list(counts), total) for value, (counts, total) in self._series.items()}
+        for value, (counts, total) in sorted(series.items()):
+            label = f'{self.label}="{value}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return lines
+
+
+def _register(name, factory):
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = factory()
+        return _registry[name]
+
+
+def counter(name, help_text, label) -> CounterMetric:
+    return _register(name, lambda: CounterMetric(name, help_text, label))
+
+
+def histogram(name, help_text, label, buckets=DEFAULT_BUCKETS) -> HistogramMetric:
+    return _register(name, lambda: HistogramMetric(name, help_text, label, buckets))
+
+
+stage_seconds = histogram(
+    'face_pipeline_stage_seconds', "Durée des étapes de la reconnaissance faciale", 'stage'
+)
+
+
+def record_stage(stage, started):
+    """
+    Enregistrer la durée d'une étape commencée à `started` (time.perf_counter()).
+    Retourne l'instant de fin, utilisable comme début de l'étape suivante.
+    """
+    now = time.perf_counter()
+    stage_seconds.observe(stage, now - started)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, now - started))
+    return now
+
+
+def render():
+    lines = []
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    GET /metrics (format texte Prometheus), avec l'en-tête Authorization: Bearer <token>.
+    Refusé tant que METRICS_SETTINGS['TOKEN'] n'est pas défini.
+    """
+    token = settings.METRICS_SETTINGS.get('TOKEN')
+    if not token or not constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ServerTimingMiddleware:
+    """
+    En-tête Server-Timing avec la durée cumulée de chaque étape mesurée pendant la requête
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.METRICS_SETTINGS.get('SERVER_TIMING', False)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        token = _request_timings.set([])
+        try:
+            response = self.get_response(request)
+            totals = {}
+            for stage, seconds in _request_timings.get():
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        finally:
+            _request_timings.reset(token)
+        if totals:
+            response['Server-Timing'] = ', '.join(
+                f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()
+            )
+        return response
@@ -0,0 +1,206 @@
+# utils/pagination.py
+import binascii
+import json
+from base64 import b64decode, b64encode
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+MAX_PAGE_SIZE = 100
+
+
+class BoundedPageNumberPagination(PageNumberPagination):
+    """
+    Pagination par numéro de page ; ?page_size= accepté mais plafonné
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+    def get_page_info(self):
+        return {
+            'count': self.page.paginator.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+
+
+class CountlessPageNumberPagination(BasePagination):
+    """
+    Même paramètres que BoundedPageNumberPagination mais sans COUNT(*) :
+    on lit page_size + 1 lignes pour savoir s'il existe une page suivante.
+    """
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+    def __init__(self, page_size=None):
+        self.page_size = page_size or api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page_size = min(int(request.query_params[self.page_size_query_param]), self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound("Page invalide.")
+        if self.page_number < 1 or self.page_size < 1:
+            raise NotFound("Page invalide.")
+
+        offset = (self.page_number - 1) * self.page_size
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def get_page_info(self):
+        url = self.request.build_absolute_uri()
+        previous = None
+        if self.page_number == 2:
+            previous = remove_query_param(url, self.page_query_param)
+        elif self.page_number > 2:
+            previous = replace_query_param(url, self.page_query_param, self.page_number - 1)
+        return {
+            'next': replace_query_param(url, self.page_query_param, self.page_number + 1) if self.has_next else None,
+            'previous': previous,
+        }
+
+
+class KeysetPagination(BasePagination):
+    """
+    Curseur opaque (?cursor=) sur une clé composite, ex. ('nom', 'prenom', 'id') : la page
+    suivante est lue avec WHERE (nom, prenom, id) > (clé de la dernière ligne), sans OFFSET,
+    quel que soit le nombre d'homonymes. Coût constant avec un index sur la clé.
+
+    Le dernier champ doit être unique et aucun champ ne doit être NULL ; préfixe '-' : ordre
+    décroissant pour ce champ.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+    def __init__(self, ordering, page_size=None):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size or api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page_size = min(int(request.query_params[self.page_size_query_param]), self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        if self.page_size < 1:
+            raise NotFound("Curseur invalide.")
+
+        cursor = self.decode_cursor(request)
+        # Page précédente : ordre inversé à partir de la première ligne de la page courante
+        reverse = cursor is not None and cursor['reverse']
+        ordering = tuple(_invert(field) for field in self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(_after(ordering, cursor['key']))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')))
+            if len(cursor['key']) != len(self.ordering):
+                raise ValueError
+            return {'reverse': bool(cursor['reverse']), 'key': cursor['key']}
+        except (TypeError, KeyError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound("Curseur invalide.")
+
+    def encode_cursor(self, row, reverse):
+        key = [_value(row, field.lstrip('-')) for field in self.ordering]
+        encoded = b64encode(json.dumps({'reverse': reverse, 'key': key}, cls=DjangoJSONEncoder).encode()).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.page or not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.page or not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_page_info(self):
+        return {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+
+
+def _invert(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _value(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def _after(ordering, key):
+    """
+    (a, b, c) > (x, y, z) développé : a > x OR (a = x AND (b > y OR (b = y AND c > z))),
+    précédé de a >= x pour que le premier champ de l'index borne le parcours
+    """
+    condition = None
+    for field, value in reversed(list(zip(ordering, key))):
+        name = field.lstrip('-')
+        strict = Q(**{f"{name}__{'lt' if field.startswith('-') else 'gt'}": value})
+        condition = strict if condition is None else strict | (Q(**{name: value}) & condition)
+    first = ordering[0]
+    bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": key[0]})
+    return bound & condition
+
+
+class PaginatedAPIViewMixin:
+    """
+    Pagination des listes servies par des APIView.
+
+    - par défaut : ?page=&page_size= (plafonné), avec `count`
+    - ?count=false : pas de COUNT(*), seulement next/previous
+    - ?cursor= (ou ?pagination=cursor) : pagination par clé si la vue déclare cursor_ordering
+    """
+    page_size = None
+    cursor_ordering = None
+
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            ordering = self.get_cursor_ordering()
+            if ordering and ('cursor' in params or params.get('pagination') == 'cursor'):
+                self._paginator = KeysetPagination(ordering, self.page_size)
+            elif params.get('count') == 'false':
+                self._paginator = CountlessPageNumberPagination(self.page_size)
+            else:
+                self._paginator = BoundedPageNumberPagination()
+                if self.page_size:
+                    self._paginator.page_size = self.page_size
+        return self._paginator
+
+    def paginate_queryset(self, queryset):
+        return self.paginator.paginate_queryset(queryset, self.request, view=self)
+
+    def get_paginated_data(self, key, data, **extra):
+        return {key: data, **extra, **self.paginator.get_page_info()}
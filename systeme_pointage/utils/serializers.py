@@ -0,0 +1,95 @@
+# utils/serializers.py
+from django.core.exceptions import FieldDoesNotExist
+
+
+def _csv_param(request, name):
+    if request is None:
+        return set()
+    value = request.query_params.get(name, '')
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+def _related_columns(model, select_related, deferred, prefix=''):
+    """
+    Chemins des colonnes des relations de `select_related` (dict imbriqué), hors `deferred`
+    """
+    columns = set()
+    for name, nested in select_related.items():
+        path = f"{prefix}{name}"
+        related = model._meta.get_field(name).related_model
+        columns.add(path)
+        columns.update(
+            f"{path}__{field.name}" for field in related._meta.concrete_fields
+            if f"{path}__{field.name}" not in deferred
+        )
+        columns.update(_related_columns(related, nested, deferred, f"{path}__"))
+    return columns
+
+
+class SparseFieldsetMixin:
+    """
+    ?fields=id,nom : ne sérialiser que ces champs.
+    ?expand=face_encoding : inclure un champ lourd de Meta.expandable_fields,
+    exclus par défaut des listes (many=True).
+
+    optimize_queryset() applique le même choix à la requête (.only() / .defer()) pour
+    que les colonnes non demandées ne soient pas lues. Meta.field_dependencies indique
+    les colonnes lues par les champs calculés (ex. photo_url -> photo).
+    """
+
+    def __init__(self, *args, **kwargs):
+        in_list = kwargs.pop('in_list', False)
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        fields = _csv_param(request, 'fields')
+        expand = _csv_param(request, 'expand')
+
+        if in_list:
+            for name in getattr(self.Meta, 'expandable_fields', ()):
+                if name not in expand:
+                    self.fields.pop(name, None)
+        if fields:
+            for name in set(self.fields) - fields - expand:
+                self.fields.pop(name)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        kwargs['in_list'] = True
+        return super().many_init(*args, **kwargs)
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request=None, in_list=True):
+        fields = _csv_param(request, 'fields')
+        expand = _csv_param(request, 'expand')
+
+        if not fields:
+            deferred = [
+                name for name in getattr(cls.Meta, 'expandable_fields', ())
+                if in_list and name not in expand
+            ]
+            return queryset.defer(*deferred) if deferred else queryset
+
+        select_related = queryset.query.select_related
+        if select_related is True:
+            return queryset
+
+        model = cls.Meta.model
+        dependencies = getattr(cls.Meta, 'field_dependencies', {})
+        columns = {model._meta.pk.name}
+        if isinstance(select_related, dict):
+            deferred, defer_mode = queryset.query.deferred_loading
+            if defer_mode and deferred:
+                # .only() remplace les .defer() précédents (ex. without_face_encodings) :
+                # colonnes des relations jointes listées explicitement, sans les champs différés
+                columns.update(_related_columns(model, select_related, deferred))
+            else:
+                columns.update(select_related)
+        for name in fields | expand:
+            for source in dependencies.get(name, [name]):
+                try:
+                    field = model._meta.get_field(source)
+                except FieldDoesNotExist:
+                    continue
+                if field.concrete:
+                    columns.add(source)
+        return queryset.only(*columns)